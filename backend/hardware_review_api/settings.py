@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "corsheaders",
@@ -172,7 +173,7 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "main.pagination.ListPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -208,3 +209,101 @@ SERVER_EMAIL = config(
     "SERVER_EMAIL",
     default="info@xn--donanmpuan-1ubf.com",
 )
+
+# İstekler e-postayı sadece EmailOutbox'a yazar; teslimatı
+# `python manage.py send_email_outbox --loop` yapar (bkz. main/outbox.py)
+EMAIL_OUTBOX_BATCH_SIZE = config("EMAIL_OUTBOX_BATCH_SIZE", default=50, cast=int)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config("EMAIL_OUTBOX_MAX_ATTEMPTS", default=8, cast=int)
+# Başarısız denemeden sonra bekleme: RETRY_BASE * 2^(deneme-1) saniye, en fazla RETRY_MAX
+EMAIL_OUTBOX_RETRY_BASE = config("EMAIL_OUTBOX_RETRY_BASE", default=30, cast=int)
+EMAIL_OUTBOX_RETRY_MAX = config("EMAIL_OUTBOX_RETRY_MAX", default=3600, cast=int)
+# SENDING'de bu kadar saniye kalan mesaj (ölen worker) tekrar alınır
+EMAIL_OUTBOX_LOCK_TIMEOUT = config("EMAIL_OUTBOX_LOCK_TIMEOUT", default=600, cast=int)
+
+# Bülten gönderimi (`python manage.py send_newsletters --loop`, bkz. main/newsletter.py)
+# Tek send_messages() çağrısında, tek SMTP bağlantısı üzerinden giden alıcı sayısı
+NEWSLETTER_CHUNK_SIZE = config("NEWSLETTER_CHUNK_SIZE", default=100, cast=int)
+# Paralel SMTP bağlantısı (thread) sayısı; sağlayıcının bağlantı limitini aşmayın
+NEWSLETTER_WORKERS = config("NEWSLETTER_WORKERS", default=2, cast=int)
+# RUNNING kampanya bu kadar saniye checkpoint yazmazsa başka worker devralır
+NEWSLETTER_LOCK_TIMEOUT = config("NEWSLETTER_LOCK_TIMEOUT", default=300, cast=int)
+
+# =========================
+# Cache / response cache
+# =========================
+
+# Varsayılan: BASE_DIR/var/cache altında dosya cache'i; gunicorn worker'ları (--workers 3)
+# nesil sayaçlarını paylaşır. Üretimde CACHE_BACKEND olarak
+# django.core.cache.backends.redis.RedisCache verilebilir. Süreç içi LocMemCache'te bir
+# worker'daki kayıt diğerlerinin cache'ini geçersiz kılamaz.
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": config("CACHE_LOCATION", default=str(BASE_DIR / "var" / "cache")),
+    }
+}
+
+# Testler cache, tracking ve media dizinlerini geçici bir dizine yönlendirir
+TEST_RUNNER = "main.test_runner.IsolatedTestRunner"
+
+# Herkese açık okuma uçlarının yanıt cache'i (bkz. main/response_cache.py)
+RESPONSE_CACHE_ENABLED = config("RESPONSE_CACHE_ENABLED", default=True, cast=bool)
+RESPONSE_CACHE_ALIAS = config("RESPONSE_CACHE_ALIAS", default="default")
+# Paylaşılan cache'teki süre; sinyal atlatan yazmalar (queryset.update) en geç bu kadar sonra görünür
+RESPONSE_CACHE_TIMEOUT = config("RESPONSE_CACHE_TIMEOUT", default=300, cast=int)
+# Süreç içi LRU
+RESPONSE_CACHE_LOCAL_TIMEOUT = config("RESPONSE_CACHE_LOCAL_TIMEOUT", default=30, cast=int)
+RESPONSE_CACHE_LOCAL_MAX_ENTRIES = config("RESPONSE_CACHE_LOCAL_MAX_ENTRIES", default=1000, cast=int)
+# Aynı anahtar için eşzamanlı kaçırmalarda görünümü tek istek çalıştırır
+RESPONSE_CACHE_SINGLE_FLIGHT = config("RESPONSE_CACHE_SINGLE_FLIGHT", default=True, cast=bool)
+# Liderlik süreçler arası da cache.add() ile alınır (paylaşılan backend'de anlamlı)
+RESPONSE_CACHE_SHARED_LOCK = config("RESPONSE_CACHE_SHARED_LOCK", default=True, cast=bool)
+# Lider süreç ölürse kilit bu kadar saniye sonra düşer
+RESPONSE_CACHE_LOCK_TIMEOUT = config("RESPONSE_CACHE_LOCK_TIMEOUT", default=10, cast=int)
+# Bayat kopya yokken liderin sonucunu en fazla bu kadar saniye bekle
+RESPONSE_CACHE_WAIT = config("RESPONSE_CACHE_WAIT", default=2.0, cast=float)
+# Her yanıtın nesilsiz (bayat) kopyası; yenilenirken bekleyenlere verilir
+RESPONSE_CACHE_STALE_TIMEOUT = config("RESPONSE_CACHE_STALE_TIMEOUT", default=3600, cast=int)
+
+# =========================
+# Tracking ingestion (article views / outbound clicks)
+# =========================
+
+# True: /api/article-view/ ve /api/outbound/ olayları bellekte biriktirilip toplu yazılır
+TRACKING_BUFFER_ENABLED = config("TRACKING_BUFFER_ENABLED", default=False, cast=bool)
+# Buffer bu sayıya ulaşınca yeni olaylar düşürülür (drop sayacı artar)
+TRACKING_BUFFER_MAX_EVENTS = config("TRACKING_BUFFER_MAX_EVENTS", default=10000, cast=int)
+TRACKING_BUFFER_FLUSH_SIZE = config("TRACKING_BUFFER_FLUSH_SIZE", default=500, cast=int)
+TRACKING_BUFFER_FLUSH_INTERVAL = config("TRACKING_BUFFER_FLUSH_INTERVAL", default=2.0, cast=float)
+# Batch'lerin gideceği yer: doğrudan DB ya da worker'ların paylaştığı spool dizini
+# (dizindeki batch'leri `python manage.py drain_tracking_spool` yazar)
+TRACKING_SPOOL = config("TRACKING_SPOOL", default="main.tracking.DatabaseSpool")
+TRACKING_SPOOL_DIR = config("TRACKING_SPOOL_DIR", default=str(BASE_DIR / "var" / "tracking-spool"))
+# Article.view_count delta'ları bu aralıkla toplu uygulanır (bkz. reconcile_view_counts)
+VIEW_COUNT_FLUSH_INTERVAL = config("VIEW_COUNT_FLUSH_INTERVAL", default=10.0, cast=float)
+# ArticleView / OutboundClick aylık partition'ları (bkz. main/partitions.py)
+TRACKING_PARTITION_MONTHS_AHEAD = config("TRACKING_PARTITION_MONTHS_AHEAD", default=3, cast=int)
+# Bu kadar aydan eski partition'lar arşivlenip silinir (içinde bulunulan ay dahil değil)
+TRACKING_RETENTION_MONTHS = config("TRACKING_RETENTION_MONTHS", default=13, cast=int)
+TRACKING_ARCHIVE_DIR = config("TRACKING_ARCHIVE_DIR", default=str(BASE_DIR / "var" / "tracking-archive"))
+
+# =========================
+# Image derivatives (bkz. main/images.py)
+# =========================
+
+# srcset genişlikleri; orijinalden büyük olanlar üretilmez
+IMAGE_DERIVATIVE_WIDTHS = config(
+    "IMAGE_DERIVATIVE_WIDTHS",
+    default="320,640,960,1280",
+    cast=lambda v: [int(s) for s in v.split(",") if s.strip()],
+)
+# Pillow'un kodlayamadığı formatlar (ör. AVIF desteği olmayan kurulum) atlanır
+IMAGE_DERIVATIVE_FORMATS = config(
+    "IMAGE_DERIVATIVE_FORMATS",
+    default="avif,webp,jpeg",
+    cast=lambda v: [s.strip().lower() for s in v.split(",") if s.strip()],
+)
+# False (varsayılan): yeni görsellerin türevlerini `python manage.py generate_image_derivatives --loop`
+# üretir. True: commit'ten sonra yükleme isteğinin içinde üretilir; büyük görsellerde (AVIF)
+# gunicorn worker'ı saniyelerce meşgul kalır, sadece geliştirmede açın
+IMAGE_DERIVATIVES_ON_UPLOAD = config("IMAGE_DERIVATIVES_ON_UPLOAD", default=False, cast=bool)
@@ -168,4 +168,42 @@ class NotificationAdmin(admin.ModelAdmin):
 @admin.register(Setting)
 class SettingAdmin(admin.ModelAdmin):
     list_display = ('key', 'value')
-    search_fields = ('key', 'value')
\ No newline at end of file
+    search_fields = ('key', 'value')
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'kind', 'created_at')
+    search_fields = ('to_email', 'subject', 'last_error')
+    ordering = ('-created_at',)
+    actions = ['requeue']
+
+    @admin.action(description='Requeue selected dead-lettered messages')
+    def requeue(self, request, queryset):
+        from .outbox import requeue_dead
+        count = requeue_dead(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f'{count} messages requeued')
+
+
+@admin.register(NewsletterCampaign)
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = ('article', 'status', 'sent_count', 'deferred_count', 'total_recipients', 'started_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('article__title', 'subject')
+    ordering = ('-created_at',)
+    readonly_fields = ('last_subscriber_id', 'locked_at')
+
+
+@admin.register(ProductRatingSummary)
+class ProductRatingSummaryAdmin(admin.ModelAdmin):
+    list_display = ('product', 'average', 'approved_count', 'rating_5', 'rating_4', 'rating_3', 'rating_2', 'rating_1', 'updated_at')
+    search_fields = ('product__brand', 'product__model')
+    ordering = ('-average', '-approved_count')
+    readonly_fields = ('approved_count', 'rating_sum', 'average', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5')
+    actions = ['rebuild']
+
+    @admin.action(description='Rebuild selected summaries from the approved reviews')
+    def rebuild(self, request, queryset):
+        from .ratings import rebuild_rating_summaries
+        rebuilt, removed = rebuild_rating_summaries(list(queryset.values_list('product_id', flat=True)))
+        self.message_user(request, f'{rebuilt} summaries rebuilt, {removed} removed')
@@ -3,8 +3,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status, permissions
 
-from .models import Article, Product, User, Comment
+from .models import Article, Product
 from .serializers import ArticleSerializer, ProductSerializer
+from .querysets import article_queryset, product_queryset
+from .rollups import latest_site_stats
 
 
 @api_view(['GET'])
@@ -17,24 +19,21 @@ def admin_dashboard_view(request):
             status=status.HTTP_403_FORBIDDEN,
         )
 
-    total_articles = Article.objects.count()
-    published_articles = Article.objects.filter(status='PUBLISHED').count()
-    total_products = Product.objects.count()
-    total_users = User.objects.count()
-    total_comments = Comment.objects.count()
-    approved_comments = Comment.objects.filter(status='APPROVED').count()
+    # Toplamlar rollup snapshot'ından (bkz. rollups.py / rollup_analytics)
+    stats = latest_site_stats()
 
-    recent_articles = Article.objects.order_by('-created_at')[:5]
-    recent_products = Product.objects.order_by('-created_at')[:5]
+    recent_articles = article_queryset(Article.objects.order_by('-created_at'))[:5]
+    recent_products = product_queryset(Product.objects.order_by('-created_at'))[:5]
 
     data = {
         'overview': {
-            'total_articles': total_articles,
-            'published_articles': published_articles,
-            'total_products': total_products,
-            'total_users': total_users,
-            'total_comments': total_comments,
-            'approved_comments': approved_comments,
+            'total_articles': stats.total_articles if stats else 0,
+            'published_articles': stats.published_articles if stats else 0,
+            'total_products': stats.total_products if stats else 0,
+            'total_users': stats.total_users if stats else 0,
+            'total_comments': stats.total_comments if stats else 0,
+            'approved_comments': stats.approved_comments if stats else 0,
+            'generated_at': stats.snapshot_at.isoformat() if stats else None,
         },
         'recent_articles': ArticleSerializer(recent_articles, many=True).data,
         'recent_products': ProductSerializer(recent_products, many=True).data,
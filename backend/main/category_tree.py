@@ -0,0 +1,148 @@
+# hardware/backend/main/category_tree.py
+"""
+In-process category tree.
+
+The whole Category table is small and read on almost every request (category
+list, nested categories inside product/article payloads, category filters), so
+it is loaded once with one query for the nodes and one grouped query for the
+article/product counts, then served from memory.
+
+Saves of Category/Product/Article bump a version key in the Django cache
+(see signals.py). Workers check that key at most every
+CATEGORY_TREE_CHECK_INTERVAL seconds (serializers call get_category_tree()
+once per field, so an unthrottled check would read the cache hundreds of
+times per category list), and with a shared cache backend all workers
+rebuild after a change. The TTL is
+a safety net for writes that bypass signals (queryset.update, raw SQL) and for
+deployments that still use the per-process locmem cache.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Value
+
+from .models import Article, Category, Product
+
+
+CATEGORY_TREE_VERSION_KEY = "main:category_tree:version"
+CATEGORY_TREE_TTL = 300  # seconds
+CATEGORY_TREE_CHECK_INTERVAL = 1.0  # seconds
+
+_lock = threading.Lock()
+_tree = None
+
+
+class CategoryTree:
+    """Categories keyed by id with children lists and direct/rolled-up counts"""
+
+    def __init__(self, version):
+        self.version = version
+        self.built_at = self.checked_at = time.monotonic()
+        self.stale = False
+
+        self.nodes = {}
+        self.by_slug = {}
+        self.children = {}
+        for category in Category.objects.all():
+            self.nodes[category.id] = category
+            self.by_slug[category.slug] = category
+            self.children[category.id] = []
+        # Meta.ordering (sort_order, name) sırası children listelerinde korunur
+        for category in self.nodes.values():
+            if category.parent_id in self.children:
+                self.children[category.parent_id].append(category)
+
+        self.article_counts = dict.fromkeys(self.nodes, 0)
+        self.product_counts = dict.fromkeys(self.nodes, 0)
+        for category_id, kind, total in self._grouped_counts():
+            counts = self.article_counts if kind == "article" else self.product_counts
+            if category_id in counts:
+                counts[category_id] = total
+
+        self.total_article_counts = {}
+        self.total_product_counts = {}
+        for category_id in self.nodes:
+            ids = self.descendant_ids(category_id)
+            self.total_article_counts[category_id] = sum(self.article_counts[i] for i in ids)
+            self.total_product_counts[category_id] = sum(self.product_counts[i] for i in ids)
+
+    @staticmethod
+    def _grouped_counts():
+        """(category_id, kind, count) rows for articles and products in one query"""
+        def grouped(model, kind):
+            return (
+                model.objects.filter(category__isnull=False)
+                .order_by()
+                .values("category_id")
+                .annotate(kind=Value(kind), total=Count("id"))
+                .values_list("category_id", "kind", "total")
+            )
+
+        return grouped(Article, "article").union(grouped(Product, "product"), all=True)
+
+    def is_fresh(self):
+        if self.stale:
+            return False
+        now = time.monotonic()
+        if now - self.checked_at >= CATEGORY_TREE_CHECK_INTERVAL:
+            self.checked_at = now
+            # Bir kez bayatlayan ağaç (kilit altındaki ikinci kontrol dahil) bayat kalır
+            self.stale = self.version != _current_version()
+        if now - self.built_at >= CATEGORY_TREE_TTL:
+            self.stale = True
+        return not self.stale
+
+    def get(self, category_id):
+        return self.nodes.get(category_id)
+
+    def get_children(self, category_id):
+        return self.children.get(category_id, [])
+
+    def descendant_ids(self, category_id):
+        """The category itself and every category below it"""
+        if category_id not in self.nodes:
+            return []
+        ids = []
+        stack = [category_id]
+        seen = set()
+        while stack:
+            current = stack.pop()
+            # parent döngüsü olan bozuk veride sonsuz döngüye girme
+            if current in seen:
+                continue
+            seen.add(current)
+            ids.append(current)
+            stack.extend(child.id for child in self.children.get(current, []))
+        return ids
+
+    def descendant_ids_for_slug(self, slug):
+        category = self.by_slug.get(slug)
+        return self.descendant_ids(category.id) if category else []
+
+
+def _current_version():
+    return cache.get(CATEGORY_TREE_VERSION_KEY, 0)
+
+
+def get_category_tree(refresh=False):
+    """Return the process-wide CategoryTree, rebuilding it when stale"""
+    global _tree
+    tree = _tree
+    if not refresh and tree is not None and tree.is_fresh():
+        return tree
+    with _lock:
+        if refresh or _tree is None or not _tree.is_fresh():
+            _tree = CategoryTree(_current_version())
+        return _tree
+
+
+def invalidate_category_tree():
+    """Drop this worker's tree and tell the other workers to rebuild theirs"""
+    global _tree
+    _tree = None
+    try:
+        cache.incr(CATEGORY_TREE_VERSION_KEY)
+    except ValueError:
+        cache.set(CATEGORY_TREE_VERSION_KEY, 1, None)
@@ -0,0 +1,126 @@
+# hardware/backend/main/comment_tree.py
+"""
+Threaded comments of an article, loaded in one query.
+
+CommentSerializer.get_replies re-instantiates the serializer for every
+comment. Each node cost an exists() and a fetch of its replies, a
+helpful_votes COUNT, an article lookup and a nested UserSerializer with two
+COUNTs, so a 200-comment discussion took well over 1000 queries.
+
+load_comment_tree() runs a single recursive CTE:
+
+- `roots`: one page of approved top-level comments, newest first, after the
+  keyset cursor (created_at, id). It reads page_size + 1 rows only to
+  tell whether there is a next page.
+- `thread`: those roots plus their approved replies at any depth (replies
+  under a rejected or pending comment stay hidden, as before), up to
+  MAX_DEPTH levels.
+- helpful counts come from the Comment.helpful_count column (see
+  helpful_votes.py).
+
+Authors are loaded with one more query (prefetch), and the tree is put
+together in Python. Replies keep the comment ordering (newest first), like
+get_replies did.
+"""
+
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils.dateparse import parse_datetime
+
+from .models import User
+from .models_extra import Comment
+from .pagination import decode_cursor, encode_cursor
+
+
+MAX_DEPTH = 50
+# serializers.CommentAuthorSerializer'ın okuduğu kolonlar
+AUTHOR_COLUMNS = ("id", "username", "first_name", "last_name", "role", "avatar", "avatar_variants")
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+TREE_SQL = """
+WITH RECURSIVE roots AS (
+    SELECT id, created_at FROM {comment}
+    WHERE article_id = %(article_id)s AND status = 'APPROVED' AND parent_id IS NULL
+      {cursor_condition}
+    ORDER BY created_at DESC, id DESC
+    LIMIT %(limit)s
+), page_roots AS (
+    SELECT id FROM roots ORDER BY created_at DESC, id DESC LIMIT %(page_size)s
+), thread (id, root_id, depth) AS (
+    SELECT id, id, 0 FROM page_roots
+    UNION ALL
+    SELECT c.id, t.root_id, t.depth + 1
+    FROM {comment} c JOIN thread t ON c.parent_id = t.id
+    WHERE c.status = 'APPROVED' AND t.depth < %(max_depth)s
+)
+SELECT c.*, t.root_id, t.depth,
+       (SELECT COUNT(*) FROM roots) > %(page_size)s AS has_more
+FROM thread t JOIN {comment} c ON c.id = t.id
+ORDER BY c.created_at DESC, c.id DESC
+"""
+
+
+class CommentTreePage:
+    def __init__(self, roots, next_cursor):
+        self.roots = roots
+        self.next_cursor = next_cursor  # cursor values of the last root, None on the last page
+
+
+def load_comment_tree(article_id, cursor=None, page_size=DEFAULT_PAGE_SIZE, author_queryset=None):
+    """
+    One page of top-level approved comments of an article, each with
+    `tree_replies` (nested the same way), `helpful_count` and `depth` set.
+    `cursor` is the (created_at, id) of the last root of the previous page.
+    """
+    params = {
+        "article_id": article_id,
+        "limit": page_size + 1,
+        "page_size": page_size,
+        "max_depth": MAX_DEPTH,
+    }
+    cursor_condition = ""
+    if cursor is not None:
+        cursor_condition = "AND (created_at, id) < (%(cursor_created_at)s, %(cursor_id)s)"
+        params["cursor_created_at"], params["cursor_id"] = cursor
+    sql = TREE_SQL.format(
+        comment=Comment._meta.db_table,
+        cursor_condition=cursor_condition,
+    )
+    comments = list(Comment.objects.raw(sql, params))
+
+    # Yazarlar tek sorguda
+    if author_queryset is None:
+        author_queryset = User.objects.only(*AUTHOR_COLUMNS)
+    prefetch_related_objects(comments, Prefetch("user", queryset=author_queryset))
+
+    by_id = {comment.id: comment for comment in comments}
+    roots = []
+    for comment in comments:
+        comment.tree_replies = []
+    for comment in comments:
+        # Sıra korunur: her liste created_at DESC
+        if comment.depth == 0:
+            roots.append(comment)
+        else:
+            by_id[comment.parent_id].tree_replies.append(comment)
+
+    has_more = bool(comments) and comments[0].has_more
+    next_cursor = (roots[-1].created_at, roots[-1].id) if has_more and roots else None
+    return CommentTreePage(roots, next_cursor)
+
+
+def parse_cursor(token):
+    """(created_at, id) from a cursor token; raises ValueError if it is malformed"""
+    values, _ = decode_cursor(token)
+    if len(values) != 2:
+        raise ValueError("expected two cursor values")
+    if not isinstance(values[0], str) or not isinstance(values[1], int) or isinstance(values[1], bool):
+        raise ValueError("invalid cursor value types")
+    created_at = parse_datetime(values[0])
+    if created_at is None:
+        raise ValueError("invalid cursor timestamp")
+    return created_at, values[1]
+
+
+def cursor_token(values):
+    return encode_cursor(list(values))
@@ -0,0 +1,175 @@
+# hardware/backend/main/conditional.py
+"""
+HTTP conditional GET (ETag / Last-Modified / 304) for the read endpoints.
+
+Validators are computed without touching the rows or the serializer. They
+reuse the response cache's content-version counters
+(response_cache.model_versions). Every save or delete of a model bumps its
+generation and records the time of the change. A view lists the models its
+payload is built from: the article plus its author, tags, extras and compare
+products, and so on.
+
+- ETag is a weak hash of those generations plus the cache epoch, the path,
+  the normalized query string and whether the reader is an editor (editors
+  see drafts). Any change to a rendered model changes it, in detail views
+  and list views alike.
+- Last-Modified is the latest change time of those models. Only when the
+  cache has no change times (freshly flushed) is it computed from
+  MAX(updated_at) of the rows: the looked-up row for detail views, the
+  filtered queryset for lists.
+
+A request whose If-None-Match still matches gets a bodyless 304 before the
+view runs, and so does a request whose If-Modified-Since matches when it
+sends no If-None-Match. The response cache and the serializer are skipped
+entirely. Writes that bypass signals (QuerySet.update of view_count) do not
+change the validators.
+
+The generation counters never expire, so validators are only sent when the
+cache is shared by every worker. With a process-local LocMemCache an edit
+handled by one worker would leave the others answering 304 for content
+that changed, indefinitely; no ETag/Last-Modified is sent then.
+"""
+
+import functools
+import hashlib
+
+from django.db.models import Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.filters import OrderingFilter
+from rest_framework.mixins import ListModelMixin
+from rest_framework.response import Response
+
+from .response_cache import (
+    check_cached_models,
+    model_versions,
+    normalized_query,
+    shared_cache_is_process_local,
+    should_bypass,
+)
+
+
+class Validators:
+    def __init__(self, etag, last_modified):
+        self.etag = etag
+        self.last_modified = last_modified  # unix timestamp or None
+
+    def apply(self, response):
+        response["ETag"] = self.etag
+        if self.last_modified is not None:
+            response["Last-Modified"] = http_date(self.last_modified)
+        return response
+
+
+def compute_validators(request, models, queryset):
+    """
+    Validators for a response built from the nested `models`; `queryset`
+    (a callable) is only evaluated when the cache has no change times
+    """
+    epoch, generations, touched = model_versions(models)
+    parts = [
+        request.path,
+        normalized_query(request.query_params),
+        "editor" if should_bypass(request) else "public",
+        str(epoch),
+        ",".join(map(str, generations)),
+    ]
+    etag = 'W/"%s"' % hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    if touched is None:
+        updated = queryset().order_by().aggregate(updated=Max("updated_at"))["updated"]
+        touched = updated.timestamp() if updated else None
+    return Validators(etag, int(touched) if touched is not None else None)
+
+
+def _weak(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(request, validators):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        # RFC 9110: If-None-Match varsa If-Modified-Since yok sayılır
+        if if_none_match.strip() == "*":
+            return True
+        target = _weak(validators.etag)
+        return any(_weak(etag) == target for etag in parse_etags(if_none_match))
+
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    if if_modified_since is None or validators.last_modified is None:
+        return False
+    return validators.last_modified <= if_modified_since
+
+
+def conditional_response(request, models, queryset, view):
+    if request.method not in ("GET", "HEAD") or shared_cache_is_process_local():
+        return view()
+    validators = compute_validators(request, models, queryset)
+    if is_not_modified(request, validators):
+        return validators.apply(Response(status=status.HTTP_304_NOT_MODIFIED))
+    response = view()
+    if response.status_code == status.HTTP_200_OK:
+        validators.apply(response)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified for a generic view. `validator_models` lists the
+    models the payload is built from (defaults to `cache_models`); list views
+    may define get_base_queryset() to aggregate without the serializer
+    annotations.
+    """
+
+    validator_models = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        check_cached_models(cls.validator_models or ())
+
+    def get_validator_models(self):
+        if self.validator_models is not None:
+            return self.validator_models
+        return getattr(self, "cache_models", ())
+
+    def get_validator_queryset(self):
+        if isinstance(self, ListModelMixin):
+            base = getattr(self, "get_base_queryset", None)
+            queryset = base() if base else self.get_queryset()
+            for backend in self.filter_backends:
+                # Sıralama (annotasyonlara da bakabilir) aggregate için gereksiz
+                if not issubclass(backend, OrderingFilter):
+                    queryset = backend().filter_queryset(self.request, queryset, self)
+            return queryset
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        else:
+            # CategoryDetailView gibi hem slug hem pk ile çağrılan görünümler
+            lookup = {"pk": self.kwargs.get("pk")}
+        return self.get_queryset().model._default_manager.filter(**lookup)
+
+    def get(self, request, *args, **kwargs):
+        view_get = super().get
+        return conditional_response(
+            request,
+            self.get_validator_models(),
+            self.get_validator_queryset,
+            lambda: view_get(request, *args, **kwargs),
+        )
+
+
+def conditional_get(queryset, *models):
+    """ConditionalGetMixin for @api_view functions; `queryset` is a callable(request)"""
+    check_cached_models(models)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return conditional_response(
+                request, models, lambda: queryset(request), lambda: view(request, *args, **kwargs)
+            )
+
+        return wrapped
+
+    return decorator
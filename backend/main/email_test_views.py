@@ -9,7 +9,8 @@ from rest_framework.permissions import IsAuthenticated, BasePermission
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Setting, User
+from .models import User
+from .settings_snapshot import get_settings_snapshot
 
 
 # ----------------- Types ----------------- #
@@ -81,8 +82,8 @@ def load_email_config_from_db() -> EmailConfig:
     boş olanları / bulunmayanları Django settings default'ları ile doldurur.
     """
 
-    qs = Setting.objects.filter(key__in=EMAIL_SETTING_KEYS.values())
-    raw_map: Dict[str, str] = {s.key: (s.value or "") for s in qs}
+    snapshot = get_settings_snapshot()
+    raw_map: Dict[str, str] = {key: snapshot.get(key, "") for key in EMAIL_SETTING_KEYS.values()}
 
     host = raw_map.get(EMAIL_SETTING_KEYS["host"]) or getattr(dj_settings, "EMAIL_HOST", "")
     port_raw = raw_map.get(EMAIL_SETTING_KEYS["port"]) or getattr(dj_settings, "EMAIL_PORT", 587)
@@ -1,11 +1,15 @@
 import secrets
 import string
-from django.core.mail import send_mail
-from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils import timezone
 from datetime import timedelta
 
+from .outbox import enqueue_email
+
+
+# Bülten HTML'inde alıcının adresiyle değiştirilen yer tutucu
+NEWSLETTER_EMAIL_PLACEHOLDER = "YOUR_EMAIL"
+
 
 def generate_verification_token():
     """Generate a secure random token for email verification"""
@@ -115,17 +119,11 @@ def send_verification_email(user):
     """
     
     try:
-        send_mail(
-            subject=subject,
-            message=text_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        # SMTP'yi beklemeden kuyruğa yaz; send_email_outbox worker'ı gönderir
+        enqueue_email(user.email, subject, text_message, html_message, kind='VERIFICATION')
         return True
     except Exception as e:
-        print(f"Email gönderim hatası: {e}")
+        print(f"Email kuyruğa alınamadı: {e}")
         return False
 
 
@@ -153,42 +151,12 @@ def verify_user_email(user):
     user.save()
 
 
-def send_newsletter_email(subscribers, article):
-    """Send newsletter email to subscribers about new article"""
-    from .models_extra import NewsletterSubscription
-    from .models import User
-    
-    # Get active subscribers who have email notifications enabled
-    active_subscribers = NewsletterSubscription.objects.filter(is_active=True)
-    
-    if not active_subscribers.exists():
-        print("No active newsletter subscribers found")
-        return False
-    
-    # Filter subscribers who have email notifications enabled
-    subscribers_with_notifications = []
-    for subscriber in active_subscribers:
-        try:
-            # Check if subscriber has a user account and email notifications are enabled
-            user = User.objects.get(email=subscriber.email)
-            # Check both the direct field and the notification_settings JSON
-            email_notifications_enabled = (
-                user.email_notifications and 
-                user.notification_settings.get('email_notifications', True)
-            )
-            if email_notifications_enabled:
-                subscribers_with_notifications.append(subscriber)
-                print(f"User {subscriber.email} has email notifications enabled")
-            else:
-                print(f"User {subscriber.email} has email notifications disabled - skipping")
-        except User.DoesNotExist:
-            # If no user account, don't send email (newsletter-only subscribers should not receive emails)
-            print(f"No user account found for {subscriber.email} - skipping newsletter email")
-    
-    if not subscribers_with_notifications:
-        print("No subscribers with email notifications enabled found")
-        return False
-    
+def render_newsletter_email(article):
+    """
+    Render the newsletter for `article` once: (subject, text, html).
+    The HTML still contains NEWSLETTER_EMAIL_PLACEHOLDER, which the fan-out
+    replaces with each recipient's address (see newsletter.py).
+    """
     # Create article URL based on type
     url_mapping = {
         'REVIEW': f"http://localhost:3001/reviews/{article.slug}",
@@ -300,7 +268,7 @@ def send_newsletter_email(subscribers, article):
         </div>
         <div class="footer">
             <div class="unsubscribe">
-                <p>Bu bülteni almak istemiyorsanız, <a href="http://localhost:3001/newsletter/unsubscribe?email=YOUR_EMAIL">buradan abonelikten çıkabilirsiniz</a>.</p>
+                <p>Bu bülteni almak istemiyorsanız, <a href="http://localhost:3001/newsletter/unsubscribe?email={NEWSLETTER_EMAIL_PLACEHOLDER}">buradan abonelikten çıkabilirsiniz</a>.</p>
             </div>
             <p>&copy; 2024 Donanım Puanı. Tüm hakları saklıdır.</p>
         </div>
@@ -328,30 +296,7 @@ def send_newsletter_email(subscribers, article):
     Donanım Puanı Ekibi
     """
     
-    success_count = 0
-    error_count = 0
-    
-    for subscriber in subscribers_with_notifications:
-        try:
-            # Replace YOUR_EMAIL placeholder with actual email
-            personalized_html = html_message.replace('YOUR_EMAIL', subscriber.email)
-            
-            send_mail(
-                subject=subject,
-                message=text_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[subscriber.email],
-                html_message=personalized_html,
-                fail_silently=False,
-            )
-            success_count += 1
-            print(f"Newsletter sent to {subscriber.email}")
-        except Exception as e:
-            error_count += 1
-            print(f"Failed to send newsletter to {subscriber.email}: {e}")
-    
-    print(f"Newsletter sending completed: {success_count} successful, {error_count} failed")
-    return success_count > 0
+    return subject, text_message, html_message
 
 
 def generate_password_reset_code():
@@ -471,15 +416,8 @@ def send_password_reset_email(user, code):
     """
     
     try:
-        send_mail(
-            subject=subject,
-            message=text_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        enqueue_email(user.email, subject, text_message, html_message, kind='PASSWORD_RESET')
         return True
     except Exception as e:
-        print(f"Password reset email gönderim hatası: {e}")
+        print(f"Password reset email kuyruğa alınamadı: {e}")
         return False
\ No newline at end of file
@@ -0,0 +1,136 @@
+# hardware/backend/main/fieldsets.py
+"""
+Sparse fieldsets for the read endpoints: ?fields= and ?expand=.
+
+    /api/products/?fields=id,slug,brand,model,cover_image,category
+    /api/articles/?fields=id,slug,title,author.name&expand=category
+
+- Without ?fields= every serializer renders exactly as before.
+- ?fields= lists the keys to render (comma separated). A dotted name
+  (`author.name`) picks keys of a nested object.
+- In a ?fields= response a nested object (author, category, product) is
+  rendered as its id unless it is listed in ?expand= or picked with a
+  dotted name. Expanded objects render in full.
+
+SparseFieldsetMixin applies the selection to the serializers. The view
+passes the same selection (field_selection(request)) to the queryset
+builders in querysets.py. Columns, joins, prefetches and count
+annotations that no selected field needs are skipped, so a card-only
+product list is a single query. The selection only applies to GET/HEAD;
+writes always see the full serializer.
+"""
+
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def _parse_paths(value):
+    """'a,b.c,b.d' -> {'a': None, 'b': {'c': None, 'd': None}}"""
+    tree = {}
+    for path in value.split(","):
+        parts = [part.strip() for part in path.split(".") if part.strip()]
+        node = tree
+        for index, part in enumerate(parts):
+            if index == len(parts) - 1:
+                node.setdefault(part, None)
+            else:
+                if node.get(part) is None:
+                    node[part] = {}
+                node = node[part]
+    return tree
+
+
+class FieldSelection:
+    """The fields asked for at one level of the representation"""
+
+    def __init__(self, fields, expand=None):
+        self.fields = fields
+        self.expand = expand or {}
+
+    @classmethod
+    def parse(cls, fields, expand=""):
+        return cls(_parse_paths(fields), _parse_paths(expand))
+
+    def includes(self, name):
+        return name in self.fields or name in self.expand
+
+    def expanded(self, name):
+        """Whether a nested object is rendered as an object rather than its id"""
+        return name in self.expand or self.fields.get(name) is not None
+
+    def child(self, name):
+        """Selection for the nested object `name`; None means all of its fields"""
+        fields = self.fields.get(name)
+        if fields is None:
+            return None
+        return FieldSelection(fields, self.expand.get(name))
+
+    def __repr__(self):
+        return f"FieldSelection({self.fields!r}, expand={self.expand!r})"
+
+
+def field_selection(request):
+    """Selection requested with ?fields= (None: render everything)"""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    params = getattr(request, "query_params", request.GET)
+    fields = params.get(FIELDS_PARAM, "").strip()
+    if not fields:
+        return None
+    return FieldSelection.parse(fields, params.get(EXPAND_PARAM, ""))
+
+
+# querysets.py'deki builder'lar için kısayollar; selection None ise her şey istenmiş demektir
+def wants(selection, *names):
+    return selection is None or any(selection.includes(name) for name in names)
+
+
+def expands(selection, name):
+    return selection is None or (selection.includes(name) and selection.expanded(name))
+
+
+def child_selection(selection, name):
+    return None if selection is None else selection.child(name)
+
+
+class SparseFieldsetMixin:
+    """Drops the fields the request did not ask for and collapses unexpanded nested objects to ids"""
+
+    def _selection_path(self):
+        path = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return node, path[::-1]
+
+    def get_field_selection(self):
+        root, path = self._selection_path()
+        selection = field_selection(root.context.get("request"))
+        for name in path:
+            if selection is None:
+                break
+            selection = selection.child(name)
+        return selection
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.get_field_selection()
+        if selection is None:
+            return fields
+        for name, field in list(fields.items()):
+            if field.write_only:
+                continue
+            if not selection.includes(name):
+                del fields[name]
+            elif isinstance(field, serializers.BaseSerializer) and not selection.expanded(name):
+                if isinstance(field, serializers.ListSerializer):
+                    continue
+                # İlişki nesne yerine id olarak: FK kolonundan okunur, join/prefetch gerekmez
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, source=field.source)
+        return fields
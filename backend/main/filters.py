@@ -1,5 +1,30 @@
 import django_filters
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FloatField, Value
+from rest_framework.filters import SearchFilter
 from .models import *
+from .category_tree import get_category_tree
+from .search import build_search_query, full_text_filter
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    ?search= through the indexed tsvector column for models that have one
+    (Article, Product); falls back to DRF's icontains search otherwise.
+    Annotates `search_rank`, so views can allow ?ordering=-search_rank.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        try:
+            queryset.model._meta.get_field('search_vector')
+        except FieldDoesNotExist:
+            return super().filter_queryset(request, queryset, view)
+
+        search_query = build_search_query(request.query_params.get(self.search_param, ''))
+        if search_query is None:
+            # ?ordering=-search_rank arama olmadan da geçerli kalsın
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+        return full_text_filter(queryset, search_query)
 
 
 class CategoryFilter(django_filters.FilterSet):
@@ -25,7 +50,7 @@ class ProductFilter(django_filters.FilterSet):
     brand = django_filters.CharFilter(field_name='brand', lookup_expr='icontains')
     model = django_filters.CharFilter(field_name='model', lookup_expr='icontains')
     category = django_filters.NumberFilter(field_name='category__id')
-    category_slug = django_filters.CharFilter(field_name='category__slug')
+    category_slug = django_filters.CharFilter(method='filter_category_slug')
     release_year = django_filters.NumberFilter(field_name='release_year')
     release_year_min = django_filters.NumberFilter(field_name='release_year', lookup_expr='gte')
     release_year_max = django_filters.NumberFilter(field_name='release_year', lookup_expr='lte')
@@ -36,6 +61,11 @@ class ProductFilter(django_filters.FilterSet):
         model = Product
         fields = ['brand', 'model', 'category', 'category_slug', 'release_year', 'release_year_min', 'release_year_max', 'price_min', 'price_max']
 
+    def filter_category_slug(self, queryset, name, value):
+        # Üst kategori seçildiğinde alt kategorilerdeki ürünler de gelsin
+        category_ids = get_category_tree().descendant_ids_for_slug(value)
+        return queryset.filter(category_id__in=category_ids)
+
 
 class ArticleFilter(django_filters.FilterSet):
     type = django_filters.ChoiceFilter(choices=Article.TYPE_CHOICES)
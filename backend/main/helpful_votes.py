@@ -0,0 +1,161 @@
+# hardware/backend/main/helpful_votes.py
+"""
+Helpful-vote counters of comments and user reviews.
+
+helpful_vote_view used to fetch the user's vote, delete or create it and
+then COUNT the comment's votes: three or four queries per click, and a
+double click raced into the unique constraint and came back as a 500.
+Every CommentSerializer render repeated the COUNT, and
+UserReview.is_helpful was never written at all.
+
+The count is now a column next to the row (Comment.helpful_count,
+UserReview.is_helpful) and VoteCounter.toggle() flips a vote in one
+transaction:
+
+- `DELETE ... RETURNING` removes the user's vote if there is one,
+- otherwise `INSERT ... ON CONFLICT DO NOTHING RETURNING` adds it, so a
+  concurrent click that inserted first makes this one a no-op instead of
+  an IntegrityError,
+- the counter moves with a relative UPDATE (`counter + 1` / `counter - 1`,
+  like an F() expression) only when a row was really inserted or deleted,
+  and the new value comes back from the same UPDATE.
+
+Votes written through the ORM (admin, shell, cascades from a deleted user)
+go through the post_save/post_delete receivers in signals.py, which call
+adjust_counter(). `python manage.py reconcile_helpful_counts` recounts
+everything and fixes whatever drifted.
+
+Full saves of a Comment/UserReview leave the counter column out (see
+without_counter), so an instance loaded before a vote cannot overwrite
+the new count with its stale one.
+"""
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models_extra import Comment, HelpfulVote, ReviewHelpfulVote, UserReview
+from .querysets import count_subquery
+from .response_cache import invalidate_model
+
+
+class VoteConflict(Exception):
+    """The vote collided with another unique constraint (same IP on a comment)"""
+
+
+class VoteCounter:
+    def __init__(self, vote_model, target_field, target_model, counter):
+        self.vote_model = vote_model
+        self.target_field = target_field  # vote -> target FK alanı
+        self.target_model = target_model
+        self.counter = counter
+
+    @property
+    def target_column(self):
+        return self.vote_model._meta.get_field(self.target_field).column
+
+    def _format(self, sql):
+        return sql.format(
+            vote=self.vote_model._meta.db_table,
+            target=self.target_model._meta.db_table,
+            target_column=self.target_column,
+            counter=self.counter,
+        )
+
+    def _move(self, cursor, target_id, delta):
+        # Sayaç hiç eksiye düşmez (PositiveIntegerField CHECK kısıtı)
+        cursor.execute(
+            self._format(
+                "UPDATE {target} SET {counter} = GREATEST({counter} + %s, 0) WHERE id = %s RETURNING {counter}"
+            ),
+            [delta, target_id],
+        )
+        row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def toggle(self, target_id, user, ip_address=None):
+        """
+        Add the user's vote or remove it if it exists. Returns (action,
+        count) with action 'added' or 'removed'. Raises the target model's
+        DoesNotExist for an unknown target and VoteConflict when another
+        unique constraint rejected the vote.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                self._format("DELETE FROM {vote} WHERE {target_column} = %s AND user_id = %s RETURNING id"),
+                [target_id, user.pk],
+            )
+            if cursor.fetchone():
+                action, count = "removed", self._move(cursor, target_id, -1)
+            else:
+                cursor.execute(
+                    self._format(
+                        "INSERT INTO {vote} ({target_column}, user_id, ip_address, created_at) "
+                        "SELECT %s, %s, %s, %s WHERE EXISTS (SELECT 1 FROM {target} WHERE id = %s) "
+                        "ON CONFLICT DO NOTHING RETURNING id"
+                    ),
+                    [target_id, user.pk, ip_address, timezone.now(), target_id],
+                )
+                if cursor.fetchone():
+                    action, count = "added", self._move(cursor, target_id, 1)
+                else:
+                    action, count = self._rejected(cursor, target_id, user)
+        invalidate_model(self.vote_model)
+        invalidate_model(self.target_model)
+        return action, count
+
+    def _rejected(self, cursor, target_id, user):
+        # INSERT hiçbir satır eklemedi: hedef yok, oy zaten var ya da IP çakıştı
+        cursor.execute(
+            self._format(
+                "SELECT t.{counter}, EXISTS (SELECT 1 FROM {vote} v WHERE v.{target_column} = t.id AND v.user_id = %s) "
+                "FROM {target} t WHERE t.id = %s"
+            ),
+            [user.pk, target_id],
+        )
+        row = cursor.fetchone()
+        if row is None:
+            raise self.target_model.DoesNotExist()
+        count, voted = row
+        if not voted:
+            raise VoteConflict()
+        # Aynı anda gelen ikinci tıklama: oy diğer istekle eklendi
+        return "added", count
+
+    def actual_count(self):
+        """Expression counting the votes of the outer target row"""
+        return count_subquery(self.vote_model, self.target_field)
+
+    def adjust(self, target_id, delta):
+        """Move the counter of one target by `delta` (votes written through the ORM)"""
+        updated = self.target_model._default_manager.filter(pk=target_id).update(
+            **{self.counter: Greatest(F(self.counter) + delta, 0)}
+        )
+        if updated:
+            invalidate_model(self.target_model)
+
+
+COMMENT_VOTES = VoteCounter(HelpfulVote, "comment", Comment, "helpful_count")
+REVIEW_VOTES = VoteCounter(ReviewHelpfulVote, "review", UserReview, "is_helpful")
+
+COUNTERS = {counter.vote_model: counter for counter in (COMMENT_VOTES, REVIEW_VOTES)}
+
+
+def adjust_counter(vote, delta):
+    counter = COUNTERS[type(vote)]
+    counter.adjust(getattr(vote, f"{counter.target_field}_id"), delta)
+
+
+def without_counter(instance, counter, kwargs):
+    """
+    save() kwargs that leave `counter` out of a full UPDATE of an existing
+    row; the counter only changes through VoteCounter
+    """
+    if instance._state.adding or kwargs.get("update_fields") is not None or kwargs.get("force_insert"):
+        return kwargs
+    fields = [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name != counter
+    ]
+    return {**kwargs, "update_fields": fields}
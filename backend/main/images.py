@@ -0,0 +1,235 @@
+# hardware/backend/main/images.py
+"""
+Responsive derivatives of the uploaded images.
+
+Product.cover_image, Article.hero_image/og_image and User.avatar are served
+as uploaded, so list cards, the compare page and comment avatars used to
+download multi-megabyte originals. Every such field now has a
+`<field>_variants` JSON column next to it:
+
+    {
+        "source": "products/ab/ab12....png",   # image the variants were made from
+        "width": 2400, "height": 1600,          # original size
+        "placeholder": "data:image/jpeg;base64,...",  # ~16px wide, blurred by the client
+        "variants": [{"format": "webp", "width": 320, "height": 213, "path": "..."}, ...],
+    }
+
+- Variants are resized to IMAGE_DERIVATIVE_WIDTHS (never upscaled) in every
+  format of IMAGE_DERIVATIVE_FORMATS that Pillow can encode (AVIF needs a
+  Pillow built with libavif). They are stored under
+  `derivatives/<source path>/<width>.<ext>`; files that already exist are
+  reused, so regenerating is cheap and identical uploads share variants.
+- `python manage.py generate_image_derivatives --loop` builds the variants
+  of every row whose variants are missing or stale (new uploads included),
+  resizing in a process pool outside the web workers.
+- With IMAGE_DERIVATIVES_ON_UPLOAD (off by default, for development),
+  saving a model whose image changed builds the variants right after the
+  commit, inside the request.
+- Variants are written with QuerySet.update, only if the image is still
+  the same, and the response cache generation of the model is bumped.
+
+Serializers expose the column through ImageVariantsField, which returns
+None until the variants of the current image exist.
+"""
+
+import base64
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from rest_framework import serializers
+
+from .models import Article, Product, User
+from .response_cache import invalidate_model
+
+
+IMAGE_FIELDS = {
+    Product: ("cover_image",),
+    Article: ("hero_image", "og_image"),
+    User: ("avatar",),
+}
+
+PLACEHOLDER_WIDTH = 16
+
+# format -> (Pillow adı, uzantı, MIME, save() argümanları)
+FORMATS = {
+    "avif": ("AVIF", "avif", "image/avif", {"quality": 50}),
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def variants_field(field_name):
+    return f"{field_name}_variants"
+
+
+def available_formats():
+    return [
+        name for name in settings.IMAGE_DERIVATIVE_FORMATS
+        if name in FORMATS and (name == "jpeg" or features.check(name))
+    ]
+
+
+def derivative_path(source, width, format_name):
+    return f"derivatives/{os.path.splitext(source)[0]}/{width}.{FORMATS[format_name][1]}"
+
+
+def _encode(image, format_name):
+    pillow_format, _, _, options = FORMATS[format_name]
+    if format_name == "jpeg" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def _placeholder(image):
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    tiny = image.convert("RGB").resize((PLACEHOLDER_WIDTH, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    tiny.save(buffer, "JPEG", quality=40)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def build_variants(source, storage=None):
+    """
+    Resize `source` (a storage path) and return its variants JSON. Raises
+    OSError / UnidentifiedImageError when the file is missing or not an image.
+    """
+    storage = storage or default_storage
+    with storage.open(source, "rb") as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    widths = sorted({width for width in settings.IMAGE_DERIVATIVE_WIDTHS if width < image.width})
+    # En büyük kopya: orijinal genişlik (en fazla listedeki en büyük genişlik)
+    widths.append(min(image.width, max(settings.IMAGE_DERIVATIVE_WIDTHS, default=image.width)))
+
+    variants = []
+    for width in sorted(set(widths)):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for format_name in available_formats():
+            path = derivative_path(source, width, format_name)
+            if not storage.exists(path):
+                path = storage.save(path, ContentFile(_encode(resized, format_name)))
+            variants.append({"format": format_name, "width": width, "height": height, "path": path})
+
+    return {
+        "source": source,
+        "width": image.width,
+        "height": image.height,
+        "placeholder": _placeholder(image),
+        "variants": variants,
+    }
+
+
+def safe_build_variants(source):
+    """build_variants, returning only the source (no variants) when the image cannot be read"""
+    try:
+        return build_variants(source)
+    except (OSError, UnidentifiedImageError, ValueError) as e:
+        # Kaynak tekrar değişene kadar yeniden denenmez
+        print(f"Image derivatives failed for {source}: {e}")
+        return {"source": source}
+
+
+def store_variants(model, pk, field_name, source, data):
+    """Write `data` unless the row's image changed meanwhile; returns whether it was written"""
+    updated = model._default_manager.filter(pk=pk, **{field_name: source}).update(
+        **{variants_field(field_name): data}
+    )
+    if updated:
+        invalidate_model(model)
+    return bool(updated)
+
+
+def generate_variants(model, pk, field_name):
+    source = model._default_manager.filter(pk=pk).values_list(field_name, flat=True).first()
+    if source:
+        store_variants(model, pk, field_name, source, safe_build_variants(source))
+
+
+def queue_variants(instance, update_fields=None):
+    """After the commit, build variants of every image of `instance` that changed"""
+    model = type(instance)
+    deferred = instance.get_deferred_fields()
+    for field_name in IMAGE_FIELDS.get(model, ()):
+        column = variants_field(field_name)
+        if field_name in deferred or column in deferred:
+            continue
+        if update_fields is not None and field_name not in update_fields:
+            continue
+        source = getattr(instance, field_name).name or ""
+        current = getattr(instance, column) or {}
+        if current.get("source", "") == source:
+            continue
+        if not source:
+            # Görsel kaldırıldı
+            model._default_manager.filter(pk=instance.pk).update(**{column: {}})
+            setattr(instance, column, {})
+            invalidate_model(model)
+        elif settings.IMAGE_DERIVATIVES_ON_UPLOAD:
+            transaction.on_commit(
+                lambda pk=instance.pk, field_name=field_name: generate_variants(model, pk, field_name)
+            )
+
+
+def stale_rows(model, field_name):
+    """Rows with an image whose variants are missing or were made from another file"""
+    column = variants_field(field_name)
+    return (
+        model._default_manager.exclude(**{f"{field_name}__isnull": True})
+        .exclude(**{field_name: ""})
+        .alias(variants_source=KT(f"{column}__source"))
+        .filter(Q(variants_source__isnull=True) | ~Q(variants_source=F(field_name)))
+    )
+
+
+def variants_representation(obj, field_name, request=None):
+    """srcset-ready form of the variants of `obj.<field_name>` (None if there are none yet)"""
+    data = getattr(obj, variants_field(field_name)) or {}
+    source = getattr(obj, field_name).name
+    if not source or data.get("source") != source or not data.get("variants"):
+        return None
+
+    def url(path):
+        url = default_storage.url(path)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    variants = []
+    srcset = {}
+    for variant in data["variants"]:
+        mime = FORMATS[variant["format"]][2]
+        variant_url = url(variant["path"])
+        variants.append({"type": mime, "width": variant["width"], "height": variant["height"], "url": variant_url})
+        srcset.setdefault(mime, []).append(f"{variant_url} {variant['width']}w")
+    return {
+        "width": data["width"],
+        "height": data["height"],
+        "placeholder": data["placeholder"],
+        "srcset": {mime: ", ".join(entries) for mime, entries in srcset.items()},
+        "variants": variants,
+    }
+
+
+class ImageVariantsField(serializers.Field):
+    """Read-only `<field>_variants` of an image field, see variants_representation"""
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        return variants_representation(obj, self.image_field, self.context.get("request"))
@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from main.models import Product, Tag
+from main.serializers import ProductSerializer
+
+
+SLUG = 'product-writes-benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        'Saves a product with a large spec sheet through ProductSerializer (create, '
+        'unchanged update, one changed spec, half the sheet replaced) and reports the '
+        'queries and time each save cost.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--specs', type=int, default=60)
+        parser.add_argument('--tags', type=int, default=10)
+        parser.add_argument('--links', type=int, default=5)
+
+    def handle(self, *args, **options):
+        tags = [
+            Tag.objects.get_or_create(slug=f'{SLUG}-{i}', defaults={'name': f'Benchmark {i}'})[0]
+            for i in range(options['tags'])
+        ]
+        specs = [
+            {'name': f'Spec {i}', 'value': str(i), 'unit': 'mm', 'type': 'NUMBER', 'sort_order': i}
+            for i in range(options['specs'])
+        ]
+        data = {
+            'brand': 'Benchmark',
+            'model': 'Product writes',
+            'slug': SLUG,
+            'specs': specs,
+            'tags': [tag.id for tag in tags],
+            'affiliate_links_data': [
+                {'merchant': f'Shop {i}', 'url_template': f'https://shop{i}.example.com/p', 'active': True}
+                for i in range(options['links'])
+            ],
+        }
+
+        Product.objects.filter(slug=SLUG).delete()
+        product = None
+        try:
+            product = self.save('create', None, data)
+
+            self.save('update (unchanged)', product, data)
+
+            data['specs'] = [dict(spec) for spec in specs]
+            data['specs'][0]['value'] = 'changed'
+            self.save('update (1 spec)', product, data)
+
+            half = len(specs) // 2
+            data['specs'] = specs[:half] + [
+                {'name': f'New spec {i}', 'value': str(i), 'sort_order': half + i}
+                for i in range(len(specs) - half)
+            ]
+            self.save('update (half)', product, data)
+        finally:
+            if product is not None:
+                product.delete()
+            Tag.objects.filter(slug__startswith=SLUG).delete()
+
+    def save(self, label, instance, data):
+        serializer = ProductSerializer(instance, data=data)
+        serializer.is_valid(raise_exception=True)
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            product = serializer.save()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label:>20}: {len(ctx.captured_queries)} queries in {elapsed * 1000:.1f} ms'
+        )
+        return product
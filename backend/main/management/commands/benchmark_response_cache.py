@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from main import response_cache
+from main.models import Article, User
+
+
+SLUG = 'response-cache-benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        'Cache stampede on one article: N concurrent requests right after an invalidation, '
+        'with and without single-flight. Reports the database queries the burst cost.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument(
+            '--query-latency', type=float, default=0.005,
+            help='Extra seconds added to every query, so the burst overlaps like on a busy database',
+        )
+
+    def handle(self, *args, **options):
+        author, _ = User.objects.get_or_create(
+            username='response-cache-benchmark',
+            defaults={'email': 'response-cache-benchmark@example.com'},
+        )
+        article, _ = Article.objects.get_or_create(
+            slug=SLUG, defaults={'title': 'Response cache benchmark', 'author': author, 'status': 'PUBLISHED'},
+        )
+        try:
+            with override_settings(ALLOWED_HOSTS=['*']):
+                for single_flight in (False, True):
+                    with override_settings(RESPONSE_CACHE_SINGLE_FLIGHT=single_flight):
+                        queries, states, elapsed = self.stampede(article, options)
+                    label = 'single-flight' if single_flight else 'no coalescing'
+                    self.stdout.write(
+                        f'{label:>14}: {queries} queries for {options["threads"]} requests '
+                        f'in {elapsed * 1000:.0f} ms {dict(states)}'
+                    )
+        finally:
+            article.delete()
+            author.delete()
+
+    def stampede(self, article, options):
+        response_cache._local.clear()
+        response_cache.shared_cache().clear()
+        # Yeni nesil: bütün istekler aynı anda cache'i kaçırır
+        article.save(update_fields=['title'])
+
+        queries = Counter()
+        states = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['threads'])
+        latency = options['query_latency']
+
+        def count_query(execute, sql, params, many, context):
+            with lock:
+                queries['total'] += 1
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def worker():
+            client = Client()
+            barrier.wait()
+            with connection.execute_wrapper(count_query):
+                response = client.get(f'/api/articles/{SLUG}/')
+            with lock:
+                states[response['X-Cache']] += 1
+            connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return queries['total'], states, time.perf_counter() - started
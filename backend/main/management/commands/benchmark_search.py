@@ -0,0 +1,107 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from main.models import Article, User
+from main.search import build_search_query, search_articles
+
+
+VOCABULARY = (
+    "router modem mesh switch kablosuz ağ hız menzil anten bant fiber kablo "
+    "oyun gecikme güvenlik firewall depolama disk performans fiyat inceleme "
+    "karşılaştırma rehber kurulum ayar sinyal kanal frekans port gigabit "
+    "akıllı ev uygulama güncelleme yazılım donanım işlemci bellek soğutma"
+).split()
+
+RARE_TERM = "zyxelnebula"
+
+
+class Command(BaseCommand):
+    help = 'Compare icontains search with the full-text index on a synthetic article corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep the synthetic articles instead of rolling them back',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.build_corpus(options['articles'])
+            for term in ('router', RARE_TERM, 'kablosuz menzil'):
+                self.compare(term, options['repeat'])
+            if not options['keep']:
+                transaction.set_rollback(True)
+                self.stdout.write('Corpus rolled back (use --keep to leave it in place)')
+
+    def build_corpus(self, total):
+        self.stdout.write(f'Creating {total} synthetic articles...')
+        author, _ = User.objects.get_or_create(
+            username='search-benchmark',
+            defaults={'email': 'search-benchmark@example.com'},
+        )
+        rng = random.Random(42)
+
+        def words(count):
+            return ' '.join(rng.choice(VOCABULARY) for _ in range(count))
+
+        started = time.perf_counter()
+        batch = []
+        for i in range(total):
+            content = f'<p>{words(120)}</p>'
+            # nadir terim her 5000 yazıda bir geçer
+            if i % 5000 == 0:
+                content += f'<p>{RARE_TERM}</p>'
+            batch.append(Article(
+                slug=f'search-benchmark-{i}',
+                title=words(6),
+                excerpt=words(20),
+                content=content,
+                status='PUBLISHED',
+                author=author,
+            ))
+            if len(batch) == 2000:
+                Article.objects.bulk_create(batch)
+                batch = []
+        Article.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Article._meta.db_table}')
+        self.stdout.write(f'  done in {time.perf_counter() - started:.1f}s')
+
+    def timed(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    def compare(self, term, repeat):
+        published = Article.objects.filter(status='PUBLISHED')
+
+        def icontains():
+            # eski /api/search/ sorgusu (içerikte aramıyordu)
+            qs = published.filter(
+                Q(title__icontains=term) | Q(subtitle__icontains=term) | Q(excerpt__icontains=term)
+            ).order_by('-published_at')
+            return qs.count(), list(qs.values_list('id', flat=True)[:20])
+
+        def full_text():
+            qs = search_articles(published, build_search_query(term))
+            return qs.count(), list(qs.values_list('id', flat=True)[:20])
+
+        icontains_count = icontains()[0]
+        full_text_count = full_text()[0]
+        icontains_ms = self.timed(icontains, repeat)
+        full_text_ms = self.timed(full_text, repeat)
+
+        self.stdout.write(
+            f'"{term}": icontains {icontains_ms:.1f} ms ({icontains_count} hits), '
+            f'full-text {full_text_ms:.1f} ms ({full_text_count} hits), '
+            f'speedup x{icontains_ms / full_text_ms:.1f}'
+        )
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from main.models import Article, User
+from main.models_extra import ArticleView
+from main.tracking import DatabaseSpool, EventBuffer
+import main.tracking as tracking
+
+
+USER_AGENT = 'tracking-benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Requests/sec of /api/article-view/ with synchronous inserts vs the write-behind buffer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--threads', type=int, default=8)
+
+    def handle(self, *args, **options):
+        author, _ = User.objects.get_or_create(
+            username='tracking-benchmark',
+            defaults={'email': 'tracking-benchmark@example.com'},
+        )
+        article, _ = Article.objects.get_or_create(
+            slug='tracking-benchmark',
+            defaults={'title': 'Tracking benchmark', 'author': author},
+        )
+        try:
+            with override_settings(TRACKING_BUFFER_ENABLED=False, ALLOWED_HOSTS=['*']):
+                sync_rps = self.run(article, options)
+            self.stdout.write(f'synchronous insert: {sync_rps:.0f} req/s')
+
+            buffer = EventBuffer(DatabaseSpool(), max_events=100_000, flush_size=500, flush_interval=1.0)
+            tracking._buffer = buffer
+            with override_settings(TRACKING_BUFFER_ENABLED=True, ALLOWED_HOSTS=['*']):
+                buffered_rps = self.run(article, options)
+            buffer.close()
+            self.stdout.write(f'write-behind buffer: {buffered_rps:.0f} req/s (x{buffered_rps / sync_rps:.1f})')
+            self.stdout.write(f'buffer stats: {buffer.snapshot()}')
+
+            stored = ArticleView.objects.filter(article=article, user_agent=USER_AGENT).count()
+            self.stdout.write(f'rows stored: {stored} (expected {2 * options["requests"]})')
+        finally:
+            tracking._buffer = None
+            ArticleView.objects.filter(article=article, user_agent=USER_AGENT).delete()
+            article.delete()
+            author.delete()
+
+    def run(self, article, options):
+        per_thread = options['requests'] // options['threads']
+
+        def worker():
+            client = Client(HTTP_USER_AGENT=USER_AGENT)
+            for _ in range(per_thread):
+                # serializer yolu ip_address'i gövdede zorunlu tutuyor
+                client.post(
+                    '/api/article-view/',
+                    {'article': article.id, 'ip_address': '127.0.0.1'},
+                    content_type='application/json',
+                )
+            connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return per_thread * options['threads'] / (time.perf_counter() - started)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from main.partitions import PARTITIONED_TABLES, add_months, create_month_partition, month_start
+
+
+class Command(BaseCommand):
+    help = 'Create the monthly ArticleView/OutboundClick partitions for the coming months'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=settings.TRACKING_PARTITION_MONTHS_AHEAD,
+            help='How many months ahead of the current one to prepare',
+        )
+
+    def handle(self, *args, **options):
+        this_month = month_start(timezone.localdate())
+        created = 0
+        for table in PARTITIONED_TABLES:
+            for offset in range(options['months'] + 1):
+                month = add_months(this_month, offset)
+                with transaction.atomic(), connection.cursor() as cursor:
+                    if create_month_partition(cursor, table, month):
+                        created += 1
+                        self.stdout.write(f'Created {table} partition for {month:%Y-%m}')
+        self.stdout.write(self.style.SUCCESS(f'{created} partitions created'))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from main.tracking import DirectorySpool
+
+
+class Command(BaseCommand):
+    help = 'Insert tracking batches that workers left in TRACKING_SPOOL_DIR'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Spool directory (default: TRACKING_SPOOL_DIR)')
+        parser.add_argument('--loop', action='store_true', help='Keep draining until interrupted')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        spool = DirectorySpool(options['path'])
+        while True:
+            files, written = spool.drain()
+            if files:
+                self.stdout.write(f'Drained {files} batches, {written} rows written')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,48 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from main.images import IMAGE_FIELDS, safe_build_variants, stale_rows, store_variants
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds the resized variants (see main/images.py) of every product cover, article '
+        'hero/og image and avatar whose variants are missing or stale. Resizing runs in a '
+        'process pool; the database is only touched by this process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Process pool size (default: CPU count)')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep running, picking up new uploads')
+        parser.add_argument('--interval', type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        # Worker'lar sadece dosya okur/yazar, veritabanına dokunmaz; spawn ile
+        # başlatılan platformlarda (macOS) Django'yu kendileri kurar
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            while True:
+                total = self.run_once(pool, options['batch_size'])
+                if total or not options['loop']:
+                    self.stdout.write(f'{total} image(s) processed')
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+    def run_once(self, pool, batch_size):
+        total = 0
+        for model, field_names in IMAGE_FIELDS.items():
+            for field_name in field_names:
+                # Başarısız kaynaklar da {"source": ...} ile işaretlenir, döngü ilerler
+                while True:
+                    rows = list(stale_rows(model, field_name).order_by('pk').values_list('pk', field_name)[:batch_size])
+                    if not rows:
+                        break
+                    sources = [source for _, source in rows]
+                    for (pk, source), data in zip(rows, pool.map(safe_build_variants, sources)):
+                        store_variants(model, pk, field_name, source, data)
+                    total += len(rows)
+                    self.stdout.write(f'{model.__name__}.{field_name}: {len(rows)} image(s)')
+        return total
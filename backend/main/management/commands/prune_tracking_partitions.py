@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from main.partitions import (
+    PARTITIONED_TABLES,
+    add_months,
+    archive_partition,
+    attached_partitions,
+    detach_partition,
+    detached_partitions,
+    drop_partition,
+    month_start,
+    partition_month,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Detach ArticleView/OutboundClick partitions older than the retention window, '
+        'export them to gzip CSV and drop them. Run rollup_analytics first so the '
+        'daily rollups already cover the months being removed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months', type=int, default=settings.TRACKING_RETENTION_MONTHS,
+            help='Full months to keep before the current one',
+        )
+        parser.add_argument('--archive-dir', default=settings.TRACKING_ARCHIVE_DIR)
+        parser.add_argument('--dry-run', action='store_true', help='Only list what would be pruned')
+
+    def handle(self, *args, **options):
+        cutoff = add_months(month_start(timezone.localdate()), -options['keep_months'])
+        self.stdout.write(f'Pruning partitions before {cutoff:%Y-%m}')
+
+        for table in PARTITIONED_TABLES:
+            with connection.cursor() as cursor:
+                expired = [
+                    name for name in attached_partitions(cursor, table)
+                    if (partition_month(table, name) or cutoff) < cutoff
+                ]
+            for name in expired:
+                if options['dry_run']:
+                    self.stdout.write(f'Would archive and drop {name}')
+                    continue
+                with transaction.atomic(), connection.cursor() as cursor:
+                    detach_partition(cursor, table, name)
+                self.stdout.write(f'Detached {name}')
+
+            if options['dry_run']:
+                continue
+            # Önceki çalıştırmada arşivlenemeyip ayrık kalanlar da burada tekrar denenir
+            with connection.cursor() as cursor:
+                detached = detached_partitions(cursor, table)
+            for name in detached:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    path = archive_partition(cursor, name, options['archive_dir'])
+                    drop_partition(cursor, name)
+                self.stdout.write(self.style.SUCCESS(f'Archived {name} to {path} and dropped it'))
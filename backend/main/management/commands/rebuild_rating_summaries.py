@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from main.ratings import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute ProductRatingSummary (approved review count, average, histogram) '
+        'from the approved reviews. Needed after bulk QuerySet.update() changes to '
+        'UserReview, which bypass the per-review bookkeeping.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='products', help='Only this product id (repeatable)')
+
+    def handle(self, *args, **options):
+        rebuilt, removed = rebuild_rating_summaries(options['products'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{rebuilt} rating summaries rebuilt, {removed} without approved reviews removed'
+        ))
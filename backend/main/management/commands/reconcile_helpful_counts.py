@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max
+from main.helpful_votes import COMMENT_VOTES, REVIEW_VOTES
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount Comment.helpful_count and UserReview.is_helpful from their vote rows '
+        'and fix the counters that drifted (see main/helpful_votes.py).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report rows whose count drifted')
+
+    def handle(self, *args, **options):
+        for counter in (COMMENT_VOTES, REVIEW_VOTES):
+            self.reconcile(counter, options['batch_size'], options['dry_run'])
+
+    def reconcile(self, counter, batch_size, dry_run):
+        model = counter.target_model
+        name = model.__name__
+        actual = counter.actual_count()
+        max_id = model.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        drifted = fixed = 0
+        for start in range(0, max_id + 1, batch_size):
+            with transaction.atomic():
+                batch = model.objects.filter(id__gte=start, id__lt=start + batch_size)
+                rows = list(
+                    batch.annotate(actual=actual)
+                    .exclude(**{counter.counter: F('actual')})
+                    .values_list('id', counter.counter, 'actual')
+                )
+                drifted += len(rows)
+                for row_id, stored, counted in rows:
+                    self.stdout.write(f'{name} {row_id}: {counter.counter} {stored} -> {counted}')
+                if rows and not dry_run:
+                    fixed += model.objects.filter(id__in=[row[0] for row in rows]).update(
+                        **{counter.counter: actual}
+                    )
+
+        if dry_run:
+            self.stdout.write(f'{drifted} {name} rows drifted (dry run, nothing changed)')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{fixed} {name} rows reconciled'))
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from main.models import Article
+from main.models_extra import ArticleView, DailyArticleStats
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild Article.view_count from ArticleView rows (plus the daily rollups '
+        'of months already archived by prune_tracking_partitions). Workers keep adding '
+        'their in-memory deltas afterwards, so counts can run ahead by at most '
+        'one VIEW_COUNT_FLUSH_INTERVAL worth of views.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Articles per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report articles whose count drifted')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        actual = Coalesce(
+            Subquery(
+                ArticleView.objects.filter(article=OuterRef('pk'))
+                .order_by()
+                .values('article')
+                .annotate(total=Count('pk'))
+                .values('total'),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+        # prune_tracking_partitions'ın arşivlediği aylar için günlük rollup'lar sayılır
+        first_view = ArticleView.objects.aggregate(first=Min('created_at'))['first']
+        if first_view is not None:
+            archived = Coalesce(
+                Subquery(
+                    DailyArticleStats.objects.filter(
+                        article=OuterRef('pk'), date__lt=timezone.localdate(first_view)
+                    )
+                    .order_by()
+                    .values('article')
+                    .annotate(total=Sum('views'))
+                    .values('total'),
+                    output_field=IntegerField(),
+                ),
+                0,
+            )
+            actual = actual + archived
+
+        max_id = Article.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        drifted = fixed = 0
+        for start in range(0, max_id + 1, batch_size):
+            with transaction.atomic():
+                batch = Article.objects.filter(id__gte=start, id__lt=start + batch_size)
+                rows = list(
+                    batch.annotate(actual=actual)
+                    .exclude(view_count=F('actual'))
+                    .values_list('id', 'view_count', 'actual')
+                )
+                drifted += len(rows)
+                for article_id, stored, counted in rows:
+                    self.stdout.write(f'Article {article_id}: view_count {stored} -> {counted}')
+                if rows and not options['dry_run']:
+                    fixed += Article.objects.filter(id__in=[row[0] for row in rows]).update(view_count=actual)
+
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} articles drifted (dry run, nothing changed)')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{fixed} articles reconciled'))
@@ -0,0 +1,69 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.db.models import Min
+from django.utils import timezone
+from main.models_extra import ArticleView, OutboundClick
+from main.rollups import rebuild_event_rollups, refresh_monthly, snapshot_content
+
+
+class Command(BaseCommand):
+    help = (
+        'Maintain the daily/monthly analytics rollups read by the admin analytics '
+        'endpoints. Run it every few minutes (cron or --loop); by default it '
+        'recomputes today and yesterday and snapshots the content totals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='Recompute the last N days (today included)')
+        parser.add_argument('--since', help='Recompute from this date (YYYY-MM-DD)')
+        parser.add_argument('--all', action='store_true', help='Recompute from the first tracked event')
+        parser.add_argument('--loop', action='store_true', help='Keep running until interrupted')
+        parser.add_argument('--interval', type=float, default=300, help='Seconds between runs with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(options)
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def first_event_day(self):
+        firsts = [
+            model.objects.aggregate(first=Min('created_at'))['first']
+            for model in (ArticleView, OutboundClick)
+        ]
+        return min((timezone.localdate(value) for value in firsts if value), default=None)
+
+    def start_date(self, options, today):
+        first_event_day = self.first_event_day()
+        if options['since']:
+            try:
+                start = datetime.date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be YYYY-MM-DD')
+        elif options['all']:
+            start = first_event_day or today
+        else:
+            start = today - datetime.timedelta(days=max(options['days'], 1) - 1)
+        # prune_tracking_partitions'ın sildiği aylar yeniden hesaplanıp sıfırlanmasın
+        if first_event_day and start < first_event_day:
+            self.stdout.write(f'Raw events start at {first_event_day}, keeping older rollups as they are')
+            start = first_event_day
+        return start
+
+    def run_once(self, options):
+        today = timezone.localdate()
+        start = self.start_date(options, today)
+        started = time.perf_counter()
+
+        rebuild_event_rollups(start, today)
+        snapshot_content(today)
+        refresh_monthly(start, today)
+
+        self.stdout.write(
+            f'Rollups refreshed for {start} .. {today} in {time.perf_counter() - started:.2f}s'
+        )
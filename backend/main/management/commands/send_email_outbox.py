@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from main.outbox import process_outbox, purge_sent, requeue_dead
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued EmailOutbox messages (verification, password reset, newsletter). '
+        'Safe to run several copies at once; rows are claimed with FOR UPDATE SKIP LOCKED.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Messages per claim (default: EMAIL_OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--loop', action='store_true', help='Keep sending until interrupted')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between passes with --loop')
+        parser.add_argument('--requeue-dead', action='store_true', help='Retry dead-lettered messages and exit')
+        parser.add_argument('--purge-days', type=int, default=30, help='Delete sent messages older than N days (0: keep)')
+
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            self.stdout.write(f'Requeued {requeue_dead()} dead-lettered messages')
+            return
+
+        if options['purge_days']:
+            purged = purge_sent(options['purge_days'])
+            if purged:
+                self.stdout.write(f'Purged {purged} sent messages')
+
+        while True:
+            stats = process_outbox(options['batch_size'])
+            if any(stats.values()):
+                self.stdout.write(
+                    f"Outbox: {stats['sent']} sent, {stats['retry']} scheduled for retry, "
+                    f"{stats['dead']} dead-lettered"
+                )
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from main.newsletter import claim_campaign, run_campaign
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver queued newsletter campaigns in chunks over pooled SMTP connections. '
+        'Progress is checkpointed, so an interrupted campaign resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaign', type=int, help='Only run this campaign id')
+        parser.add_argument('--chunk-size', type=int, help='Recipients per send (default: NEWSLETTER_CHUNK_SIZE)')
+        parser.add_argument('--workers', type=int, help='Parallel SMTP connections (default: NEWSLETTER_WORKERS)')
+        parser.add_argument('--loop', action='store_true', help='Keep waiting for new campaigns until interrupted')
+        parser.add_argument('--interval', type=float, default=10.0, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            while (campaign := claim_campaign(options['campaign'])) is not None:
+                self.run(campaign, options)
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+    def run(self, campaign, options):
+        started = time.perf_counter()
+        self.stdout.write(
+            f'Campaign #{campaign.id} "{campaign.article.title}" (checkpoint: subscriber {campaign.last_subscriber_id})'
+        )
+
+        def progress(campaign):
+            done = campaign.sent_count + campaign.deferred_count
+            self.stdout.write(
+                f'  {done}/{campaign.total_recipients} processed '
+                f'({campaign.deferred_count} deferred to the outbox)'
+            )
+
+        run_campaign(campaign, options['chunk_size'], options['workers'], progress=progress)
+        self.stdout.write(
+            f'Campaign #{campaign.id} done: {campaign.sent_count} sent, '
+            f'{campaign.deferred_count} deferred, {time.perf_counter() - started:.1f}s'
+        )
@@ -0,0 +1,106 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Ağırlıklar: başlık (A) > alt başlık (B) > özet (C) > içerik (D).
+# İçerik HTML olarak saklandığı için etiketler indekslenmeden önce temizlenir.
+ARTICLE_VECTOR_SQL = """
+    setweight(to_tsvector('turkish', coalesce(NEW.title, '')), 'A') ||
+    setweight(to_tsvector('turkish', coalesce(NEW.subtitle, '')), 'B') ||
+    setweight(to_tsvector('turkish', coalesce(NEW.excerpt, '')), 'C') ||
+    setweight(to_tsvector('turkish', regexp_replace(coalesce(NEW.content, ''), '<[^>]+>', ' ', 'g')), 'D')
+"""
+
+PRODUCT_VECTOR_SQL = """
+    setweight(to_tsvector('turkish', coalesce(NEW.brand, '') || ' ' || coalesce(NEW.model, '')), 'A') ||
+    setweight(to_tsvector('turkish', coalesce(NEW.description, '')), 'C')
+"""
+
+TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {vector};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER {table}_search_vector_insert
+    BEFORE INSERT ON {table}
+    FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();
+
+CREATE TRIGGER {table}_search_vector_update
+    BEFORE UPDATE ON {table}
+    FOR EACH ROW
+    WHEN ({changed})
+    EXECUTE FUNCTION {table}_search_vector_update();
+
+UPDATE {table} SET search_vector = {backfill};
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS {table}_search_vector_insert ON {table};
+DROP TRIGGER IF EXISTS {table}_search_vector_update ON {table};
+DROP FUNCTION IF EXISTS {table}_search_vector_update();
+"""
+
+
+def trigger_sql(table, vector, columns):
+    # search_vector da listede: Django save() bellekteki (eski/NULL) değeri
+    # geri yazarsa vektör yeniden hesaplanır
+    changed = " OR ".join(
+        f"OLD.{column} IS DISTINCT FROM NEW.{column}"
+        for column in [*columns, "search_vector"]
+    )
+    return TRIGGER_SQL.format(
+        table=table,
+        vector=vector,
+        changed=changed,
+        backfill=vector.replace("NEW.", ""),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0029_passwordresetcode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+        migrations.RunSQL(
+            trigger_sql(
+                'main_article',
+                ARTICLE_VECTOR_SQL,
+                ['title', 'subtitle', 'excerpt', 'content'],
+            ),
+            DROP_TRIGGER_SQL.format(table='main_article'),
+        ),
+        migrations.RunSQL(
+            trigger_sql(
+                'main_product',
+                PRODUCT_VECTOR_SQL,
+                ['brand', 'model', 'description'],
+            ),
+            DROP_TRIGGER_SQL.format(table='main_product'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:40
+
+from django.db import migrations, models
+
+
+# Kullanıcı araması icontains kullanır; Django bunu UPPER(col) LIKE UPPER('%q%')
+# olarak üretir, bu yüzden trigram indeksleri UPPER(...) ifadesi üzerine kurulur.
+TRIGRAM_FIELDS = ('first_name', 'last_name', 'username')
+
+
+def backfill_profile_visible(apps, schema_editor):
+    User = apps.get_model('main', 'User')
+    User.objects.filter(privacy_settings__profile_visible=False).update(profile_visible=False)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            # pg_trgm olmayan kurulumlarda arama yine çalışır, sadece indekssiz
+            print("pg_trgm is not available, skipping user name trigram indexes")
+            return
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for field in TRIGRAM_FIELDS:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS main_user_{field}_trgm '
+                f'ON main_user USING gin (UPPER({field}::text) gin_trgm_ops)'
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for field in TRIGRAM_FIELDS:
+            cursor.execute(f'DROP INDEX IF EXISTS main_user_{field}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0030_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_visible',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(backfill_profile_visible, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
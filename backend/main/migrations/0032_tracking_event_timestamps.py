@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0031_user_profile_visible'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='articleview',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='outboundclick',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
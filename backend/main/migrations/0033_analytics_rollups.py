@@ -0,0 +1,89 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0032_tracking_event_timestamps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySiteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('new_users', models.PositiveIntegerField(default=0)),
+                ('total_articles', models.PositiveIntegerField(default=0)),
+                ('published_articles', models.PositiveIntegerField(default=0)),
+                ('total_products', models.PositiveIntegerField(default=0)),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('total_reviews', models.PositiveIntegerField(default=0)),
+                ('total_affiliate_links', models.PositiveIntegerField(default=0)),
+                ('total_comments', models.PositiveIntegerField(default=0)),
+                ('approved_comments', models.PositiveIntegerField(default=0)),
+                ('snapshot_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyMerchantStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('merchant', models.CharField(max_length=100)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('links', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('date', 'merchant')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyArticleStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='main.article')),
+            ],
+            options={
+                'unique_together': {('date', 'article')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCategoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('published_articles', models.PositiveIntegerField(default=0)),
+                ('products', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='main.category')),
+            ],
+            options={
+                'unique_together': {('date', 'category')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='main.product')),
+            ],
+            options={
+                'unique_together': {('date', 'product')},
+            },
+        ),
+    ]
@@ -0,0 +1,130 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:52
+
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Migration sırasında bu ay + 3 ay için partition hazırlanır;
+# sonrasını create_tracking_partitions yönetir.
+MONTHS_AHEAD = 3
+
+# main.partitions'tan kopyalandı: migration o modüldeki sonraki değişikliklerden etkilenmesin
+PARTITIONED_TABLES = ("main_articleview", "main_outboundclick")
+
+
+def month_start(day):
+    return datetime.date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def create_month_partition(cursor, table, month):
+    """Create and attach the `<table>_pYYYY_MM` partition of a local calendar month"""
+    name = f"{table}_p{month:%Y_%m}"
+    tz = timezone.get_current_timezone()
+    start = datetime.datetime.combine(month, datetime.time.min, tzinfo=tz)
+    end = datetime.datetime.combine(add_months(month, 1), datetime.time.min, tzinfo=tz)
+    cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)")
+    # ATTACH parent'taki indeksleri (PK dahil) yeni partition'da da oluşturur
+    cursor.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+
+
+def _index_definitions(cursor, table):
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+        [table, f"{table}_pkey"],
+    )
+    # Partitioned tablo indeksleri "ON ONLY" olarak listelenir
+    return [row[0].replace(" ON ONLY ", " ON ") for row in cursor.fetchall()]
+
+
+def _foreign_keys(cursor, table):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _rebuild(cursor, table, old, create_sql, primary_key, after_create=None):
+    """Move `table` aside as `old`, recreate it with `create_sql`, copy rows back, restore indexes/FKs"""
+    indexes = _index_definitions(cursor, table)
+    foreign_keys = _foreign_keys(cursor, table)
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    cursor.execute(f"ALTER INDEX {table}_pkey RENAME TO {old}_pkey")
+    cursor.execute(create_sql.format(table=table, old=old))
+    cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})")
+    if after_create:
+        after_create(cursor, old)
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce(max(id), 0) + 1, false) FROM {table}",
+        [table],
+    )
+    cursor.execute(f"DROP TABLE {old} CASCADE")
+    # İndeksler veri kopyalandıktan sonra kurulur (daha hızlı)
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+
+
+def partition_tables(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            def create_partitions(cursor, old, table=table):
+                cursor.execute(f"SELECT min(created_at) FROM {old}")
+                first = cursor.fetchone()[0]
+                this_month = month_start(timezone.localdate())
+                month = month_start(timezone.localtime(first).date()) if first else this_month
+                while month <= add_months(this_month, MONTHS_AHEAD):
+                    create_month_partition(cursor, table, month)
+                    month = add_months(month, 1)
+                cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+            _rebuild(
+                cursor,
+                table,
+                f"{table}_unpartitioned",
+                "CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+                "PARTITION BY RANGE (created_at)",
+                # Partition anahtarı PK'da olmak zorunda
+                "id, created_at",
+                after_create=create_partitions,
+            )
+
+
+def unpartition_tables(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            _rebuild(
+                cursor,
+                table,
+                f"{table}_partitioned",
+                "CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING IDENTITY)",
+                "id",
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0033_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+        migrations.AddIndex(
+            model_name='outboundclick',
+            index=models.Index(fields=['created_at'], name='main_outbou_created_714d33_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('main', '0036_newsletter_campaign'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-published_at', '-created_at', '-id'], name='article_list_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='comment_list_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='product_list_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='user_list_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userreview',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='review_list_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_summaries(apps, schema_editor):
+    UserReview = apps.get_model('main', 'UserReview')
+    ProductRatingSummary = apps.get_model('main', 'ProductRatingSummary')
+    rows = (
+        UserReview.objects.filter(status='APPROVED')
+        .order_by()
+        .values('product_id')
+        .annotate(
+            approved_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{f'rating_{rating}': Count('id', filter=Q(rating=rating)) for rating in range(1, 6)},
+        )
+    )
+    ProductRatingSummary.objects.bulk_create(
+        [ProductRatingSummary(average=row['rating_sum'] / row['approved_count'], **row) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0037_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRatingSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='main.product')),
+                ('approved_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('average', models.FloatField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-average', '-approved_count'], name='rating_summary_average_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rating_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:40
+
+import ast
+import json
+
+from django.db import migrations
+
+
+# main.settings_snapshot.normalize_setting_value'nun bu migration anındaki kopyası;
+# migration o modüldeki sonraki değişikliklerden etkilenmesin
+def normalize_setting_value(value):
+    """Unwrap values stored as "{'value': ...}" / '{"value": ...}' strings"""
+    while True:
+        if isinstance(value, dict) and "value" in value:
+            value = value["value"]
+            continue
+        if not (isinstance(value, str) and value.startswith(("{'value':", '{"value":'))):
+            break
+        try:
+            nested = json.loads(value.replace("'", '"'))
+        except ValueError:
+            try:
+                nested = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                break
+        if not isinstance(nested, dict) or "value" not in nested:
+            break
+        value = nested
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def normalize_values(apps, schema_editor):
+    # Eski admin formunun "{'value': ...}" olarak kaydettiği değerleri bir kez aç
+    Setting = apps.get_model("main", "Setting")
+    for setting in Setting.objects.all().only("pk", "value"):
+        value = normalize_setting_value(setting.value)
+        if value != setting.value:
+            Setting.objects.filter(pk=setting.pk).update(value=value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0038_product_rating_summary"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-17 08:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Comment = apps.get_model("main", "Comment")
+    HelpfulVote = apps.get_model("main", "HelpfulVote")
+    UserReview = apps.get_model("main", "UserReview")
+    votes = (
+        HelpfulVote.objects.filter(comment=OuterRef("pk"))
+        .order_by()
+        .values("comment")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Comment.objects.update(helpful_count=Coalesce(Subquery(votes, output_field=IntegerField()), 0))
+    # is_helpful hiç yazılmıyordu; oy tablosu yeni, sayaçlar sıfırdan başlar
+    UserReview.objects.exclude(is_helpful=0).update(is_helpful=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0040_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='helpful_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='userreview',
+            name='is_helpful',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ReviewHelpfulVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='helpful_votes', to='main.userreview')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='review_helpful_votes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('review', 'user')},
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 import json
 
@@ -22,10 +24,14 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='MEMBER')
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    # Boyutlandırılmış kopyalar (bkz. images.py), elle yazılmaz
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(blank=True, null=True)
     social_links = models.JSONField(default=dict, blank=True)
     settings = models.JSONField(default=dict, blank=True)
     privacy_settings = models.JSONField(default=dict, blank=True)
+    # privacy_settings['profile_visible'] kopyası; kullanıcı aramasında SQL'de filtrelenir (save() senkronlar)
+    profile_visible = models.BooleanField(default=True)
     notification_settings = models.JSONField(default=dict, blank=True)
     marketing_emails = models.BooleanField(default=False)
     push_notifications = models.BooleanField(default=True)
@@ -42,10 +48,21 @@ class User(AbstractUser):
     
     class Meta:
         db_table = 'main_user'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='user_list_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.email} ({self.role})"
 
+    def save(self, *args, **kwargs):
+        # privacy_settings boşsa profil görünür kabul edilir
+        self.profile_visible = bool((self.privacy_settings or {}).get('profile_visible', True))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'privacy_settings' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'profile_visible'}
+        super().save(*args, **kwargs)
+
 
 class Category(models.Model):
     """Hierarchical category system"""
@@ -94,13 +111,21 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     release_year = models.IntegerField(null=True, blank=True)
     cover_image = models.ImageField(upload_to='products/', null=True, blank=True)
+    # Boyutlandırılmış kopyalar (bkz. images.py), elle yazılmaz
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(blank=True, null=True)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    # Veritabanı trigger'ı ile doldurulur (migration 0030), elle yazılmaz
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            models.Index(fields=['-created_at', '-id'], name='product_list_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.brand} {self.model}"
@@ -135,48 +160,82 @@ class Article(models.Model):
     published_at = models.DateTimeField(null=True, blank=True)
     hero_image = models.ImageField(upload_to='articles/', null=True, blank=True)
     og_image = models.ImageField(upload_to='articles/og/', null=True, blank=True)
+    # Boyutlandırılmış kopyalar (bkz. images.py), elle yazılmaz
+    hero_image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    og_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     meta_title = models.CharField(max_length=200, blank=True, null=True)
     meta_description = models.TextField(blank=True, null=True)
     canonical = models.URLField(blank=True, null=True)
     schema_type = models.CharField(max_length=50, blank=True, null=True)
     view_count = models.PositiveIntegerField(default=0)
+    # Veritabanı trigger'ı ile doldurulur (migration 0030), elle yazılmaz
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-published_at', '-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='article_search_vector_gin'),
+            # Varsayılan sıralama + id: ?cursor= sayfalaması (bkz. pagination.py)
+            models.Index(fields=['-published_at', '-created_at', '-id'], name='article_list_keyset_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Yayın geçişi bu değerle karşılaştırılır; save() tekrar SELECT atmaz
+        instance._loaded_status = instance.__dict__.get('status', _STATUS_NOT_LOADED)
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        if 'status' in self.__dict__:
+            self._loaded_status = self.status
+
+    def _previous_status(self):
+        """Status stored in the database before this save (None for new rows)"""
+        if self.pk is None:
+            return None
+        previous = getattr(self, '_loaded_status', _STATUS_NOT_LOADED)
+        if previous is _STATUS_NOT_LOADED or self._state.adding:
+            # Sadece status'u ertelenmiş (only/defer) ya da elle pk verilmiş nesnelerde
+            previous = Article.objects.filter(pk=self.pk).values_list('status', flat=True).first()
+        return previous
+
     def save(self, *args, **kwargs):
-        # Check if this is a new article being published
-        is_new_article = self.pk is None
-        was_published = False
-        
-        if not is_new_article:
-            # Check if status changed to PUBLISHED
-            try:
-                old_article = Article.objects.get(pk=self.pk)
-                was_published = old_article.status == 'PUBLISHED'
-            except Article.DoesNotExist:
-                pass
+        update_fields = kwargs.get('update_fields')
+        # update_fields status'u içermiyorsa veritabanındaki status değişmez
+        if update_fields is not None and 'status' not in update_fields:
+            return super().save(*args, **kwargs)
+        previous_status = self._previous_status()
         
         if self.status == 'PUBLISHED' and not self.published_at:
             self.published_at = timezone.now()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'published_at'}
         
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
         
-        # Send newsletter email if this is a new published article
-        if self.status == 'PUBLISHED' and (is_new_article or not was_published):
-            try:
-                from .email_utils import send_newsletter_email
-                from .models_extra import NewsletterSubscription
-                
-                # Send newsletter email asynchronously (in production, use Celery)
-                send_newsletter_email(None, self)
-            except Exception as e:
-                print(f"Failed to send newsletter email: {e}")
+        if self.status == 'PUBLISHED' and previous_status != 'PUBLISHED':
+            # Bülten vb. işler commit'ten sonra çalışır (bkz. signals.article_published)
+            transaction.on_commit(lambda: _send_article_published(self))
+
+
+# Article.from_db: status alanı yüklenmediyse
+_STATUS_NOT_LOADED = object()
+
+
+def _send_article_published(article):
+    from .signals import article_published
+
+    for receiver, response in article_published.send_robust(sender=Article, article=article):
+        if isinstance(response, Exception):
+            print(f"article_published receiver {receiver.__name__} failed: {response}")
 
 
 # Import all models from models_extra.py
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from .models import User, Article, Product, Category, Tag
 
@@ -103,14 +103,20 @@ class AffiliateLink(models.Model):
 
 
 class OutboundClick(models.Model):
-    """Click tracking for affiliate links"""
+    """Click tracking for affiliate links (monthly partitioned table, see partitions.py)"""
     product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name='outbound_clicks')
     article = models.ForeignKey(Article, on_delete=models.CASCADE, null=True, blank=True, related_name='outbound_clicks')
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='outbound_clicks')
     merchant = models.CharField(max_length=100)
     ip = models.GenericIPAddressField()
     user_agent = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # auto_now_add değil: buffer'dan toplu yazılan olaylar kendi zamanlarını korur (bkz. tracking.py)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"Click on {self.merchant} - {self.created_at}"
@@ -132,15 +138,26 @@ class Comment(models.Model):
     author_email = models.EmailField(blank=True, null=True)
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    # HelpfulVote sayısı; helpful_votes.py günceller, reconcile_helpful_counts düzeltir
+    helpful_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Herkese açık liste status='APPROVED' ile süzülür
+            models.Index(fields=['status', '-created_at', '-id'], name='comment_list_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author_name or self.user.email} on {self.article.title}"
 
+    def save(self, *args, **kwargs):
+        from .helpful_votes import without_counter
+
+        super().save(*args, **without_counter(self, 'helpful_count', kwargs))
+
 
 class HelpfulVote(models.Model):
     """Voting system for comments"""
@@ -194,14 +211,18 @@ class Setting(models.Model):
     def __str__(self):
         return f"{self.key}: {self.value[:50]}"
 
+    def save(self, *args, **kwargs):
+        from .settings_snapshot import normalize_setting_value
+
+        self.value = normalize_setting_value(self.value)
+        super().save(*args, **kwargs)
+
     @classmethod
     def get_setting(cls, key, default=None):
-        """Get a setting value by key"""
-        try:
-            setting = cls.objects.get(key=key)
-            return setting.value
-        except cls.DoesNotExist:
-            return default
+        """Get a setting value by key (from the per-process snapshot, see settings_snapshot.py)"""
+        from .settings_snapshot import get_setting
+
+        return get_setting(key, default)
 
     @classmethod
     def set_setting(cls, key, value, description=None, category='general'):
@@ -267,7 +288,8 @@ class UserReview(models.Model):
     pros = models.JSONField(default=list, blank=True)
     cons = models.JSONField(default=list, blank=True)
     is_verified = models.BooleanField(default=False)
-    is_helpful = models.IntegerField(default=0)
+    # ReviewHelpfulVote sayısı; helpful_votes.py günceller, reconcile_helpful_counts düzeltir
+    is_helpful = models.PositiveIntegerField(default=0, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -277,11 +299,90 @@ class UserReview(models.Model):
         indexes = [
             models.Index(fields=['product', 'rating']),
             models.Index(fields=['status']),
+            models.Index(fields=['status', '-created_at', '-id'], name='review_list_keyset_idx'),
         ]
 
     def __str__(self):
         return f"Review by {self.user.email} for {self.product.brand} {self.product.model}"
 
+    def rating_contribution(self):
+        """(product_id, rating) this review adds to ProductRatingSummary, None unless approved"""
+        if self.status != 'APPROVED':
+            return None
+        return (self.product_id, self.rating)
+
+    def save(self, *args, **kwargs):
+        from .helpful_votes import without_counter
+
+        kwargs = without_counter(self, 'is_helpful', kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'product', 'rating', 'status'} & set(update_fields):
+            super().save(*args, **kwargs)
+            return
+
+        from .ratings import apply_rating_change
+
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                # Satır kilitlenir: aynı yorumun eşzamanlı iki kaydı aynı eski durumu görmesin
+                stored = (
+                    UserReview.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list('product_id', 'rating', 'status')
+                    .first()
+                )
+                if stored is not None and stored[2] == 'APPROVED':
+                    previous = stored[:2]
+            super().save(*args, **kwargs)
+            apply_rating_change(previous, self.rating_contribution())
+
+
+class ReviewHelpfulVote(models.Model):
+    """Helpful votes for user reviews, counted in UserReview.is_helpful"""
+    review = models.ForeignKey(UserReview, on_delete=models.CASCADE, related_name='helpful_votes')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_helpful_votes')
+    ip_address = models.GenericIPAddressField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [['review', 'user']]
+
+    def __str__(self):
+        return f"Vote for review {self.review_id}"
+
+
+class ProductRatingSummary(models.Model):
+    """
+    Approved review totals of a product, kept up to date by UserReview.save
+    and the post_delete signal (see ratings.py). Rebuild with
+    `python manage.py rebuild_rating_summaries`.
+    """
+    product = models.OneToOneField(
+        Product, on_delete=models.CASCADE, primary_key=True, related_name='rating_summary'
+    )
+    approved_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    average = models.FloatField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-average', '-approved_count'], name='rating_summary_average_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.average:.1f} ({self.approved_count})"
+
+    @property
+    def histogram(self):
+        return {rating: getattr(self, f'rating_{rating}') for rating in range(1, 6)}
+
 
 class ProductTag(models.Model):
     """Many-to-many relationship between products and tags"""
@@ -339,13 +440,14 @@ class Favorite(models.Model):
 
 
 class ArticleView(models.Model):
-    """Track article page views for analytics"""
+    """Track article page views for analytics (monthly partitioned table, see partitions.py)"""
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='views')
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='article_views')
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField(blank=True, null=True)
     referer = models.URLField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # auto_now_add değil: buffer'dan toplu yazılan olaylar kendi zamanlarını korur (bkz. tracking.py)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-created_at']
@@ -376,6 +478,173 @@ class MonthlyAnalytics(models.Model):
         return f"Analytics {self.year}-{self.month:02d}: {self.total_views} views, {self.total_affiliate_clicks} clicks"
 
 
+class DailySiteStats(models.Model):
+    """
+    Site-wide daily rollup maintained by `rollup_analytics`.
+    Event counts are recomputed from the raw tables; the content totals are a
+    snapshot taken when the command runs on that day.
+    """
+    date = models.DateField(unique=True)
+    views = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+    new_users = models.PositiveIntegerField(default=0)
+    total_articles = models.PositiveIntegerField(default=0)
+    published_articles = models.PositiveIntegerField(default=0)
+    total_products = models.PositiveIntegerField(default=0)
+    total_users = models.PositiveIntegerField(default=0)
+    total_reviews = models.PositiveIntegerField(default=0)
+    total_affiliate_links = models.PositiveIntegerField(default=0)
+    total_comments = models.PositiveIntegerField(default=0)
+    approved_comments = models.PositiveIntegerField(default=0)
+    # İçerik toplamlarının alındığı an; None ise o gün snapshot alınmamış
+    snapshot_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Site stats {self.date}: {self.views} views, {self.clicks} clicks"
+
+
+class DailyArticleStats(models.Model):
+    """Views and outbound clicks per article per day"""
+    date = models.DateField()
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='daily_stats')
+    views = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [['date', 'article']]
+
+    def __str__(self):
+        return f"{self.date} article {self.article_id}: {self.views} views"
+
+
+class DailyProductStats(models.Model):
+    """Outbound clicks per product per day"""
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_stats')
+    clicks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [['date', 'product']]
+
+    def __str__(self):
+        return f"{self.date} product {self.product_id}: {self.clicks} clicks"
+
+
+class DailyCategoryStats(models.Model):
+    """Article views / product clicks per category per day, plus that day's content counts"""
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_stats')
+    views = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+    published_articles = models.PositiveIntegerField(default=0)
+    products = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [['date', 'category']]
+
+    def __str__(self):
+        return f"{self.date} category {self.category_id}: {self.views} views"
+
+
+class DailyMerchantStats(models.Model):
+    """Outbound clicks per merchant per day, plus that day's affiliate link count"""
+    date = models.DateField()
+    merchant = models.CharField(max_length=100)
+    clicks = models.PositiveIntegerField(default=0)
+    links = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = [['date', 'merchant']]
+
+    def __str__(self):
+        return f"{self.date} {self.merchant}: {self.clicks} clicks"
+
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing e-mail queue. Request paths only insert rows here; the
+    `send_email_outbox` worker delivers them (see outbox.py).
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('DEAD', 'Dead'),
+    ]
+
+    KIND_CHOICES = [
+        ('VERIFICATION', 'Email verification'),
+        ('PASSWORD_RESET', 'Password reset'),
+        ('NEWSLETTER', 'Newsletter'),
+        ('OTHER', 'Other'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='OTHER')
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=254, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    # Bu zamandan önce tekrar denenmez (exponential backoff)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # SENDING'e alındığı an; worker ölürse EMAIL_OUTBOX_LOCK_TIMEOUT sonra tekrar alınır
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.to_email} ({self.status})"
+
+
+class NewsletterCampaign(models.Model):
+    """
+    One newsletter fan-out for a published article. Article.save() only
+    creates the row; `send_newsletters` delivers it in chunks and checkpoints
+    its progress here, so an interrupted send resumes where it stopped.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+    ]
+
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='newsletter_campaigns')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    subject = models.CharField(max_length=255, blank=True)
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    # Toplu gönderimde reddedilen alıcılar; EmailOutbox üzerinden tekrar denenir
+    deferred_count = models.PositiveIntegerField(default=0)
+    # Checkpoint: bu id'ye kadarki aboneler işlendi
+    last_subscriber_id = models.PositiveIntegerField(default=0)
+    # RUNNING iken her checkpoint'te yenilenir; eskiyen kampanyayı başka worker devralır
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Newsletter for {self.article.title}: {self.sent_count}/{self.total_recipients} ({self.status})"
+
+
 class NewsletterSubscription(models.Model):
     """Newsletter subscription model"""
     email = models.EmailField(unique=True)
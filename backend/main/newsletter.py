@@ -0,0 +1,194 @@
+# hardware/backend/main/newsletter.py
+"""
+Newsletter fan-out.
+
+Publishing an article only queues a NewsletterCampaign (queue_newsletter);
+`python manage.py send_newsletters --loop` runs it:
+
+- eligible_subscribers() resolves the recipients in one query: active
+  subscriptions whose address belongs to a user with e-mail notifications
+  on (newsletter-only subscribers are not mailed).
+- The mail is rendered once per run (render_newsletter_email); per
+  recipient only the unsubscribe placeholder is substituted.
+- Recipients are read in waves of NEWSLETTER_CHUNK_SIZE * NEWSLETTER_WORKERS
+  rows (keyset on the subscription id). Each chunk goes out with a single
+  send_messages() call over a connection that its worker thread keeps open
+  for the whole run.
+- After every wave the campaign row records the last subscriber id and the
+  counters, so an interrupted run (or one taken over after
+  NEWSLETTER_LOCK_TIMEOUT) resumes from there; at most one wave is resent.
+- A chunk the server rejects is retried message by message; recipients
+  that still fail are handed to the e-mail outbox (outbox.py), which
+  retries them with backoff.
+"""
+
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .email_utils import NEWSLETTER_EMAIL_PLACEHOLDER, render_newsletter_email
+from .models import User
+from .models_extra import NewsletterCampaign, NewsletterSubscription
+from .outbox import enqueue_email
+
+
+def eligible_subscribers():
+    """Active subscriptions of users who accept e-mail notifications"""
+    opted_in = User.objects.filter(email=OuterRef("email"), email_notifications=True).exclude(
+        # Anahtar hiç yoksa bildirim açık sayılır; `@>` NULL üretmediği için güvenli
+        notification_settings__contains={"email_notifications": False}
+    )
+    return NewsletterSubscription.objects.filter(Exists(opted_in), is_active=True)
+
+
+def queue_newsletter(article):
+    """Create the campaign for `article` unless one is already waiting or running"""
+    if NewsletterCampaign.objects.filter(article=article, status__in=["PENDING", "RUNNING"]).exists():
+        return None
+    return NewsletterCampaign.objects.create(article=article, subject=article.title[:255])
+
+
+def claim_campaign(campaign_id=None):
+    """Lock the oldest due campaign (or `campaign_id`) for this worker; None if there is none"""
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=settings.NEWSLETTER_LOCK_TIMEOUT)
+    with transaction.atomic():
+        queryset = NewsletterCampaign.objects.select_for_update(skip_locked=True).filter(
+            Q(status="PENDING") | Q(status="RUNNING", locked_at__lt=stale)
+        )
+        if campaign_id:
+            queryset = queryset.filter(id=campaign_id)
+        campaign = queryset.order_by("created_at", "id").first()
+        if campaign is None:
+            return None
+        campaign.status = "RUNNING"
+        campaign.locked_at = now
+        campaign.started_at = campaign.started_at or now
+        campaign.save(update_fields=["status", "locked_at", "started_at"])
+    return campaign
+
+
+class _ChunkSender:
+    """Sends chunks of messages; every worker thread reuses its own SMTP connection"""
+
+    def __init__(self, subject, text, html):
+        self.subject = subject
+        self.text = text
+        self.html = html
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = get_connection(fail_silently=False)
+            connection.open()
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _reset_connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+            self._local.connection = None
+
+    def message(self, email):
+        message = EmailMultiAlternatives(
+            subject=self.subject,
+            body=self.text,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email],
+        )
+        message.attach_alternative(self.html.replace(NEWSLETTER_EMAIL_PLACEHOLDER, email), "text/html")
+        return message
+
+    def send(self, emails):
+        """Send one chunk; returns [(email, error)] for recipients that were not delivered"""
+        try:
+            self._connection().send_messages([self.message(email) for email in emails])
+            return []
+        except Exception:
+            # Chunk'ın neresinde koptuğunu bilemeyiz; tek tek, temiz bağlantıyla dene
+            self._reset_connection()
+
+        failed = []
+        for email in emails:
+            try:
+                self._connection().send_messages([self.message(email)])
+            except Exception as exc:
+                failed.append((email, exc))
+                self._reset_connection()
+        return failed
+
+    def close(self):
+        for connection in self._connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+def run_campaign(campaign, chunk_size=None, workers=None, progress=None):
+    """Deliver `campaign` from its checkpoint to the end; `progress(campaign)` is called after every wave"""
+    chunk_size = chunk_size or settings.NEWSLETTER_CHUNK_SIZE
+    workers = workers or settings.NEWSLETTER_WORKERS
+    subject, text, html = render_newsletter_email(campaign.article)
+    recipients = eligible_subscribers()
+
+    campaign.subject = subject[:255]
+    # Devam eden kampanyada önceki dalgalarda gönderilenler de toplama dahil
+    campaign.total_recipients = (
+        campaign.sent_count + campaign.deferred_count
+        + recipients.filter(id__gt=campaign.last_subscriber_id).count()
+    )
+    campaign.save(update_fields=["subject", "total_recipients"])
+
+    sender = _ChunkSender(subject, text, html)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                wave = list(
+                    recipients.filter(id__gt=campaign.last_subscriber_id)
+                    .order_by("id")
+                    .values_list("id", "email")[: chunk_size * workers]
+                )
+                if not wave:
+                    break
+                emails = [email for _, email in wave]
+                chunks = [emails[i:i + chunk_size] for i in range(0, len(emails), chunk_size)]
+                failed = [item for result in pool.map(sender.send, chunks) for item in result]
+
+                for email, exc in failed:
+                    print(f"Newsletter to {email} deferred to the outbox: {exc}")
+                    enqueue_email(
+                        email, subject, text, html.replace(NEWSLETTER_EMAIL_PLACEHOLDER, email),
+                        kind="NEWSLETTER",
+                    )
+
+                campaign.last_subscriber_id = wave[-1][0]
+                campaign.sent_count += len(wave) - len(failed)
+                campaign.deferred_count += len(failed)
+                campaign.locked_at = timezone.now()
+                campaign.save(update_fields=["last_subscriber_id", "sent_count", "deferred_count", "locked_at"])
+                if progress:
+                    progress(campaign)
+    finally:
+        sender.close()
+
+    campaign.status = "DONE"
+    campaign.finished_at = timezone.now()
+    campaign.locked_at = None
+    campaign.save(update_fields=["status", "finished_at", "locked_at"])
+    return campaign
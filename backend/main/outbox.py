@@ -0,0 +1,180 @@
+# hardware/backend/main/outbox.py
+"""
+Transactional e-mail outbox.
+
+Request paths (registration, verification resend, password reset, newsletter)
+never talk to SMTP: they call enqueue_email(), which only inserts an
+EmailOutbox row in the request's transaction and returns in milliseconds.
+`python manage.py send_email_outbox --loop` delivers the queue:
+
+- claim_batch() picks due rows with SELECT ... FOR UPDATE SKIP LOCKED and
+  flips them to SENDING in a short transaction, so several workers can run
+  side by side without sending the same message twice. The SMTP work
+  happens after that transaction has committed.
+- deliver() sends a batch over one SMTP connection. A failed message is
+  retried with exponential backoff (EMAIL_OUTBOX_RETRY_BASE doubled per
+  attempt, capped at EMAIL_OUTBOX_RETRY_MAX); after EMAIL_OUTBOX_MAX_ATTEMPTS
+  attempts, or when the server refuses every recipient permanently (5xx),
+  it is dead-lettered (status DEAD, last_error kept) until someone runs
+  `send_email_outbox --requeue-dead`.
+- A row stuck in SENDING longer than EMAIL_OUTBOX_LOCK_TIMEOUT (a worker
+  died mid-batch) is claimed again. Delivery is therefore at-least-once.
+"""
+
+import datetime
+import random
+import smtplib
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models_extra import EmailOutbox
+
+
+def enqueue_email(to_email, subject, body, html_body=None, kind="OTHER", from_email=None):
+    """Queue one message for the outbox worker; returns the EmailOutbox row"""
+    return EmailOutbox.objects.create(
+        kind=kind,
+        to_email=to_email,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+    )
+
+
+def retry_delay(attempts):
+    """Seconds to wait after the `attempts`-th failed attempt (with ~10% jitter)"""
+    delay = min(
+        settings.EMAIL_OUTBOX_RETRY_BASE * 2 ** max(attempts - 1, 0),
+        settings.EMAIL_OUTBOX_RETRY_MAX,
+    )
+    return delay * random.uniform(1.0, 1.1)
+
+
+def claim_batch(limit=None):
+    """Lock up to `limit` due messages, mark them SENDING and return them"""
+    limit = limit or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=settings.EMAIL_OUTBOX_LOCK_TIMEOUT)
+    with transaction.atomic():
+        ids = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="PENDING", next_attempt_at__lte=now)
+                | Q(status="SENDING", locked_at__lt=stale)
+            )
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        # Deneme sayısı claim anında artar: worker'ı çökerten mesaj da sonunda DEAD olur
+        EmailOutbox.objects.filter(id__in=ids).update(
+            status="SENDING", locked_at=now, attempts=F("attempts") + 1
+        )
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by("next_attempt_at", "id"))
+
+
+def _email_message(message, connection):
+    email = EmailMultiAlternatives(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=[message.to_email],
+        connection=connection,
+    )
+    if message.html_body:
+        email.attach_alternative(message.html_body, "text/html")
+    return email
+
+
+def _is_permanent(exc):
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return False
+
+
+def _mark_sent(message):
+    EmailOutbox.objects.filter(id=message.id).update(
+        status="SENT", sent_at=timezone.now(), locked_at=None, last_error=""
+    )
+
+
+def _mark_failed(message, exc):
+    """Schedule a retry, or dead-letter the message; returns True if it is now DEAD"""
+    dead = message.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS or _is_permanent(exc)
+    EmailOutbox.objects.filter(id=message.id).update(
+        status="DEAD" if dead else "PENDING",
+        locked_at=None,
+        next_attempt_at=timezone.now() + datetime.timedelta(seconds=retry_delay(message.attempts)),
+        last_error=f"{type(exc).__name__}: {exc}"[:2000],
+    )
+    return dead
+
+
+def deliver(messages):
+    """Send claimed messages over one connection; returns {'sent', 'retry', 'dead'} counts"""
+    stats = {"sent": 0, "retry": 0, "dead": 0}
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # Sunucuya hiç bağlanılamadı: tüm batch sonra tekrar denenir
+        print(f"Email outbox: SMTP connection failed: {exc}")
+        for message in messages:
+            stats["dead" if _mark_failed(message, exc) else "retry"] += 1
+        return stats
+
+    try:
+        for message in messages:
+            try:
+                if not connection.send_messages([_email_message(message, connection)]):
+                    raise smtplib.SMTPException("message was not accepted")
+            except Exception as exc:
+                print(f"Email outbox: sending #{message.id} to {message.to_email} failed: {exc}")
+                stats["dead" if _mark_failed(message, exc) else "retry"] += 1
+                # Hatadan sonra oturum bozulmuş olabilir; sıradaki mesaj temiz bağlantıyla gider
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    pass
+            else:
+                _mark_sent(message)
+                stats["sent"] += 1
+    finally:
+        connection.close()
+    return stats
+
+
+def process_outbox(batch_size=None, max_batches=None):
+    """Claim and deliver batches until nothing is due; returns the summed counts"""
+    totals = {"sent": 0, "retry": 0, "dead": 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        messages = claim_batch(batch_size)
+        if not messages:
+            break
+        for key, value in deliver(messages).items():
+            totals[key] += value
+        batches += 1
+    return totals
+
+
+def requeue_dead(ids=None):
+    """Give dead-lettered messages a fresh set of attempts; returns how many"""
+    queryset = EmailOutbox.objects.filter(status="DEAD")
+    if ids:
+        queryset = queryset.filter(id__in=ids)
+    return queryset.update(status="PENDING", attempts=0, next_attempt_at=timezone.now(), locked_at=None)
+
+
+def purge_sent(days):
+    """Delete SENT messages older than `days` days; returns how many"""
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    deleted, _ = EmailOutbox.objects.filter(status="SENT", sent_at__lt=cutoff).delete()
+    return deleted
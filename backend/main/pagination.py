@@ -0,0 +1,284 @@
+# hardware/backend/main/pagination.py
+"""
+Pagination for the list endpoints (REST_FRAMEWORK DEFAULT_PAGINATION_CLASS).
+
+ListPagination answers exactly like PageNumberPagination unless the client
+opts in to one of two modes:
+
+- `?cursor=` (empty for the first page) switches to keyset pagination. The
+  page is selected with a WHERE on the view's ordering columns plus `id` as
+  a tiebreaker, e.g. `(published_at, created_at, id) < (last row)`, so deep
+  pages cost the same as the first one. No COUNT(*) runs; the response is
+  `{next, previous, results}` and the cursors are opaque tokens. Plain
+  fields and annotations (search_rank) can be ordered on; orderings across
+  relations are rejected with 400.
+- `?count=approximate` replaces the exact COUNT(*) with the planner's
+  estimate: pg_class.reltuples for an unfiltered table, the EXPLAIN row
+  estimate otherwise. Small results (< APPROXIMATE_COUNT_EXACT_BELOW) are
+  still counted exactly. Meant for admin tables that show a total. In keyset
+  mode it adds a `count` key.
+
+NULLs follow PostgreSQL's default placement (last for ASC, first for
+DESC), which is what ORDER BY uses for these querysets as well.
+"""
+
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import uuid
+from collections import OrderedDict
+
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# Tahmin bunun altındaysa gerçek COUNT(*) zaten ucuz ve kesin
+APPROXIMATE_COUNT_EXACT_BELOW = 1000
+
+
+def approximate_count(queryset, exact_below=APPROXIMATE_COUNT_EXACT_BELOW):
+    """Row count of `queryset` from PostgreSQL statistics (exact when small)"""
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row else -1
+        else:
+            try:
+                sql, params = queryset.values("pk").query.sql_with_params()
+            except EmptyResultSet:
+                return 0
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+    # reltuples -1: tablo hiç ANALYZE edilmemiş
+    if estimate < exact_below:
+        return queryset.count()
+    return estimate
+
+
+class ApproximateCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        # DjangoJSONEncoder mikrosaniyeyi kırpar; keyset eşitliği için tam değer lazım
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, reverse=False):
+    payload = json.dumps({"v": [_encode_value(value) for value in values], "r": reverse})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """(values, reverse) from a cursor token; raises ValueError if it is malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        return list(payload["v"]), bool(payload["r"])
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, json.JSONDecodeError) as e:
+        raise ValueError(str(e))
+
+
+def keyset_ordering(queryset):
+    """[(name, descending), ...] of the queryset's ordering, ending with the pk tiebreaker"""
+    if queryset.query.order_by:
+        ordering = list(queryset.query.order_by)
+    elif queryset.query.default_ordering:
+        ordering = list(queryset.model._meta.ordering)
+    else:
+        ordering = []
+
+    opts = queryset.model._meta
+    pk_names = {"pk", opts.pk.name, opts.pk.attname}
+    columns = []
+    for item in ordering:
+        if not isinstance(item, str) or item == "?" or "__" in item:
+            raise ValidationError({"cursor": "Cursor pagination is not available for this ordering."})
+        name = item.lstrip("-")
+        if name not in queryset.query.annotations:
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                raise ValidationError({"cursor": f"Unknown ordering field: {name}"})
+            if field.is_relation:
+                raise ValidationError({"cursor": "Cursor pagination is not available for this ordering."})
+        columns.append(("pk" if name in pk_names else name, item.startswith("-")))
+        if name in pk_names:
+            # pk benzersiz; sonrasındaki alanlar sırayı değiştirmez
+            return columns
+    columns.append(("pk", columns[-1][1] if columns else False))
+    return columns
+
+
+def _column_field(queryset, name):
+    if name == "pk":
+        return queryset.model._meta.pk
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    return queryset.model._meta.get_field(name)
+
+
+def cursor_values(queryset, columns, values):
+    """
+    Cursor values converted with each column's to_python; raises ValueError,
+    TypeError or django's ValidationError for a tampered cursor
+    """
+    return [
+        None if value is None else _column_field(queryset, name).to_python(value)
+        for (name, _), value in zip(columns, values)
+    ]
+
+
+def _nullable(queryset, name):
+    if name == "pk":
+        return False
+    if name in queryset.query.annotations:
+        return True
+    return queryset.model._meta.get_field(name).null
+
+
+def _strictly_after(name, descending, value):
+    """Rows that sort strictly after `value` in this column (NULLS LAST for ASC, FIRST for DESC)"""
+    if value is None:
+        return Q(**{f"{name}__isnull": False}) if descending else Q(pk__in=[])
+    if descending:
+        return Q(**{f"{name}__lt": value})
+    return Q(**{f"{name}__gt": value}) | Q(**{f"{name}__isnull": True})
+
+
+def _equal(name, value):
+    return Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+
+
+def keyset_filter(queryset, columns, values):
+    """Q selecting the rows after the row whose ordering values are `values`"""
+    condition = None
+    for (name, descending), value in reversed(list(zip(columns, values))):
+        after = _strictly_after(name, descending, value)
+        condition = after if condition is None else after | (_equal(name, value) & condition)
+
+    # İlk sütun için açık bir aralık sınırı: planner composite indekste range scan yapabilsin
+    name, descending = columns[0]
+    value = values[0]
+    if value is not None and (descending or not _nullable(queryset, name)):
+        condition &= Q(**{f"{name}__{'lte' if descending else 'gte'}": value})
+    return condition
+
+
+class ListPagination(PageNumberPagination):
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    # Sadece cursor modunda; sayfa numaralı mod eskisi gibi sabit PAGE_SIZE kullanır
+    cursor_page_size_query_param = "page_size"
+    max_cursor_page_size = 100
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.approximate = request.query_params.get(self.count_query_param) == "approximate"
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            if self.approximate:
+                self.django_paginator_class = ApproximateCountPaginator
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_keyset(queryset, request)
+
+    def get_cursor_page_size(self, request):
+        try:
+            size = int(request.query_params[self.cursor_page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_cursor_page_size))
+
+    def paginate_keyset(self, queryset, request):
+        page_size = self.get_cursor_page_size(request)
+        columns = keyset_ordering(queryset)
+        self.count = approximate_count(queryset) if self.approximate else None
+
+        token = request.query_params.get(self.cursor_query_param)
+        values, reverse = None, False
+        if token:
+            try:
+                values, reverse = decode_cursor(token)
+                if len(values) != len(columns):
+                    raise ValueError("cursor does not match the ordering")
+                values = cursor_values(queryset, columns, values)
+            except (ValueError, TypeError, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        # Önceki sayfa: sıralamayı ters çevirip imleçten geriye doğru oku
+        walk = [(name, descending != reverse) for name, descending in columns]
+        queryset = queryset.order_by(*[f"{'-' if descending else ''}{name}" for name, descending in walk])
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(queryset, walk, values))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.columns = columns
+        self.next_values = self.previous_values = None
+        if rows:
+            if has_more if not reverse else values is not None:
+                self.next_values = self.row_values(rows[-1])
+            if has_more if reverse else values is not None:
+                self.previous_values = self.row_values(rows[0])
+        return rows
+
+    def row_values(self, row):
+        return [getattr(row, name) for name, _ in self.columns]
+
+    def cursor_link(self, values, reverse):
+        if values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(values, reverse))
+
+    def get_next_link(self):
+        if self.use_cursor:
+            return self.cursor_link(self.next_values, False)
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.use_cursor:
+            return self.cursor_link(self.previous_values, True)
+        return super().get_previous_link()
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        response = OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ])
+        if self.count is not None:
+            response["count"] = self.count
+            response.move_to_end("count", last=False)
+        return Response(response)
@@ -0,0 +1,132 @@
+# hardware/backend/main/partitions.py
+"""
+Monthly range partitions for the tracking tables (ArticleView, OutboundClick).
+
+Migration 0034 turns both tables into `PARTITION BY RANGE (created_at)`
+parents with one partition per local (TIME_ZONE) calendar month, named
+`<table>_pYYYY_MM`, plus a `<table>_default` partition that catches rows for
+months nobody created a partition for. Month-bounded queries (rollups,
+monthly analytics) are pruned to the matching partition by the planner.
+
+- create_tracking_partitions keeps TRACKING_PARTITION_MONTHS_AHEAD months
+  of partitions ready.
+- prune_tracking_partitions detaches partitions older than
+  TRACKING_RETENTION_MONTHS, exports each to `<name>.csv.gz` under
+  TRACKING_ARCHIVE_DIR and only then drops it. A partition whose export
+  failed stays detached and is retried on the next run.
+"""
+
+import datetime
+import gzip
+import os
+import re
+from pathlib import Path
+
+from django.utils import timezone
+
+
+PARTITIONED_TABLES = ("main_articleview", "main_outboundclick")
+
+
+def month_start(day):
+    return datetime.date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y_%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def partition_month(table, name):
+    """The month a partition name stands for, or None for other tables"""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})_(\d{{2}})", name)
+    return datetime.date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def month_bounds(month):
+    """[start, end) of a local calendar month as aware datetimes"""
+    tz = timezone.get_current_timezone()
+    start = datetime.datetime.combine(month, datetime.time.min, tzinfo=tz)
+    end = datetime.datetime.combine(add_months(month, 1), datetime.time.min, tzinfo=tz)
+    return start, end
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def create_month_partition(cursor, table, month):
+    """
+    Create and attach the partition for `month` unless it exists. Rows for
+    that month already sitting in the default partition are moved into it,
+    otherwise ATTACH would fail. Returns True when a partition was created.
+    """
+    name = partition_name(table, month)
+    if _table_exists(cursor, name):
+        return False
+    start, end = month_bounds(month)
+    cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)")
+    default = default_partition_name(table)
+    if _table_exists(cursor, default):
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default} WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [start, end],
+        )
+    # ATTACH parent'taki indeksleri (PK dahil) yeni partition'da da oluşturur
+    cursor.execute(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+    return True
+
+
+def attached_partitions(cursor, table):
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def detached_partitions(cursor, table):
+    """Monthly partitions of `table` that were detached but not dropped yet"""
+    cursor.execute(
+        "SELECT c.relname FROM pg_class c "
+        "WHERE c.relkind = 'r' AND c.relname LIKE %s "
+        "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid) "
+        "ORDER BY c.relname",
+        [f"{table}_p%"],
+    )
+    return [row[0] for row in cursor.fetchall() if partition_month(table, row[0])]
+
+
+def detach_partition(cursor, table, name):
+    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+
+
+def archive_partition(cursor, name, directory):
+    """Export a (detached) partition to <directory>/<name>.csv.gz; returns the path"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.csv.gz"
+    tmp = directory / f".{name}.csv.gz.tmp"
+    with gzip.open(tmp, "wb") as fh:
+        cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", fh)
+        fh.flush()
+    os.replace(tmp, path)
+    return path
+
+
+def drop_partition(cursor, name):
+    cursor.execute(f"DROP TABLE {name}")
@@ -0,0 +1,159 @@
+# hardware/backend/main/product_writes.py
+"""
+Set-based writes of a product's specs, tags and affiliate links.
+
+ProductSerializer.create/update used to delete every ProductSpec,
+ProductTag and AffiliateLink of the product and recreate them one INSERT
+(and one Tag lookup) at a time, which made a 60-spec product cost 130+
+queries per save. These helpers diff the submitted rows against the stored
+ones instead, so a save costs a handful of queries however big the spec
+sheet is:
+
+- specs are keyed by name (unique per product). Changed and new specs are
+  written with one INSERT ... ON CONFLICT (product, name) DO UPDATE; specs
+  that were not submitted are deleted. Unchanged specs are not touched.
+- tag ids are validated with one Tag.in_bulk(); unknown ids are skipped
+  as before. Only added and removed ProductTag rows are written.
+- affiliate links are matched on (merchant, url_template). Matched links
+  keep their id and only get their `active` flag updated.
+
+The serializer runs them inside the same atomic() block as the product
+save. bulk_create/bulk_update send no post_save, so the response cache
+generation of every model written here is bumped explicitly (deletes go
+through QuerySet.delete() and its signals).
+
+See `python manage.py benchmark_product_writes`.
+"""
+
+from django.utils import timezone
+
+from .models import Tag
+from .models_extra import AffiliateLink, ProductSpec, ProductTag
+from .response_cache import invalidate_model
+
+
+SPEC_FIELDS = ["value", "type", "unit", "is_visible", "sort_order"]
+
+
+def _as_bool(value, default=True):
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value.lower() == "true"
+    return bool(value)
+
+
+def _spec_rows(product, specs_data):
+    """ProductSpec instances for the submitted specs, keyed by name (last one wins)"""
+    rows = {}
+    for idx, spec_data in enumerate(specs_data):
+        name = spec_data.get("name", "")
+        rows[name] = ProductSpec(
+            product=product,
+            name=name,
+            value=str(spec_data.get("value", "")),
+            unit=spec_data.get("unit") or "",
+            type=spec_data.get("type", "TEXT"),
+            is_visible=_as_bool(spec_data.get("is_visible")),
+            sort_order=int(spec_data.get("sort_order", idx)),
+        )
+    return rows
+
+
+def sync_product_specs(product, specs_data, created=False):
+    """Make the product's ProductSpec rows match `specs_data`"""
+    rows = _spec_rows(product, specs_data)
+    existing = {} if created else {spec.name: spec for spec in ProductSpec.objects.filter(product=product)}
+
+    changed = [
+        row for name, row in rows.items()
+        if name not in existing
+        or any(getattr(existing[name], field) != getattr(row, field) for field in SPEC_FIELDS)
+    ]
+    removed = [name for name in existing if name not in rows]
+
+    if changed:
+        ProductSpec.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["product", "name"],
+            update_fields=SPEC_FIELDS + ["updated_at"],
+        )
+        invalidate_model(ProductSpec)
+    if removed:
+        ProductSpec.objects.filter(product=product, name__in=removed).delete()
+
+
+def _tag_ids(tags_data):
+    if isinstance(tags_data, str):
+        tags_data = [tag.strip() for tag in tags_data.split(",") if tag.strip()]
+    ids = []
+    invalid = []
+    for tag_id in tags_data or []:
+        try:
+            ids.append(int(tag_id))
+        except (TypeError, ValueError):
+            invalid.append(tag_id)
+    return ids, invalid
+
+
+def sync_product_tags(product, tags_data, created=False):
+    """Make the product's tags match the tag ids in `tags_data` (list or "1,2,3")"""
+    ids, unknown = _tag_ids(tags_data)
+    tags = Tag.objects.in_bulk(ids) if ids else {}
+    unknown += [tag_id for tag_id in ids if tag_id not in tags]
+    if unknown:
+        print(f"Tags not found: {unknown}")
+
+    existing = set() if created else set(
+        ProductTag.objects.filter(product=product).values_list("tag_id", flat=True)
+    )
+    added = [tag_id for tag_id in dict.fromkeys(ids) if tag_id in tags and tag_id not in existing]
+    removed = existing - set(tags)
+
+    if added:
+        ProductTag.objects.bulk_create(
+            [ProductTag(product=product, tag_id=tag_id) for tag_id in added], ignore_conflicts=True
+        )
+        invalidate_model(ProductTag)
+    if removed:
+        ProductTag.objects.filter(product=product, tag_id__in=removed).delete()
+
+
+def sync_affiliate_links(product, links_data, created=False):
+    """Make the product's AffiliateLink rows match `links_data`"""
+    existing = {}
+    if not created:
+        for link in AffiliateLink.objects.filter(product=product).order_by("id"):
+            existing.setdefault((link.merchant, link.url_template), []).append(link)
+
+    new_links = []
+    updated = []
+    for link_data in links_data or []:
+        merchant = link_data.get("merchant", "")
+        url_template = link_data.get("url_template", "")
+        active = _as_bool(link_data.get("active"))
+        matches = existing.get((merchant, url_template))
+        if matches:
+            link = matches.pop(0)
+            if link.active != active:
+                link.active = active
+                updated.append(link)
+        else:
+            new_links.append(
+                AffiliateLink(product=product, merchant=merchant, url_template=url_template, active=active)
+            )
+    removed = [link.pk for links in existing.values() for link in links]
+
+    if updated:
+        # bulk_update auto_now alanlarını doldurmaz
+        now = timezone.now()
+        for link in updated:
+            link.updated_at = now
+        AffiliateLink.objects.bulk_update(updated, ["active", "updated_at"])
+    if new_links:
+        AffiliateLink.objects.bulk_create(new_links)
+    if updated or new_links:
+        invalidate_model(AffiliateLink)
+    if removed:
+        AffiliateLink.objects.filter(pk__in=removed).delete()
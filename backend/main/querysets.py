@@ -0,0 +1,198 @@
+# hardware/backend/main/querysets.py
+"""
+Shared query plans for the serializers.
+
+Every serializer that renders nested collections reads them through the
+prefetch caches built here, so a page of N objects costs a fixed number of
+queries instead of N × (number of nested fields).
+
+The builders take an optional `selection` (fieldsets.FieldSelection from
+?fields=); columns, joins, prefetches and annotations that no selected
+field renders are left out.
+"""
+
+from django.db.models import Count, F, IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .fieldsets import child_selection, expands, wants
+from .models import Article, Product, User
+from .models_extra import ArticleTag, Comment, PriceHistory, ProductTag, UserReview
+
+
+# ProductSerializer.get_price_history ile aynı limit
+PRICE_HISTORY_LIMIT = 10
+
+
+def _join(prefix, lookup):
+    return f"{prefix}__{lookup}" if prefix else lookup
+
+
+def count_subquery(model, field, **filters):
+    """COUNT(*) of `model` rows pointing at the outer row, without a GROUP BY join"""
+    rows = (
+        model.objects.filter(**{field: OuterRef("pk")}, **filters)
+        .order_by()
+        .values(field)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+# Model alanı olmayan serializer alanlarının okuduğu kolonlar (yoksa satır başına lazy load olur)
+DERIVED_COLUMNS = {
+    User: {
+        "name": ("first_name", "last_name", "username"),
+        "avatar_variants": ("avatar",),
+    },
+    Product: {"cover_image_variants": ("cover_image",)},
+    Article: {
+        "hero_image_variants": ("hero_image",),
+        "og_image_variants": ("og_image",),
+    },
+}
+
+
+def selected_columns(model, selection, *required):
+    """
+    Concrete columns to load for `selection` (for .only()); None means all.
+    `required` names columns the builder needs for its joins.
+    """
+    if selection is None:
+        return None
+    columns = {model._meta.pk.name, *required}
+    columns.update(
+        field.name for field in model._meta.concrete_fields if selection.includes(field.name)
+    )
+    for name, sources in DERIVED_COLUMNS.get(model, {}).items():
+        if selection.includes(name):
+            columns.update(sources)
+    return columns
+
+
+def _load_columns(queryset, selection, *required):
+    columns = selected_columns(queryset.model, selection, *required)
+    if columns is None:
+        # search_vector sadece aramada kullanılır, her satırla taşınmasın
+        return queryset.defer("search_vector") if queryset.model in (Article, Product) else queryset
+    return queryset.only(*columns)
+
+
+def user_queryset(selection=None):
+    """Users annotated with the counts UserSerializer exposes"""
+    queryset = _load_columns(User.objects.all(), selection)
+    if wants(selection, "authored_articles_count"):
+        queryset = queryset.annotate(authored_articles_count=count_subquery(Article, "author"))
+    if wants(selection, "comments_count"):
+        queryset = queryset.annotate(comments_count=count_subquery(Comment, "user"))
+    return queryset
+
+
+def product_prefetches(prefix="", selection=None):
+    """
+    Prefetch lookups for everything ProductSerializer renders.
+
+    `prefix` is the relation path to the product (e.g. "product" for
+    favorites, "compare_extra__left_product" for compare articles).
+    """
+    lookups = []
+    if expands(selection, "category"):
+        # children ve sayılar category_tree'den gelir, sadece FK yüklenir
+        lookups.append(_join(prefix, "category"))
+    if wants(selection, "product_specs", "specs"):
+        lookups.append(_join(prefix, "product_specs"))
+    if wants(selection, "affiliate_links"):
+        lookups.append(_join(prefix, "affiliate_links"))
+    if wants(selection, "review_count", "average_rating", "rating_histogram"):
+        # Sayılar ve ortalama ProductRatingSummary'den; yorumların kendisi okunmaz
+        lookups.append(_join(prefix, "rating_summary"))
+    if wants(selection, "price_history"):
+        lookups.append(Prefetch(
+            _join(prefix, "price_history"),
+            queryset=PriceHistory.objects.order_by("-recorded_at")[
+                :PRICE_HISTORY_LIMIT
+            ],
+            to_attr="recent_price_history",
+        ))
+    if wants(selection, "product_tags"):
+        lookups.append(Prefetch(
+            _join(prefix, "product_tags"),
+            queryset=ProductTag.objects.select_related("tag"),
+        ))
+    return lookups
+
+
+def with_rating(queryset):
+    """Products annotated with `rating` and `rating_count` from their summary (0 without reviews)"""
+    return queryset.annotate(
+        rating=Coalesce(F("rating_summary__average"), Value(0.0)),
+        rating_count=Coalesce(F("rating_summary__approved_count"), Value(0)),
+    )
+
+
+def product_queryset(queryset=None, selection=None, reviews=False):
+    """
+    Products ready for ProductSerializer in a constant number of queries.
+
+    `reviews=True` also prefetches the approved reviews ProductDetailSerializer
+    renders as `user_reviews`.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+    lookups = product_prefetches(selection=selection)
+    if reviews and wants(selection, "user_reviews"):
+        lookups.append(Prefetch(
+            "user_reviews",
+            queryset=UserReview.objects.filter(status="APPROVED").only("id", "product_id", "rating", "created_at"),
+            to_attr="approved_reviews",
+        ))
+    return _load_columns(queryset, selection).prefetch_related(*lookups)
+
+
+COMPARE_PRODUCT_FIELDS = ("left_product", "right_product", "winner_product")
+
+
+def compare_extra_prefetches(prefix=""):
+    """Prefetch lookups for the three products ArticleSerializer.get_compare_extra renders"""
+    lookups = []
+    for field in COMPARE_PRODUCT_FIELDS:
+        lookups.extend(product_prefetches(_join(prefix, f"compare_extra__{field}")))
+    return lookups
+
+
+def with_compare_products(queryset):
+    """Article queryset with compare_extra and its products loaded up front"""
+    return queryset.select_related(
+        *(f"compare_extra__{field}" for field in COMPARE_PRODUCT_FIELDS)
+    ).prefetch_related(*compare_extra_prefetches())
+
+
+def article_queryset(queryset=None, selection=None):
+    """Articles ready for ArticleSerializer in a constant number of queries"""
+    if queryset is None:
+        queryset = Article.objects.all()
+    related = [
+        name for name, needed in (
+            ("category", expands(selection, "category")),
+            ("review_extra", wants(selection, "review_extra")),
+            ("best_list_extra", wants(selection, "best_list_extra")),
+        ) if needed
+    ]
+    queryset = _load_columns(queryset, selection, *(["category"] if "category" in related else []))
+    if related:
+        queryset = queryset.select_related(*related)
+    if wants(selection, "comment_count"):
+        queryset = queryset.annotate(
+            comment_count=count_subquery(Comment, "article", status="APPROVED")
+        )
+    if wants(selection, "compare_extra"):
+        queryset = with_compare_products(queryset)
+    if expands(selection, "author"):
+        queryset = queryset.prefetch_related(
+            Prefetch("author", queryset=user_queryset(child_selection(selection, "author")))
+        )
+    if wants(selection, "article_tags"):
+        queryset = queryset.prefetch_related(
+            Prefetch("article_tags", queryset=ArticleTag.objects.select_related("tag"))
+        )
+    return queryset
@@ -0,0 +1,100 @@
+# hardware/backend/main/ratings.py
+"""
+Product rating summaries (ProductRatingSummary).
+
+A product's approved review count, rating sum, average and 1-5 histogram
+live in one row, so ProductSerializer and the rating ordering never read
+the reviews themselves.
+
+- UserReview.save() locks the stored review row, saves, and moves the
+  review's contribution (product, rating while APPROVED) from the old state
+  to the new one in the same transaction. Creating, approving, rejecting,
+  re-rating or moving a review to another product are all the same delta.
+- Deleting a review (also through cascades and queryset.delete()) removes
+  its contribution from the post_delete signal.
+- Each delta is one UPDATE with F() expressions, so concurrent reviews of
+  the same product serialize on the summary row instead of overwriting
+  each other.
+
+QuerySet.update() on UserReview bypasses all of this; run
+`python manage.py rebuild_rating_summaries` after such bulk changes.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, FloatField, OuterRef, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from .models_extra import ProductRatingSummary, UserReview
+
+
+RATINGS = range(1, 6)
+
+
+def _shift(product_id, rating, delta):
+    if delta > 0:
+        # Yoksa satırı aç; silme sırasında açılmaz (ürünün kendisi siliniyor olabilir)
+        ProductRatingSummary.objects.bulk_create(
+            [ProductRatingSummary(product_id=product_id)], ignore_conflicts=True
+        )
+    # SET ifadeleri satırın eski değerlerini görür; ortalama yeni toplamlardan hesaplanır
+    count = F("approved_count") + delta
+    total = F("rating_sum") + rating * delta
+    ProductRatingSummary.objects.filter(product_id=product_id).update(
+        approved_count=count,
+        rating_sum=total,
+        average=Coalesce(Cast(total, FloatField()) / NullIf(count, 0), Value(0.0)),
+        updated_at=timezone.now(),
+        **{f"rating_{rating}": F(f"rating_{rating}") + delta},
+    )
+
+
+def apply_rating_change(previous, current):
+    """
+    Move a review's contribution from `previous` to `current`; both are
+    (product_id, rating) or None (not approved / not stored).
+    """
+    if previous == current:
+        return
+    with transaction.atomic():
+        if previous is not None:
+            _shift(*previous, -1)
+        if current is not None:
+            _shift(*current, 1)
+
+
+def rebuild_rating_summaries(product_ids=None):
+    """Recompute the summaries from the approved reviews; returns (rebuilt, removed)"""
+    reviews = UserReview.objects.filter(status="APPROVED")
+    summaries = ProductRatingSummary.objects.all()
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+        summaries = summaries.filter(product_id__in=product_ids)
+
+    rows = (
+        reviews.order_by()
+        .values("product_id")
+        .annotate(
+            approved_count=Count("id"),
+            rating_sum=Sum("rating"),
+            **{f"rating_{rating}": Count("id", filter=Q(rating=rating)) for rating in RATINGS},
+        )
+    )
+    rebuilt = [
+        ProductRatingSummary(average=row["rating_sum"] / row["approved_count"], **row)
+        for row in rows
+    ]
+    fields = ["approved_count", "rating_sum", "average", *(f"rating_{rating}" for rating in RATINGS)]
+
+    with transaction.atomic():
+        removed, _ = summaries.exclude(
+            Exists(UserReview.objects.filter(product=OuterRef("product"), status="APPROVED"))
+        ).delete()
+        ProductRatingSummary.objects.bulk_create(
+            rebuilt,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=[*fields, "updated_at"],
+        )
+    return len(rebuilt), removed
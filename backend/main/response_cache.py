@@ -0,0 +1,451 @@
+# hardware/backend/main/response_cache.py
+"""
+Response cache for the public read endpoints.
+
+Two tiers sit in front of the view:
+
+1. a per-process LRU (RESPONSE_CACHE_LOCAL_MAX_ENTRIES entries, kept for at
+   most RESPONSE_CACHE_LOCAL_TIMEOUT seconds), and
+2. the shared Django cache (RESPONSE_CACHE_ALIAS; a FileBasedCache under
+   var/cache by default, Redis or Memcached in production), kept for
+   RESPONSE_CACHE_TIMEOUT. It must be shared by every worker: the
+   generation counters below live there.
+
+The key is built from the path, the normalized query string (sorted, empty
+and tracking parameters dropped), the negotiated format and the generation
+counter of every model the view renders. Saving or deleting a row of a
+model in CACHED_MODELS bumps that model's counter (signals.py), so every
+entry built from the old data stops matching on all workers at once;
+nothing has to be deleted. The counters are read with one get_many() per
+request. Models outside CACHED_MODELS (page views, clicks, the outbox,
+rollups) are written often and rendered by no cached view, so their writes
+never touch the cache; cache_response() and the conditional GET helpers
+refuse models missing from the list.
+
+Only GET/HEAD responses with status 200 are stored. Editors and admins
+always bypass the cache, since they see drafts and need their edits right
+away. Other users get the same payload as anonymous visitors.
+
+Writes that skip signals (QuerySet.update, raw SQL) show up once the entries
+expire. Counts are kept per process (response_cache_stats()), and every
+response carries an `X-Cache` header (HIT-LOCAL, HIT, MISS, STALE,
+COALESCED or BYPASS).
+
+Misses are single-flight (RESPONSE_CACHE_SINGLE_FLIGHT). The first request
+for a key computes the response: it becomes leader through an in-process
+lock, and through cache.add() on a lock key so other processes see it too
+(RESPONSE_CACHE_SHARED_LOCK). Concurrent requests for the same key do not
+run the view:
+
+- if an older copy of the response exists (every stored response is also
+  kept for RESPONSE_CACHE_STALE_TIMEOUT under a key without the
+  generations), they get it immediately (stale-while-revalidate). A
+  recompute that does not return 200 (the row was deleted, an error)
+  deletes that copy;
+- otherwise they wait up to RESPONSE_CACHE_WAIT seconds for the leader's
+  result, and only compute it themselves if the leader fails or is too slow.
+
+A stampede on a hot article therefore costs one serialization instead of
+one per request (see `python manage.py benchmark_response_cache`).
+"""
+
+import functools
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+
+GENERATION_KEY_PREFIX = "main:response_cache:gen:"
+ENTRY_KEY_PREFIX = "main:response_cache:entry:"
+STALE_KEY_PREFIX = "main:response_cache:stale:"
+TOUCHED_KEY_PREFIX = "main:response_cache:touched:"
+# Cache boşaltılınca (sayaçlar sıfırlanınca) değişir; eski ETag'ler yeniden eşleşmesin
+EPOCH_KEY = "main:response_cache:epoch"
+LOCK_KEY_PREFIX = "main:response_cache:lock:"
+# Başka süreçteki lider beklenirken paylaşılan cache'e bakma aralığı
+# Önbelleğe alınan yanıtların ve conditional.py validator'larının dayandığı modeller.
+# Sadece bunların nesil sayacı artırılır; yeni bir görünüm başka bir modeli render
+# ediyorsa buraya eklenmeli (check_cached_models eksik modelde hata verir).
+CACHED_MODELS = frozenset({
+    "main.affiliatelink",
+    "main.article",
+    "main.articletag",
+    "main.bestlistextra",
+    "main.category",
+    "main.comment",
+    "main.compareextra",
+    "main.helpfulvote",
+    "main.pricehistory",
+    "main.product",
+    "main.productratingsummary",
+    "main.productspec",
+    "main.producttag",
+    "main.reviewextra",
+    "main.setting",
+    "main.tag",
+    "main.user",
+    "main.userreview",
+})
+
+POLL_INTERVAL = 0.05
+EDITOR_ROLES = ("ADMIN", "SUPER_ADMIN", "EDITOR")
+# Yanıtı değiştirmeyen parametreler; anahtarı bölmesinler
+IGNORED_QUERY_PARAMS = {"_", "fbclid", "gclid"}
+IGNORED_QUERY_PREFIXES = ("utm_",)
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def response_cache_stats():
+    """Hit/miss counters of this process plus the hit ratio"""
+    with _stats_lock:
+        stats = {
+            name: _stats[name]
+            for name in ("hit_local", "hit_shared", "stale", "coalesced", "miss", "bypass", "stored")
+        }
+    # stale/coalesced: kaçırılan ama görünümü çalıştırmadan cevaplanan istekler
+    served = stats["hit_local"] + stats["hit_shared"] + stats["stale"] + stats["coalesced"]
+    lookups = served + stats["miss"]
+    stats["hit_ratio"] = round(served / lookups, 3) if lookups else 0.0
+    stats["local_entries"] = len(_local)
+    return stats
+
+
+class LocalLRU:
+    """Small thread-safe LRU with per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = LocalLRU(settings.RESPONSE_CACHE_LOCAL_MAX_ENTRIES)
+
+
+def is_cached_model(model):
+    return model._meta.label_lower in CACHED_MODELS
+
+
+def check_cached_models(models):
+    """Raise ImproperlyConfigured for models whose writes would not invalidate the cache"""
+    missing = [model._meta.label_lower for model in models if not is_cached_model(model)]
+    if missing:
+        raise ImproperlyConfigured(f"Add {', '.join(missing)} to response_cache.CACHED_MODELS")
+    return models
+
+
+def shared_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def shared_cache_is_process_local():
+    """True for LocMemCache: other workers never see this process's generation bumps"""
+    return isinstance(shared_cache(), LocMemCache)
+
+
+def _generation_key(model):
+    return GENERATION_KEY_PREFIX + model._meta.label_lower
+
+
+def bump_generation(model):
+    """Invalidate every cached response that rendered rows of `model`"""
+    cache = shared_cache()
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+    # conditional.py Last-Modified'ı bununla hesaplar
+    cache.set(TOUCHED_KEY_PREFIX + model._meta.label_lower, time.time(), None)
+
+
+def invalidate_model(model):
+    bump_generation(model)
+    # Commit'ten önce hesaplanıp yeni nesille yazılmış yanıtlar da geçersiz kalsın
+    transaction.on_commit(lambda: bump_generation(model))
+
+
+def generations(models):
+    keys = [_generation_key(model) for model in models]
+    values = shared_cache().get_many(keys)
+    return [values.get(key, 0) for key in keys]
+
+
+def model_versions(models):
+    """
+    (epoch, generations, last change timestamp or None) of `models`, read in
+    one cache round trip
+    """
+    cache = shared_cache()
+    labels = [model._meta.label_lower for model in models]
+    keys = [GENERATION_KEY_PREFIX + label for label in labels] + [TOUCHED_KEY_PREFIX + label for label in labels]
+    values = cache.get_many(keys + [EPOCH_KEY])
+    epoch = values.get(EPOCH_KEY)
+    if epoch is None:
+        cache.add(EPOCH_KEY, uuid.uuid4().hex, None)
+        epoch = cache.get(EPOCH_KEY)
+    generations = [values.get(key, 0) for key in keys[:len(labels)]]
+    touched = [values[key] for key in keys[len(labels):] if key in values]
+    return epoch, generations, max(touched, default=None)
+
+
+def normalized_query(query_params):
+    items = []
+    for name in sorted(query_params):
+        if name in IGNORED_QUERY_PARAMS or name.startswith(IGNORED_QUERY_PREFIXES):
+            continue
+        for value in sorted(query_params.getlist(name)):
+            if value != "":
+                items.append(f"{name}={value}")
+    return "&".join(items)
+
+
+def _base_key(request):
+    """Hash of what the response depends on apart from the data (path, query, format)"""
+    renderer = getattr(request, "accepted_renderer", None)
+    parts = [request.path, normalized_query(request.query_params), getattr(renderer, "format", "") or ""]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def _entry_key(base_key, models):
+    versions = ",".join(
+        f"{model._meta.label_lower}={generation}" for model, generation in zip(models, generations(models))
+    )
+    return ENTRY_KEY_PREFIX + hashlib.sha1(f"{base_key}|{versions}".encode()).hexdigest()
+
+
+def response_cache_key(request, models):
+    return _entry_key(_base_key(request), models)
+
+
+def should_bypass(request):
+    if not settings.RESPONSE_CACHE_ENABLED or request.method not in ("GET", "HEAD"):
+        return True
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return False
+    return user.is_staff or getattr(user, "role", None) in EDITOR_ROLES
+
+
+def _plain(data):
+    # ReturnDict/ReturnList serializer'a (ve instance'lara) referans tutar; LRU'da taşınmasın
+    if isinstance(data, ReturnDict):
+        return dict(data)
+    if isinstance(data, ReturnList):
+        return list(data)
+    return data
+
+
+def _cached(data, status, state):
+    response = Response(data, status=status)
+    response["X-Cache"] = state
+    return response
+
+
+class _Flight:
+    """One in-process computation of a key; followers wait on `done`"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.entry = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _store(key, base_key, response):
+    if not (isinstance(response, Response) and response.status_code == 200 and not response.exception):
+        return None
+    entry = (_plain(response.data), response.status_code)
+    cache = shared_cache()
+    cache.set(key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+    cache.set(STALE_KEY_PREFIX + base_key, entry, settings.RESPONSE_CACHE_STALE_TIMEOUT)
+    _local.set(key, entry, settings.RESPONSE_CACHE_LOCAL_TIMEOUT)
+    _count("stored")
+    return entry
+
+
+def _compute(key, base_key, compute):
+    # Kayıt silindi (Http404) ya da hata: eski 200 gövdesi bayat kopya olarak verilmesin
+    try:
+        response = compute()
+    except Exception:
+        shared_cache().delete(STALE_KEY_PREFIX + base_key)
+        raise
+    response["X-Cache"] = "MISS"
+    entry = _store(key, base_key, response)
+    if entry is None:
+        shared_cache().delete(STALE_KEY_PREFIX + base_key)
+    return response, entry
+
+
+def _stale(base_key):
+    entry = shared_cache().get(STALE_KEY_PREFIX + base_key)
+    if entry is None or entry[1] != 200:
+        return None
+    _count("stale")
+    return entry
+
+
+def _wait_for_other_process(key, lock_key):
+    """Poll for the entry another process is computing; None if it gave up or took too long"""
+    cache = shared_cache()
+    deadline = time.monotonic() + settings.RESPONSE_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+        if cache.get(lock_key) is None:
+            # Lider bitirdi ama saklanacak yanıt çıkmadı (hata, 404...)
+            return None
+    return None
+
+
+def _lead(key, base_key, flight, compute):
+    lock_key = LOCK_KEY_PREFIX + key
+    holds_lock = False
+    try:
+        if settings.RESPONSE_CACHE_SHARED_LOCK:
+            holds_lock = shared_cache().add(lock_key, 1, settings.RESPONSE_CACHE_LOCK_TIMEOUT)
+            if not holds_lock:
+                # Başka bir süreç hesaplıyor
+                entry = _stale(base_key)
+                state = "STALE"
+                if entry is None:
+                    entry = _wait_for_other_process(key, lock_key)
+                    state = "COALESCED"
+                    if entry is not None:
+                        _count("coalesced")
+                if entry is not None:
+                    flight.entry = entry
+                    return _cached(*entry, state)
+        response, flight.entry = _compute(key, base_key, compute)
+        return response
+    finally:
+        if holds_lock:
+            shared_cache().delete(lock_key)
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def _follow(key, base_key, flight, compute):
+    entry = _stale(base_key)
+    if entry is not None:
+        return _cached(*entry, "STALE")
+    if flight.done.wait(settings.RESPONSE_CACHE_WAIT) and flight.entry is not None:
+        _count("coalesced")
+        return _cached(*flight.entry, "COALESCED")
+    # Lider hata verdi ya da çok yavaş: kendi yanıtımızı hesaplarız
+    return _compute(key, base_key, compute)[0]
+
+
+def cached_response(request, models, compute):
+    """
+    Serve `compute()`'s response from the cache when it is valid for the
+    current generations of `models`; store it otherwise.
+    """
+    if should_bypass(request):
+        _count("bypass")
+        response = compute()
+        response["X-Cache"] = "BYPASS"
+        return response
+
+    base_key = _base_key(request)
+    key = _entry_key(base_key, models)
+    entry = _local.get(key)
+    if entry is not None:
+        _count("hit_local")
+        return _cached(*entry, "HIT-LOCAL")
+
+    entry = shared_cache().get(key)
+    if entry is not None:
+        _count("hit_shared")
+        _local.set(key, entry, settings.RESPONSE_CACHE_LOCAL_TIMEOUT)
+        return _cached(*entry, "HIT")
+
+    _count("miss")
+    if not settings.RESPONSE_CACHE_SINGLE_FLIGHT:
+        return _compute(key, base_key, compute)[0]
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if leader:
+        return _lead(key, base_key, flight, compute)
+    return _follow(key, base_key, flight, compute)
+
+
+class CachedResponseMixin:
+    """GET of the view goes through cached_response(); `cache_models` lists what it renders"""
+
+    cache_models = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        check_cached_models(cls.cache_models)
+
+    def get(self, request, *args, **kwargs):
+        view_get = super().get
+        return cached_response(request, self.cache_models, lambda: view_get(request, *args, **kwargs))
+
+
+def cache_response(*models):
+    """Same as CachedResponseMixin for @api_view functions (put it below @api_view)"""
+    check_cached_models(models)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return cached_response(request, models, lambda: view(request, *args, **kwargs))
+
+        return wrapped
+
+    return decorator
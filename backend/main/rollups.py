@@ -0,0 +1,284 @@
+# hardware/backend/main/rollups.py
+"""
+Daily and monthly analytics rollups.
+
+The admin analytics endpoints read only these tables, never the raw
+ArticleView / OutboundClick rows, so their cost does not grow with traffic.
+`python manage.py rollup_analytics` maintains them:
+
+- rebuild_event_rollups() recomputes the event counts of a date range with
+  one grouped query per source. It is idempotent, so re-running the last
+  couple of days picks up late (buffered / spooled) events.
+- snapshot_content() stores today's content totals (articles, products,
+  comments, per-category and per-merchant counts).
+- refresh_monthly() sums the daily rows into MonthlyAnalytics.
+
+Days are local (TIME_ZONE) calendar days.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Article, Category, Product, User
+from .models_extra import (
+    AffiliateLink,
+    ArticleView,
+    Comment,
+    DailyArticleStats,
+    DailyCategoryStats,
+    DailyMerchantStats,
+    DailyProductStats,
+    DailySiteStats,
+    MonthlyAnalytics,
+    OutboundClick,
+    UserReview,
+)
+
+
+BATCH_SIZE = 1000
+
+# Admin analytics ekranındaki "son 30 gün" trafik sütunları
+ROLLUP_WINDOW_DAYS = 30
+
+
+def _bounds(start, end):
+    """Aware datetimes covering local days start..end (inclusive)"""
+    tz = timezone.get_current_timezone()
+    return (
+        datetime.datetime.combine(start, datetime.time.min, tzinfo=tz),
+        datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz),
+    )
+
+
+def _days(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def _grouped(queryset, start, end, *keys):
+    """{(day, *keys): count} for rows created in the range"""
+    start_dt, end_dt = _bounds(start, end)
+    rows = (
+        queryset.filter(created_at__gte=start_dt, created_at__lt=end_dt)
+        .annotate(day=TruncDate("created_at"))
+        .order_by()
+        .values("day", *keys)
+        .annotate(total=Count("id"))
+        .values_list("day", *keys, "total")
+    )
+    return {tuple(row[:-1]): row[-1] for row in rows}
+
+
+def _upsert(model, objs, unique_fields, update_fields):
+    model.objects.bulk_create(
+        objs,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=update_fields,
+    )
+
+
+def rebuild_event_rollups(start, end):
+    """Recompute views/clicks/new users for days start..end"""
+    views = _grouped(ArticleView.objects.all(), start, end, "article_id")
+    article_clicks = _grouped(OutboundClick.objects.filter(article__isnull=False), start, end, "article_id")
+    product_clicks = _grouped(OutboundClick.objects.filter(product__isnull=False), start, end, "product_id")
+    merchant_clicks = _grouped(OutboundClick.objects.all(), start, end, "merchant")
+    new_users = _grouped(User.objects.all(), start, end)
+
+    article_categories = dict(
+        Article.objects.filter(id__in={article_id for _, article_id in views})
+        .values_list("id", "category_id")
+    )
+    product_categories = dict(
+        Product.objects.filter(id__in={product_id for _, product_id in product_clicks})
+        .values_list("id", "category_id")
+    )
+    category_views = defaultdict(int)
+    for (day, article_id), total in views.items():
+        if article_categories.get(article_id):
+            category_views[day, article_categories[article_id]] += total
+    category_clicks = defaultdict(int)
+    for (day, product_id), total in product_clicks.items():
+        if product_categories.get(product_id):
+            category_clicks[day, product_categories[product_id]] += total
+
+    site_views = defaultdict(int)
+    for (day, _), total in views.items():
+        site_views[day] += total
+    site_clicks = defaultdict(int)
+    for (day, _), total in merchant_clicks.items():
+        site_clicks[day] += total
+
+    in_range = {"date__gte": start, "date__lte": end}
+    with transaction.atomic():
+        # Aralıktaki olay sayılarını sıfırla; yeniden hesaplananlar aşağıda yazılır
+        DailyArticleStats.objects.filter(**in_range).update(views=0, clicks=0)
+        DailyProductStats.objects.filter(**in_range).update(clicks=0)
+        DailyCategoryStats.objects.filter(**in_range).update(views=0, clicks=0)
+        DailyMerchantStats.objects.filter(**in_range).update(clicks=0)
+
+        _upsert(
+            DailyArticleStats,
+            [
+                DailyArticleStats(
+                    date=day, article_id=article_id,
+                    views=views.get((day, article_id), 0),
+                    clicks=article_clicks.get((day, article_id), 0),
+                )
+                for day, article_id in views.keys() | article_clicks.keys()
+            ],
+            ["date", "article"], ["views", "clicks"],
+        )
+        _upsert(
+            DailyProductStats,
+            [
+                DailyProductStats(date=day, product_id=product_id, clicks=total)
+                for (day, product_id), total in product_clicks.items()
+            ],
+            ["date", "product"], ["clicks"],
+        )
+        _upsert(
+            DailyCategoryStats,
+            [
+                DailyCategoryStats(
+                    date=day, category_id=category_id,
+                    views=category_views.get((day, category_id), 0),
+                    clicks=category_clicks.get((day, category_id), 0),
+                )
+                for day, category_id in category_views.keys() | category_clicks.keys()
+            ],
+            ["date", "category"], ["views", "clicks"],
+        )
+        _upsert(
+            DailyMerchantStats,
+            [
+                DailyMerchantStats(date=day, merchant=merchant, clicks=total)
+                for (day, merchant), total in merchant_clicks.items()
+            ],
+            ["date", "merchant"], ["clicks"],
+        )
+        _upsert(
+            DailySiteStats,
+            [
+                DailySiteStats(
+                    date=day,
+                    views=site_views.get(day, 0),
+                    clicks=site_clicks.get(day, 0),
+                    new_users=new_users.get((day,), 0),
+                )
+                for day in _days(start, end)
+            ],
+            ["date"], ["views", "clicks", "new_users"],
+        )
+
+        # Artık hiçbir şey saymayan satırları temizle
+        DailyArticleStats.objects.filter(**in_range, views=0, clicks=0).delete()
+        DailyProductStats.objects.filter(**in_range, clicks=0).delete()
+        DailyCategoryStats.objects.filter(
+            **in_range, views=0, clicks=0, published_articles=0, products=0
+        ).delete()
+        DailyMerchantStats.objects.filter(**in_range, clicks=0, links=0).delete()
+
+
+def snapshot_content(day=None):
+    """Store the current content totals as `day`'s snapshot (default: today)"""
+    day = day or timezone.localdate()
+    articles = Article.objects.aggregate(
+        total=Count("id"), published=Count("id", filter=Q(status="PUBLISHED"))
+    )
+    comments = Comment.objects.aggregate(
+        total=Count("id"), approved=Count("id", filter=Q(status="APPROVED"))
+    )
+    published_by_category = dict(
+        Article.objects.filter(status="PUBLISHED", category__isnull=False)
+        .order_by().values("category_id").annotate(total=Count("id"))
+        .values_list("category_id", "total")
+    )
+    products_by_category = dict(
+        Product.objects.filter(category__isnull=False)
+        .order_by().values("category_id").annotate(total=Count("id"))
+        .values_list("category_id", "total")
+    )
+    links_by_merchant = dict(
+        AffiliateLink.objects.order_by().values("merchant").annotate(total=Count("id"))
+        .values_list("merchant", "total")
+    )
+
+    with transaction.atomic():
+        _upsert(
+            DailySiteStats,
+            [DailySiteStats(
+                date=day,
+                total_articles=articles["total"],
+                published_articles=articles["published"],
+                total_products=Product.objects.count(),
+                total_users=User.objects.count(),
+                total_reviews=UserReview.objects.count(),
+                total_affiliate_links=AffiliateLink.objects.count(),
+                total_comments=comments["total"],
+                approved_comments=comments["approved"],
+                snapshot_at=timezone.now(),
+            )],
+            ["date"],
+            [
+                "total_articles", "published_articles", "total_products", "total_users",
+                "total_reviews", "total_affiliate_links", "total_comments",
+                "approved_comments", "snapshot_at",
+            ],
+        )
+
+        DailyCategoryStats.objects.filter(date=day).update(published_articles=0, products=0)
+        _upsert(
+            DailyCategoryStats,
+            [
+                DailyCategoryStats(
+                    date=day, category_id=category_id,
+                    published_articles=published_by_category.get(category_id, 0),
+                    products=products_by_category.get(category_id, 0),
+                )
+                for category_id in Category.objects.values_list("id", flat=True)
+            ],
+            ["date", "category"], ["published_articles", "products"],
+        )
+
+        DailyMerchantStats.objects.filter(date=day).update(links=0)
+        _upsert(
+            DailyMerchantStats,
+            [
+                DailyMerchantStats(date=day, merchant=merchant, links=total)
+                for merchant, total in links_by_merchant.items()
+            ],
+            ["date", "merchant"], ["links"],
+        )
+
+
+def refresh_monthly(start, end):
+    """Sum the daily site rows of every month touching start..end into MonthlyAnalytics"""
+    months = sorted({(day.year, day.month) for day in _days(start, end)})
+    for year, month in months:
+        totals = DailySiteStats.objects.filter(date__year=year, date__month=month).aggregate(
+            views=Sum("views"), clicks=Sum("clicks"), users=Sum("new_users")
+        )
+        MonthlyAnalytics.objects.update_or_create(
+            year=year,
+            month=month,
+            defaults={
+                "total_views": totals["views"] or 0,
+                "total_affiliate_clicks": totals["clicks"] or 0,
+                "total_users": totals["users"] or 0,
+            },
+        )
+
+
+def latest_site_stats():
+    """Most recent DailySiteStats row that has a content snapshot (or None)"""
+    return DailySiteStats.objects.filter(snapshot_at__isnull=False).order_by("-date").first()
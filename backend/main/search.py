@@ -0,0 +1,86 @@
+# hardware/backend/main/search.py
+"""
+PostgreSQL full-text search over the trigger-maintained `search_vector`
+columns of Article and Product (see migration 0030).
+
+Highlights are built by ts_headline with control-character delimiters and
+turned into HTML by highlight_html(): the source text is escaped first, so
+the `*_highlight` fields are safe HTML whose only markup is `<mark>`.
+"""
+
+import html
+import re
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F
+
+
+SEARCH_CONFIG = "turkish"
+
+# Metinde geçemeyecek ayraçlar; highlight_html() bunları <mark> yapar
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+HEADLINE_OPTIONS = {
+    "config": SEARCH_CONFIG,
+    "start_sel": HIGHLIGHT_START,
+    "stop_sel": HIGHLIGHT_STOP,
+    "max_words": 35,
+    "min_words": 15,
+    "max_fragments": 2,
+}
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_search_query(text):
+    """
+    Turn free user input into a prefix-matching tsquery ("asus rout" →
+    'asus':* & 'rout':*) so partially typed words still match.
+    Returns None when the input has no searchable terms.
+    """
+    terms = _TERM_RE.findall(text or "")
+    if not terms:
+        return None
+    raw = " & ".join(f"{term}:*" for term in terms)
+    return SearchQuery(raw, config=SEARCH_CONFIG, search_type="raw")
+
+
+def highlight_html(headline):
+    """Escaped ts_headline output with the matches wrapped in <mark>"""
+    if headline is None:
+        return None
+    return html.escape(headline).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
+
+def full_text_filter(queryset, query):
+    """Restrict to rows matching `query` (uses the GIN index) and annotate the rank"""
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F("search_vector"), query)
+    )
+
+
+def search_articles(queryset, query):
+    """Ranked articles with highlighted title and excerpt"""
+    return (
+        full_text_filter(queryset, query)
+        .annotate(
+            title_highlight=SearchHeadline("title", query, **HEADLINE_OPTIONS),
+            excerpt_highlight=SearchHeadline("excerpt", query, **HEADLINE_OPTIONS),
+        )
+        .order_by("-search_rank", "-published_at", "-id")
+    )
+
+
+def search_products(queryset, query):
+    """Ranked products with highlighted model name and description"""
+    return (
+        full_text_filter(queryset, query)
+        .annotate(
+            model_highlight=SearchHeadline("model", query, **HEADLINE_OPTIONS),
+            description_highlight=SearchHeadline(
+                "description", query, **HEADLINE_OPTIONS
+            ),
+        )
+        .order_by("-search_rank", "-created_at", "-id")
+    )
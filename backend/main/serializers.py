@@ -1,15 +1,24 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 
 from .models import *
 from .models_extra import PriceHistory
+from .category_tree import get_category_tree
+from .fieldsets import SparseFieldsetMixin
+from .images import ImageVariantsField
+from .product_writes import sync_affiliate_links, sync_product_specs, sync_product_tags
+from .slugs import save_with_slug, slugify_tr
+from .uploads import store_upload
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     name = serializers.SerializerMethodField()
     email_verified = serializers.SerializerMethodField()
     authored_articles_count = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
+    avatar_variants = ImageVariantsField("avatar")
 
     class Meta:
         model = User
@@ -22,6 +31,7 @@ class UserSerializer(serializers.ModelSerializer):
             "name",
             "role",
             "avatar",
+            "avatar_variants",
             "bio",
             "status",
             "email_verified",
@@ -48,9 +58,13 @@ class UserSerializer(serializers.ModelSerializer):
         return obj.email_verified is not None
 
     def get_authored_articles_count(self, obj):
+        if hasattr(obj, "authored_articles_count"):
+            return obj.authored_articles_count
         return obj.authored_articles.count()
 
     def get_comments_count(self, obj):
+        if hasattr(obj, "comments_count"):
+            return obj.comments_count
         return obj.comments.count()
 
 
@@ -123,10 +137,12 @@ class SettingSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
     article_count = serializers.SerializerMethodField()
     product_count = serializers.SerializerMethodField()
+    total_article_count = serializers.SerializerMethodField()
+    total_product_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Category
@@ -143,23 +159,40 @@ class CategorySerializer(serializers.ModelSerializer):
             "children",
             "article_count",
             "product_count",
+            "total_article_count",
+            "total_product_count",
             "created_at",
         ]
         read_only_fields = ["id", "created_at"]
 
+    # Ağaç ve sayılar category_tree'den okunur; her node için sorgu atılmaz
+    def _tree(self, obj):
+        tree = get_category_tree()
+        if obj.pk is not None and tree.get(obj.pk) is None:
+            # Başka bir worker'da yeni oluşturulmuş kategori: ağacı yenile
+            tree = get_category_tree(refresh=True)
+        return tree
+
     def get_children(self, obj):
-        if obj.children.exists():
-            return CategorySerializer(obj.children.all(), many=True).data
-        return []
+        children = self._tree(obj).get_children(obj.pk)
+        return CategorySerializer(children, many=True).data
 
     def get_article_count(self, obj):
-        return obj.article_set.count()
+        return self._tree(obj).article_counts.get(obj.pk, 0)
 
     def get_product_count(self, obj):
-        return obj.product_set.count()
+        return self._tree(obj).product_counts.get(obj.pk, 0)
+
+    def get_total_article_count(self, obj):
+        # alt kategorilerdeki makaleler dahil
+        return self._tree(obj).total_article_counts.get(obj.pk, 0)
 
+    def get_total_product_count(self, obj):
+        # alt kategorilerdeki ürünler dahil
+        return self._tree(obj).total_product_counts.get(obj.pk, 0)
 
-class TagSerializer(serializers.ModelSerializer):
+
+class TagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     article_count = serializers.SerializerMethodField()
     product_count = serializers.SerializerMethodField()
 
@@ -193,17 +226,18 @@ class ProductSpecSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # READ
     specs = serializers.SerializerMethodField()
     category = CategorySerializer(read_only=True)
     product_specs = ProductSpecSerializer(many=True, read_only=True)
     affiliate_links = serializers.SerializerMethodField()
-    user_reviews = serializers.SerializerMethodField()
     review_count = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
+    rating_histogram = serializers.SerializerMethodField()
     price_history = serializers.SerializerMethodField()
     product_tags = serializers.SerializerMethodField()
+    cover_image_variants = ImageVariantsField("cover_image")
 
     # WRITE
     category_id = serializers.IntegerField(
@@ -228,6 +262,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "price",
             "release_year",
             "cover_image",
+            "cover_image_variants",
             "cover_image_file",
             "description",
             "category",
@@ -235,9 +270,9 @@ class ProductSerializer(serializers.ModelSerializer):
             "product_specs",
             "affiliate_links",
             "affiliate_links_data",
-            "user_reviews",
             "review_count",
             "average_rating",
+            "rating_histogram",
             "price_history",
             "product_tags",
             "tags",
@@ -261,6 +296,7 @@ class ProductSerializer(serializers.ModelSerializer):
         return value
 
     # -------- CREATE --------
+    @transaction.atomic
     def create(self, validated_data):
         print(f"Django Serializer - Received validated_data: {validated_data}")
         print(
@@ -348,60 +384,27 @@ class ProductSerializer(serializers.ModelSerializer):
         print(f"Django Serializer - Final tags_data: {tags_data}")
 
         # Create the product (Product.specs JSON alanını kullanmıyoruz, ProductSpec tablosunu kullanıyoruz)
-        product = super().create(validated_data)
+        if validated_data.get("slug"):
+            product = super().create(validated_data)
+        else:
+            # slug gönderilmediyse brand + model'den
+            create = super().create
+            product = save_with_slug(
+                Product,
+                slugify_tr(f"{validated_data.get('brand', '')} {validated_data.get('model', '')}"),
+                lambda slug: create({**validated_data, "slug": slug}),
+            )
         print(
             f"Django Serializer - Created product: {product.id}, "
             f"specs: {product.specs}, price: {product.price}"
         )
 
-        # Create ProductSpec objects if specs provided
+        # Specs, tag'ler ve affiliate linkler toplu yazılır (product_writes.py)
         if specs_data:
-            from .models_extra import ProductSpec as ProductSpecModel
-
-            ProductSpecModel.objects.filter(product=product).delete()
-            for idx, spec_data in enumerate(specs_data):
-                ProductSpecModel.objects.create(
-                    product=product,
-                    name=spec_data.get("name", ""),
-                    value=str(spec_data.get("value", "")),
-                    unit=spec_data.get("unit") or "",
-                    type=spec_data.get("type", "TEXT"),
-                    is_visible=bool(
-                        str(spec_data.get("is_visible", "true")).lower() == "true"
-                    ),
-                    sort_order=int(spec_data.get("sort_order", idx)),
-                )
-            print(
-                f"Django Serializer - Created {len(specs_data)} ProductSpec objects"
-            )
-
-        # Create product tags
+            sync_product_specs(product, specs_data, created=True)
         if tags_data:
-            from .models_extra import ProductTag
-            from .models import Tag
-
-            for tag_id in tags_data:
-                try:
-                    tag = Tag.objects.get(id=tag_id)
-                    ProductTag.objects.create(product=product, tag=tag)
-                    print(f"Django Serializer - Created product tag: {tag.name}")
-                except Tag.DoesNotExist:
-                    print(f"Django Serializer - Tag with id {tag_id} not found")
-
-        # Create affiliate links
-        from .models import AffiliateLink
-
-        for link_data in affiliate_links_data:
-            active_value = link_data.get("active", True)
-            if isinstance(active_value, str):
-                active_value = active_value.lower() == "true"
-
-            AffiliateLink.objects.create(
-                product=product,
-                merchant=link_data.get("merchant", ""),
-                url_template=link_data.get("url_template", ""),
-                active=active_value,
-            )
+            sync_product_tags(product, tags_data, created=True)
+        sync_affiliate_links(product, affiliate_links_data, created=True)
 
         print(
             f"Django Serializer - Final product specs: "
@@ -410,6 +413,7 @@ class ProductSerializer(serializers.ModelSerializer):
         return product
 
     # -------- UPDATE --------
+    @transaction.atomic
     def update(self, instance, validated_data):
         # Modelde olmayan is_active'i yut
         validated_data.pop("is_active", None)
@@ -426,19 +430,12 @@ class ProductSerializer(serializers.ModelSerializer):
         if category_id:
             validated_data["category_id"] = category_id
 
-        # slug güncellemesi için unique base
+        # slug gönderildiyse brand + model'den unique olarak yeniden üretilir (slugs.py)
+        slug_base = None
         if "slug" in validated_data and validated_data["slug"]:
-            brand = validated_data.get("brand", instance.brand).lower()
-            model = validated_data.get("model", instance.model).lower()
-            base_slug = f"{brand}-{model}".replace(" ", "-")
-
-            slug = base_slug
-            counter = 1
-            while Product.objects.filter(slug=slug).exclude(id=instance.id).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-
-            validated_data["slug"] = slug
+            brand = validated_data.get("brand", instance.brand)
+            model = validated_data.get("model", instance.model)
+            slug_base = slugify_tr(f"{brand} {model}")
 
         affiliate_links_data = validated_data.pop("affiliate_links_data", [])
 
@@ -449,13 +446,14 @@ class ProductSerializer(serializers.ModelSerializer):
         # initial_data'dan QueryDict formatını parse et
         if hasattr(self, "initial_data") and "affiliate_links_data" in self.initial_data:
             raw_data = self.initial_data
-            affiliate_links_data = []
             affiliate_keys = [
                 key for key in raw_data.keys()
                 if key.startswith("affiliate_links_data[")
             ]
 
+            # JSON body'deki liste validated_data'dan gelir; sadece FormData anahtarları yeniden parse edilir
             if affiliate_keys:
+                affiliate_links_data = []
                 links_by_index = {}
                 import re
 
@@ -548,79 +546,31 @@ class ProductSerializer(serializers.ModelSerializer):
             validated_data["cover_image"] = None
 
         # Ürünü güncelle
-        product = super().update(instance, validated_data)
+        if slug_base is not None:
+            update = super().update
+            product = save_with_slug(
+                Product,
+                slug_base,
+                lambda slug: update(instance, {**validated_data, "slug": slug}),
+                exclude_pk=instance.id,
+            )
+        else:
+            product = super().update(instance, validated_data)
 
-        # Specs güncelle
+        # Specs, tag'ler ve affiliate linkler: mevcut satırlarla fark alınıp toplu yazılır
         if specs_data is not None:
-            from .models_extra import ProductSpec as ProductSpecModel
-
-            ProductSpecModel.objects.filter(product=product).delete()
-            for idx, spec_data in enumerate(specs_data):
-                is_visible = spec_data.get("is_visible", True)
-                if isinstance(is_visible, str):
-                    is_visible = is_visible.lower() == "true"
-
-                ProductSpecModel.objects.create(
-                    product=product,
-                    name=spec_data.get("name", ""),
-                    value=str(spec_data.get("value", "")),
-                    unit=spec_data.get("unit") or "",
-                    type=spec_data.get("type", "TEXT"),
-                    is_visible=is_visible,
-                    sort_order=int(spec_data.get("sort_order", idx)),
-                )
-
-        # Tags güncelle
-        from .models_extra import ProductTag
-        from .models import Tag
+            sync_product_specs(product, specs_data)
 
         if tags_data is not None:
-            ProductTag.objects.filter(product=product).delete()
-
-            if isinstance(tags_data, str) and tags_data.strip() == "":
-                print("Empty tags string received, all tags cleared")
-            elif isinstance(tags_data, list) and len(tags_data) == 0:
-                print("Empty tags list received, all tags cleared")
-            else:
-                if isinstance(tags_data, str):
-                    tags_data = [
-                        tag.strip() for tag in tags_data.split(",") if tag.strip()
-                    ]
-
-                for tag_id in tags_data:
-                    try:
-                        tag = Tag.objects.get(id=int(tag_id))
-                        ProductTag.objects.create(product=product, tag=tag)
-                        print(f"Created product tag: {tag.name} (ID: {tag_id})")
-                    except (Tag.DoesNotExist, ValueError) as e:
-                        print(f"Tag with id {tag_id} not found: {e}")
+            sync_product_tags(product, tags_data)
         else:
             print("No tags data provided, keeping existing tags")
 
-        # Affiliate links güncelle
-        from .models import AffiliateLink
-
         if affiliate_links_data is not None:
-            AffiliateLink.objects.filter(product=product).delete()
-
-            if isinstance(affiliate_links_data, str) and affiliate_links_data == "[]":
-                pass
-            elif isinstance(affiliate_links_data, list) and len(
-                affiliate_links_data
-            ) == 0:
-                pass
-            else:
-                for link_data in affiliate_links_data:
-                    active_value = link_data.get("active", True)
-                    if isinstance(active_value, str):
-                        active_value = active_value.lower() == "true"
-
-                    AffiliateLink.objects.create(
-                        product=product,
-                        merchant=link_data.get("merchant", ""),
-                        url_template=link_data.get("url_template", ""),
-                        active=active_value,
-                    )
+            if isinstance(affiliate_links_data, str):
+                # "[]" dışında string beklenmez
+                affiliate_links_data = []
+            sync_affiliate_links(product, affiliate_links_data)
 
         return product
 
@@ -638,37 +588,41 @@ class ProductSerializer(serializers.ModelSerializer):
 
     def get_specs(self, obj):
         # specs field'ını product_specs'ten doldur (basitleştirilmiş görünüm)
-        if hasattr(obj, "product_specs") and obj.product_specs.exists():
-            return [
-                {
-                    "name": spec.name,
-                    "value": spec.value,
-                    "unit": spec.unit or "",
-                    "type": spec.type,
-                    "is_visible": spec.is_visible,
-                    "sort_order": spec.sort_order,
-                }
-                for spec in obj.product_specs.all()
-            ]
-        return []
+        return [
+            {
+                "name": spec.name,
+                "value": spec.value,
+                "unit": spec.unit or "",
+                "type": spec.type,
+                "is_visible": spec.is_visible,
+                "sort_order": spec.sort_order,
+            }
+            for spec in obj.product_specs.all()
+        ]
 
-    def get_user_reviews(self, obj):
-        reviews = obj.user_reviews.filter(status="APPROVED")
-        return [{"rating": review.rating} for review in reviews]
+    def _rating_summary(self, obj):
+        # querysets.product_prefetches → rating_summary; değerlendirmesi olmayan üründe satır yok
+        try:
+            return obj.rating_summary
+        except ObjectDoesNotExist:
+            return None
 
     def get_review_count(self, obj):
-        return obj.user_reviews.filter(status="APPROVED").count()
+        summary = self._rating_summary(obj)
+        return summary.approved_count if summary else 0
 
     def get_average_rating(self, obj):
-        reviews = obj.user_reviews.filter(status="APPROVED")
-        if reviews.exists():
-            return round(
-                sum(review.rating for review in reviews) / reviews.count(), 1
-            )
-        return 0
+        summary = self._rating_summary(obj)
+        return round(summary.average, 1) if summary else 0
+
+    def get_rating_histogram(self, obj):
+        summary = self._rating_summary(obj)
+        return {str(rating): summary.histogram[rating] if summary else 0 for rating in range(1, 6)}
 
     def get_price_history(self, obj):
-        price_histories = obj.price_history.all()[:10]
+        price_histories = getattr(obj, "recent_price_history", None)
+        if price_histories is None:
+            price_histories = obj.price_history.all()[:10]
         return PriceHistorySerializer(price_histories, many=True).data
 
     def get_product_tags(self, obj):
@@ -683,7 +637,23 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(ProductSerializer):
+    """ProductSerializer plus the approved reviews themselves (detail views only)"""
+
+    user_reviews = serializers.SerializerMethodField()
+
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ["user_reviews"]
+
+    def get_user_reviews(self, obj):
+        # querysets.product_queryset(reviews=True) → approved_reviews (en yeni önce)
+        reviews = getattr(obj, "approved_reviews", None)
+        if reviews is None:
+            reviews = obj.user_reviews.filter(status="APPROVED")
+        return [{"id": review.id, "rating": review.rating} for review in reviews]
+
+
+class ArticleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # 🔹 Slug artık sadece read-only (otomatik üretilecek)
     slug = serializers.SlugField(read_only=True)
 
@@ -701,6 +671,8 @@ class ArticleSerializer(serializers.ModelSerializer):
     comment_count = serializers.SerializerMethodField()
 
     hero_image_file = serializers.ImageField(write_only=True, required=False)
+    hero_image_variants = ImageVariantsField("hero_image")
+    og_image_variants = ImageVariantsField("og_image")
 
     # 🔹 write-only tags alanı (modelde yok)
     tags = serializers.CharField(write_only=True, required=False, allow_blank=True)
@@ -721,8 +693,10 @@ class ArticleSerializer(serializers.ModelSerializer):
             "category_id",
             "published_at",
             "hero_image",
+            "hero_image_variants",
             "hero_image_file",
             "og_image",
+            "og_image_variants",
             "meta_title",
             "meta_description",
             "view_count",
@@ -745,28 +719,23 @@ class ArticleSerializer(serializers.ModelSerializer):
 
         hero_image_file = validated_data.pop("hero_image_file", None)
         if hero_image_file:
-            validated_data["hero_image"] = hero_image_file
-
-        # slug otomatik üret
-        if "title" in validated_data:
-            import re
-
-            base_slug = re.sub(
-                r"[^a-z0-9\s-]", "", validated_data["title"].lower()
-            )
-            base_slug = re.sub(r"\s+", "-", base_slug).strip("-")
-            slug = base_slug
-            counter = 1
-            while Article.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            validated_data["slug"] = slug
+            # İçerik adresli yol; aynı görsel ikinci kez yazılmaz (uploads.py)
+            validated_data["hero_image"] = store_upload(hero_image_file, "articles")
 
         # modelde olmayan alanları at
         validated_data.pop("review_extra_data", None)
         validated_data.pop("best_list_extra_data", None)
         validated_data.pop("tags", None)
 
+        # slug otomatik üret (slugs.py)
+        if "title" in validated_data:
+            create = super().create
+            return save_with_slug(
+                Article,
+                slugify_tr(validated_data["title"]),
+                lambda slug: create({**validated_data, "slug": slug}),
+            )
+
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
@@ -776,30 +745,26 @@ class ArticleSerializer(serializers.ModelSerializer):
 
         hero_image_file = validated_data.pop("hero_image_file", None)
         if hero_image_file:
-            validated_data["hero_image"] = hero_image_file
+            # İçerik adresli yol; aynı görsel ikinci kez yazılmaz (uploads.py)
+            validated_data["hero_image"] = store_upload(hero_image_file, "articles")
 
         if "hero_image" in validated_data and validated_data["hero_image"] == "":
             validated_data["hero_image"] = None
 
-        # title değiştiyse slug yeniden üret
-        if "title" in validated_data and validated_data["title"] != instance.title:
-            import re
-
-            base_slug = re.sub(
-                r"[^a-z0-9\s-]", "", validated_data["title"].lower()
-            )
-            base_slug = re.sub(r"\s+", "-", base_slug).strip("-")
-            slug = base_slug
-            counter = 1
-            while Article.objects.filter(slug=slug).exclude(id=instance.id).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            validated_data["slug"] = slug
-
         validated_data.pop("review_extra_data", None)
         validated_data.pop("best_list_extra_data", None)
         validated_data.pop("tags", None)
 
+        # title değiştiyse slug yeniden üret
+        if "title" in validated_data and validated_data["title"] != instance.title:
+            update = super().update
+            return save_with_slug(
+                Article,
+                slugify_tr(validated_data["title"]),
+                lambda slug: update(instance, {**validated_data, "slug": slug}),
+                exclude_pk=instance.id,
+            )
+
         return super().update(instance, validated_data)
 
     def get_article_tags(self, obj):
@@ -857,10 +822,12 @@ class ArticleSerializer(serializers.ModelSerializer):
         return None
 
     def get_comment_count(self, obj):
+        if hasattr(obj, "comment_count"):
+            return obj.comment_count
         return obj.comments.filter(status="APPROVED").count()
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author_name = serializers.CharField(required=False)
     author_email = serializers.EmailField(required=False)
     content = serializers.CharField(required=False)
@@ -875,7 +842,7 @@ class CommentSerializer(serializers.ModelSerializer):
         required=False,
     )
     replies = serializers.SerializerMethodField()
-    helpful_count = serializers.SerializerMethodField()
+    helpful_count = serializers.IntegerField(read_only=True)
     article_title = serializers.SerializerMethodField()
 
     class Meta:
@@ -911,9 +878,6 @@ class CommentSerializer(serializers.ModelSerializer):
             return CommentSerializer(replies, many=True).data
         return []
 
-    def get_helpful_count(self, obj):
-        return obj.helpful_votes.count()
-
     def get_article_title(self, obj):
         return obj.article.title if obj.article else "Bilinmeyen Makale"
 
@@ -931,7 +895,51 @@ class CommentSerializer(serializers.ModelSerializer):
         return None
 
 
-class UserReviewSerializer(serializers.ModelSerializer):
+class CommentAuthorSerializer(serializers.ModelSerializer):
+    """Public author card of a comment (no e-mail, no counts)"""
+
+    name = serializers.SerializerMethodField()
+    avatar_variants = ImageVariantsField("avatar")
+
+    class Meta:
+        model = User
+        fields = ["id", "username", "name", "role", "avatar", "avatar_variants"]
+
+    def get_name(self, obj):
+        if obj.first_name and obj.last_name:
+            return f"{obj.first_name} {obj.last_name}"
+        if obj.first_name:
+            return obj.first_name
+        return obj.username
+
+
+class CommentTreeSerializer(serializers.ModelSerializer):
+    """A comment from comment_tree.load_comment_tree, with its replies nested (no queries)"""
+
+    user = CommentAuthorSerializer(read_only=True)
+    helpful_count = serializers.IntegerField(read_only=True)
+    depth = serializers.IntegerField(read_only=True)
+    replies = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Comment
+        fields = [
+            "id",
+            "parent",
+            "user",
+            "author_name",
+            "content",
+            "helpful_count",
+            "depth",
+            "replies",
+            "created_at",
+        ]
+
+    def get_replies(self, obj):
+        return CommentTreeSerializer(obj.tree_replies, many=True, context=self.context).data
+
+
+class UserReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     pros = serializers.JSONField(required=False)
     cons = serializers.JSONField(required=False)
     user = UserSerializer(read_only=True)
@@ -0,0 +1,132 @@
+# hardware/backend/main/settings_snapshot.py
+"""
+In-process snapshot of the Setting table.
+
+Settings are read on every anonymous page load (public_settings_view), by
+Setting.get_setting and for every e-mail sent with the SMTP settings stored
+in the database (load_email_config_from_db). The table is tiny, so every
+worker loads it once with one query and answers those reads with a dict
+lookup.
+
+Values are normalized when they are written (Setting.save): the admin form
+used to post `{'value': ...}` objects that ended up stored as their string
+representation, and they are unwrapped before saving. Rows written before
+that are unwrapped once when the snapshot loads.
+
+Saving or deleting a Setting (settings_bulk_view POST, the admin,
+Setting.set_setting) bumps a version key in the Django cache (see
+signals.py). Workers check that key at most every
+SETTINGS_SNAPSHOT_CHECK_INTERVAL seconds and reload when it changed. The
+TTL is a safety net for writes that bypass signals.
+"""
+
+import ast
+import json
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models_extra import Setting
+
+
+SETTINGS_VERSION_KEY = "main:settings:version"
+SETTINGS_SNAPSHOT_TTL = 300  # seconds
+SETTINGS_SNAPSHOT_CHECK_INTERVAL = 1.0  # seconds
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def normalize_setting_value(value):
+    """Unwrap values stored as "{'value': ...}" / '{"value": ...}' strings"""
+    while True:
+        if isinstance(value, dict) and "value" in value:
+            value = value["value"]
+            continue
+        if not (isinstance(value, str) and value.startswith(("{'value':", '{"value":'))):
+            break
+        try:
+            nested = json.loads(value.replace("'", '"'))
+        except ValueError:
+            try:
+                nested = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                break
+        if not isinstance(nested, dict) or "value" not in nested:
+            break
+        value = nested
+    if isinstance(value, bool):
+        # Varsayılan ayarlar gibi "true"/"false"
+        return "true" if value else "false"
+    if value is None:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+class SettingsSnapshot:
+    """All settings keyed by key, plus the grouped form settings_bulk_view returns"""
+
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.checked_at = self.loaded_at
+        self.stale = False
+
+        self.settings = {}
+        self.grouped = {}
+        # Meta.ordering (category, key)
+        for setting in Setting.objects.all():
+            setting.value = normalize_setting_value(setting.value)
+            self.settings[setting.key] = setting
+            self.grouped.setdefault(setting.category, {})[setting.key] = {
+                "value": setting.value,
+                "description": setting.description,
+                "is_file": setting.is_file,
+            }
+
+    def get(self, key, default=None):
+        setting = self.settings.get(key)
+        return setting.value if setting is not None else default
+
+    def is_fresh(self):
+        if self.stale:
+            return False
+        now = time.monotonic()
+        if now - self.checked_at >= SETTINGS_SNAPSHOT_CHECK_INTERVAL:
+            self.checked_at = now
+            # Bir kez bayatlayan snapshot (kilit altındaki ikinci kontrol dahil) bayat kalır
+            self.stale = self.version != _current_version()
+        if now - self.loaded_at >= SETTINGS_SNAPSHOT_TTL:
+            self.stale = True
+        return not self.stale
+
+
+def _current_version():
+    return cache.get(SETTINGS_VERSION_KEY, 0)
+
+
+def get_settings_snapshot(refresh=False):
+    """Return the process-wide SettingsSnapshot, reloading it when stale"""
+    global _snapshot
+    snapshot = _snapshot
+    if not refresh and snapshot is not None and snapshot.is_fresh():
+        return snapshot
+    with _lock:
+        if refresh or _snapshot is None or not _snapshot.is_fresh():
+            _snapshot = SettingsSnapshot(_current_version())
+        return _snapshot
+
+
+def get_setting(key, default=None):
+    return get_settings_snapshot().get(key, default)
+
+
+def invalidate_settings():
+    """Drop this worker's snapshot and tell the other workers to reload theirs"""
+    global _snapshot
+    _snapshot = None
+    try:
+        cache.incr(SETTINGS_VERSION_KEY)
+    except ValueError:
+        cache.set(SETTINGS_VERSION_KEY, 1, None)
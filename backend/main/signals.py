@@ -0,0 +1,88 @@
+# hardware/backend/main/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .category_tree import invalidate_category_tree
+from .images import queue_variants
+from .models import Article, Category, Product, User
+from .models_extra import HelpfulVote, ReviewHelpfulVote, Setting, UserReview
+from .response_cache import invalidate_model, is_cached_model
+from .settings_snapshot import invalidate_settings
+
+
+# Article ilk kez (ya da yeniden) PUBLISHED olduğunda, transaction commit edildikten
+# sonra gönderilir. kwargs: article
+article_published = Signal()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_category_tree_on_change(sender, **kwargs):
+    invalidate_category_tree()
+    # Commit'ten önce yeniden kuran worker'lar eski veriyi görmüş olabilir
+    transaction.on_commit(invalidate_category_tree)
+
+
+@receiver(post_save, sender=Setting)
+@receiver(post_delete, sender=Setting)
+def invalidate_settings_on_change(sender, **kwargs):
+    invalidate_settings()
+    # Commit'ten önce yeniden yükleyen worker'lar eski değeri görmüş olabilir
+    transaction.on_commit(invalidate_settings)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_response_cache_generation(sender, **kwargs):
+    # Sadece önbelleğe alınan yanıtların render ettiği modeller; ArticleView, OutboundClick,
+    # EmailOutbox gibi sık yazılan tablolar cache'e hiç dokunmaz
+    if is_cached_model(sender):
+        invalidate_model(sender)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=User)
+def queue_image_variants(sender, instance, update_fields=None, **kwargs):
+    # Görsel değiştiyse boyutlandırılmış kopyalar commit'ten sonra üretilir (bkz. images.py)
+    queue_variants(instance, update_fields)
+
+
+@receiver(article_published, sender=Article)
+def queue_newsletter_on_publish(sender, article, **kwargs):
+    from .newsletter import queue_newsletter
+
+    # Sadece kampanya kaydı açılır; gönderimi send_newsletters yapar
+    queue_newsletter(article)
+
+
+@receiver(post_delete, sender=UserReview)
+def remove_review_rating(sender, instance, **kwargs):
+    from .ratings import apply_rating_change
+
+    # Ekleme/onay/red UserReview.save içinde işlenir; silme burada
+    apply_rating_change(instance.rating_contribution(), None)
+
+
+@receiver(post_save, sender=HelpfulVote)
+@receiver(post_save, sender=ReviewHelpfulVote)
+def count_helpful_vote(sender, instance, created, **kwargs):
+    from .helpful_votes import adjust_counter
+
+    # Toggle uç noktası ham SQL kullanır (sinyal yok); admin/shell kayıtları burada sayılır
+    if created:
+        adjust_counter(instance, 1)
+
+
+@receiver(post_delete, sender=HelpfulVote)
+@receiver(post_delete, sender=ReviewHelpfulVote)
+def uncount_helpful_vote(sender, instance, **kwargs):
+    from .helpful_votes import adjust_counter
+
+    adjust_counter(instance, -1)
@@ -0,0 +1,94 @@
+# hardware/backend/main/slugs.py
+"""
+Unique slugs for Article and Product.
+
+The serializers used to probe `filter(slug=...).exists()` with an
+increasing counter, one query per collision: a popular title ("En İyi
+Router") or a product family ("tp-link-archer-...") took dozens of round
+trips, and two concurrent creates could still pick the same slug.
+
+- slugify_tr() transliterates Turkish letters (ı, ş, ğ, ü, ö, ç and their
+  capitals) before dropping everything outside [a-z0-9 -], so
+  "Şarj Göstergesi" becomes "sarj-gostergesi" rather than "arj-gstergesi".
+- allocate_slug() reads every taken `base`/`base-N` slug with one prefix
+  query (served by the slug column's varchar_pattern_ops index) and picks
+  the first free one in memory: `base`, then `base-1`, `base-2`, ...
+- save_with_slug() saves in a savepoint and, when a concurrent request took
+  the slug first (IntegrityError on the slug's unique constraint),
+  allocates again and retries.
+"""
+
+import re
+import unicodedata
+
+from django.db import IntegrityError, transaction
+
+
+SLUG_SAVE_ATTEMPTS = 5
+
+TURKISH_TRANSLITERATION = str.maketrans({
+    "ı": "i", "İ": "i",
+    "ş": "s", "Ş": "s",
+    "ğ": "g", "Ğ": "g",
+    "ü": "u", "Ü": "u",
+    "ö": "o", "Ö": "o",
+    "ç": "c", "Ç": "c",
+})
+
+
+def slugify_tr(text):
+    """Slug of `text` with Turkish letters transliterated"""
+    text = str(text).translate(TURKISH_TRANSLITERATION)
+    # Diğer aksanlı harfler (é, â, ...) için
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    slug = re.sub(r"[^a-z0-9\s-]", "", text.lower())
+    return re.sub(r"\s+", "-", slug).strip("-")
+
+
+def _max_length(model):
+    return model._meta.get_field("slug").max_length
+
+
+def _suffixed(base, counter, max_length):
+    suffix = f"-{counter}"
+    return base[:max_length - len(suffix)].rstrip("-") + suffix
+
+
+def allocate_slug(model, base, exclude_pk=None):
+    """First free slug among `base`, `base-1`, `base-2`, ... (one query)"""
+    max_length = _max_length(model)
+    # Başlık tamamen sembolse boş slug yerine model adı
+    base = base[:max_length].rstrip("-") or model._meta.model_name
+    # Uzun başlıklarda sonek tabanı kısaltır; kısaltılmış adaylar da aynı sorguda gelsin
+    queryset = model._default_manager.filter(slug__startswith=base[:max_length - 6])
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    taken = set(queryset.values_list("slug", flat=True))
+
+    if base not in taken:
+        return base
+    counter = 1
+    while _suffixed(base, counter, max_length) in taken:
+        counter += 1
+    return _suffixed(base, counter, max_length)
+
+
+def _is_slug_conflict(error, model):
+    diag = getattr(error.__cause__, "diag", None)
+    constraint = getattr(diag, "constraint_name", None) or str(error)
+    return model._meta.db_table in constraint and "slug" in constraint
+
+
+def save_with_slug(model, base, save, exclude_pk=None):
+    """
+    Call save(slug) with a freshly allocated slug; retried when a concurrent
+    save took the slug between the lookup and the INSERT/UPDATE
+    """
+    for attempt in range(SLUG_SAVE_ATTEMPTS):
+        slug = allocate_slug(model, base, exclude_pk)
+        try:
+            with transaction.atomic():
+                return save(slug)
+        except IntegrityError as e:
+            if attempt == SLUG_SAVE_ATTEMPTS - 1 or not _is_slug_conflict(e, model):
+                raise
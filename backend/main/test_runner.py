@@ -0,0 +1,39 @@
+# hardware/backend/main/test_runner.py
+"""
+Test runner that keeps the suite out of the working tree.
+
+The shared cache (FileBasedCache), the tracking spool/archive and the media
+root default to directories under BASE_DIR. The runner points all of them at
+a temporary directory for the whole run, so `manage.py test` leaves nothing
+behind and starts from an empty cache every time.
+"""
+
+import os
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class IsolatedTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._directory = tempfile.TemporaryDirectory(prefix="hardware-tests-")
+        root = self._directory.name
+        self._override = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": os.path.join(root, "cache"),
+                }
+            },
+            TRACKING_SPOOL_DIR=os.path.join(root, "tracking-spool"),
+            TRACKING_ARCHIVE_DIR=os.path.join(root, "tracking-archive"),
+            MEDIA_ROOT=os.path.join(root, "media"),
+        )
+        self._override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._override.disable()
+        self._directory.cleanup()
+        super().teardown_test_environment(**kwargs)
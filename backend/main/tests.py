@@ -1,3 +1,1786 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from datetime import timedelta
 
-# Create your tests here.
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import parse_http_date_safe
+from rest_framework.test import APIClient
+
+from .models import *
+from .models_extra import (
+    AffiliateLink,
+    ArticleView,
+    DailyArticleStats,
+    EmailOutbox,
+    NewsletterCampaign,
+    NewsletterSubscription,
+    MonthlyAnalytics,
+    OutboundClick,
+    ProductRatingSummary,
+    ReviewHelpfulVote,
+)
+from . import (
+    category_tree,
+    comment_tree,
+    helpful_votes,
+    images,
+    newsletter,
+    outbox,
+    pagination,
+    partitions,
+    ratings,
+    response_cache,
+    settings_snapshot,
+    slugs,
+    tracking,
+    uploads,
+)
+from .serializers import ArticleSerializer, ProductSerializer
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+
+try:
+    from aiosmtpd.controller import Controller as SMTPController
+except ImportError:  # aiosmtpd sadece testlerde, yerel SMTP sunucusu olarak kullanılır
+    SMTPController = None
+
+
+class ProductListQueryCountTests(TestCase):
+    """ProductSerializer must not fan out per product on list endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="reviewer", email="reviewer@example.com", password="secret123"
+        )
+        self.parent = Category.objects.create(slug="networking", name="Networking")
+        self.tag = Tag.objects.create(slug="wifi-6", name="Wi-Fi 6", type="FEATURE")
+
+    def create_products(self, count, offset=0):
+        for i in range(offset, offset + count):
+            category = Category.objects.create(
+                slug=f"router-{i}", name=f"Router {i}", parent=self.parent
+            )
+            product = Product.objects.create(
+                brand="TP-Link", model=f"Archer {i}", slug=f"archer-{i}", category=category
+            )
+            ProductSpec.objects.create(product=product, name="Wi-Fi", value="6")
+            ProductSpec.objects.create(product=product, name="Ports", value="4")
+            AffiliateLink.objects.create(
+                product=product, merchant="Amazon", url_template="https://example.com/"
+            )
+            PriceHistory.objects.create(product=product, price=100, source="Amazon")
+            ProductTag.objects.create(product=product, tag=self.tag)
+            UserReview.objects.create(
+                product=product, user=self.user, rating=4, content="ok", status="APPROVED"
+            )
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_query_count_is_flat_as_page_grows(self):
+        self.create_products(2)
+        small_count, _ = self.count_list_queries()
+
+        self.create_products(15, offset=2)
+        large_count, data = self.count_list_queries()
+
+        self.assertEqual(data["count"], 17)
+        self.assertEqual(small_count, large_count)
+
+    def test_nested_payload_is_unchanged(self):
+        self.create_products(1)
+        _, data = self.count_list_queries()
+        product = data["results"][0]
+
+        self.assertEqual(len(product["specs"]), 2)
+        self.assertEqual(len(product["affiliate_links"]), 1)
+        self.assertEqual(len(product["price_history"]), 1)
+        self.assertEqual(product["product_tags"][0]["slug"], "wifi-6")
+        self.assertEqual(product["review_count"], 1)
+        self.assertEqual(product["average_rating"], 4.0)
+        self.assertEqual(product["category"]["slug"], "router-0")
+        self.assertEqual(product["category"]["product_count"], 1)
+
+
+class ArticleListQueryCountTests(TestCase):
+    """ArticleSerializer must not fan out per article on list endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create_user(
+            username="editor", email="editor@example.com", password="secret123"
+        )
+        self.category = Category.objects.create(slug="router", name="Router")
+        self.tag = Tag.objects.create(slug="wifi-6", name="Wi-Fi 6", type="FEATURE")
+        self.left = Product.objects.create(brand="Asus", model="RT-AX58U", slug="rt-ax58u")
+        self.right = Product.objects.create(brand="TP-Link", model="AX73", slug="ax73")
+
+    def create_articles(self, count, offset=0):
+        for i in range(offset, offset + count):
+            article_type = ("REVIEW", "BEST_LIST", "COMPARE", "NEWS")[i % 4]
+            article = Article.objects.create(
+                type=article_type,
+                slug=f"article-{i}",
+                title=f"Article {i}",
+                status="PUBLISHED",
+                author=self.author,
+                category=self.category,
+            )
+            ArticleTag.objects.create(article=article, tag=self.tag)
+            Comment.objects.create(article=article, content="hi", status="APPROVED")
+            if article_type == "REVIEW":
+                ReviewExtra.objects.create(article=article, total_score=8.5)
+            elif article_type == "BEST_LIST":
+                BestListExtra.objects.create(article=article, items=[])
+            elif article_type == "COMPARE":
+                CompareExtra.objects.create(
+                    article=article, left_product=self.left, right_product=self.right
+                )
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/articles/")
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_query_count_is_flat_as_page_grows(self):
+        self.create_articles(4)
+        small_count, _ = self.count_list_queries()
+
+        self.create_articles(16, offset=4)
+        large_count, data = self.count_list_queries()
+
+        self.assertEqual(data["count"], 20)
+        self.assertEqual(small_count, large_count)
+
+    def test_nested_payload_is_unchanged(self):
+        self.create_articles(4)
+        _, data = self.count_list_queries()
+        by_type = {article["type"]: article for article in data["results"]}
+
+        self.assertEqual(by_type["REVIEW"]["review_extra"]["total_score"], 8.5)
+        self.assertIsNone(by_type["REVIEW"]["compare_extra"])
+        self.assertEqual(by_type["BEST_LIST"]["best_list_extra"]["items"], [])
+        self.assertEqual(
+            by_type["COMPARE"]["compare_extra"]["left_product"]["slug"], "rt-ax58u"
+        )
+        self.assertEqual(by_type["NEWS"]["comment_count"], 1)
+        self.assertEqual(by_type["NEWS"]["author"]["authored_articles_count"], 4)
+        self.assertEqual(by_type["NEWS"]["article_tags"][0]["slug"], "wifi-6")
+
+
+class CategoryTreeTests(TestCase):
+    """Category tree comes from one cached load with rolled-up counts"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.networking = Category.objects.create(slug="networking", name="Networking")
+        self.router = Category.objects.create(
+            slug="router", name="Router", parent=self.networking
+        )
+        self.mesh = Category.objects.create(slug="mesh", name="Mesh", parent=self.router)
+        Product.objects.create(brand="Asus", model="ZenWiFi", slug="zenwifi", category=self.mesh)
+        Product.objects.create(brand="Asus", model="RT-AX58U", slug="rt-ax58u", category=self.router)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_category_list_uses_cached_tree(self):
+        self.client.get("/api/categories/")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/categories/")
+        # COUNT + sayfa sorgusu; ağaç bellekte
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        by_slug = {category["slug"]: category for category in response.data["results"]}
+        networking = by_slug["networking"]
+        self.assertEqual(networking["product_count"], 0)
+        self.assertEqual(networking["total_product_count"], 2)
+        self.assertEqual(networking["children"][0]["slug"], "router")
+        self.assertEqual(networking["children"][0]["children"][0]["slug"], "mesh")
+
+    def test_version_key_is_checked_at_most_once_per_interval(self):
+        category_tree.get_category_tree(refresh=True)
+        with mock.patch.object(category_tree.cache, "get", wraps=category_tree.cache.get) as cache_get:
+            for _ in range(50):
+                category_tree.get_category_tree()
+        self.assertEqual(cache_get.call_count, 0)
+
+        # Başka bir worker'ın artırdığı sürüm aralık dolunca görülür
+        tree = category_tree.get_category_tree()
+        category_tree.cache.set(category_tree.CATEGORY_TREE_VERSION_KEY, tree.version + 1, None)
+        tree.checked_at -= category_tree.CATEGORY_TREE_CHECK_INTERVAL
+        self.assertIsNot(category_tree.get_category_tree(), tree)
+
+    def test_tree_is_invalidated_on_product_save(self):
+        self.client.get("/api/categories/")
+        Product.objects.create(brand="TP-Link", model="Deco", slug="deco", category=self.mesh)
+        response = self.client.get("/api/categories/")
+        by_slug = {category["slug"]: category for category in response.data["results"]}
+        self.assertEqual(by_slug["mesh"]["product_count"], 2)
+        self.assertEqual(by_slug["networking"]["total_product_count"], 3)
+
+    def test_product_category_slug_filter_includes_subcategories(self):
+        response = self.client.get("/api/products/", {"category_slug": "networking"})
+        self.assertEqual(response.data["count"], 2)
+        response = self.client.get("/api/products/", {"category_slug": "mesh"})
+        self.assertEqual(response.data["count"], 1)
+
+
+class FullTextSearchTests(TestCase):
+    """/api/search/ and ?search= go through the tsvector index"""
+
+    def setUp(self):
+        self.client = APIClient()
+        author = User.objects.create_user(
+            username="editor", email="editor@example.com", password="secret123"
+        )
+        Article.objects.create(
+            slug="mesh-rehberi",
+            title="Mesh sistemleri rehberi",
+            content="<p>Evde kapsama için en iyi router modelleri</p>",
+            status="PUBLISHED",
+            author=author,
+        )
+        Article.objects.create(
+            slug="router-incelemesi",
+            title="Router incelemesi",
+            excerpt="Yeni nesil routerlar",
+            status="PUBLISHED",
+            author=author,
+        )
+        Product.objects.create(brand="Asus", model="RT-AX58U", slug="rt-ax58u")
+
+    def test_search_ranks_title_matches_first_and_highlights(self):
+        response = self.client.get("/api/search/", {"q": "router"})
+        articles = response.data["data"]["articles"]
+
+        self.assertEqual([a["slug"] for a in articles], ["router-incelemesi", "mesh-rehberi"])
+        self.assertIn("<mark>", articles[0]["title_highlight"])
+        self.assertEqual(response.data["pagination"]["articles_total"], 2)
+
+    def test_highlights_escape_the_source_text(self):
+        Article.objects.filter(slug="router-incelemesi").update(excerpt='Router & modem <img src=x onerror="alert(1)">')
+        response = self.client.get("/api/search/", {"q": "router"})
+        article = next(a for a in response.data["data"]["articles"] if a["slug"] == "router-incelemesi")
+        highlight = article["excerpt_highlight"]
+        self.assertIn("<mark>Router</mark> &amp; modem", highlight)
+        self.assertNotIn("<img", highlight)
+        self.assertNotIn("\x02", highlight)
+
+    def test_search_matches_word_prefixes(self):
+        response = self.client.get("/api/search/", {"q": "asu"})
+        self.assertEqual(response.data["data"]["products"][0]["slug"], "rt-ax58u")
+
+    def test_search_vector_follows_updates(self):
+        article = Article.objects.get(slug="mesh-rehberi")
+        article.title = "Modem karşılaştırması"
+        article.save()
+
+        response = self.client.get("/api/articles/", {"search": "modem"})
+        self.assertEqual([a["slug"] for a in response.data["results"]], ["mesh-rehberi"])
+
+
+class UserSearchTests(TestCase):
+    """User search filters privacy in SQL and stops at 10 rows"""
+
+    def setUp(self):
+        self.client = APIClient()
+        for i in range(12):
+            User.objects.create_user(
+                username=f"ahmet{i}", email=f"ahmet{i}@example.com", password="secret123",
+                first_name="Ahmet",
+            )
+        self.hidden = User.objects.create_user(
+            username="ahmet-gizli", email="gizli@example.com", password="secret123",
+            first_name="Ahmet", privacy_settings={"profile_visible": False},
+        )
+
+    def search_users(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/search/", {"q": "ahmet"})
+        user_queries = [q["sql"] for q in ctx.captured_queries if '"main_user"' in q["sql"]]
+        return response.data["data"]["users"], user_queries
+
+    def test_hidden_profiles_are_filtered_in_one_limited_query(self):
+        users, user_queries = self.search_users()
+
+        self.assertEqual(len(users), 10)
+        self.assertNotIn(self.hidden.id, [user["id"] for user in users])
+        self.assertEqual(len(user_queries), 1)
+        self.assertIn("LIMIT 10", user_queries[0])
+
+    def test_settings_update_syncs_profile_visible(self):
+        self.client.force_authenticate(self.hidden)
+        self.client.put(f"/api/users/{self.hidden.id}/settings/", {"profile_visible": "true"})
+        self.hidden.refresh_from_db()
+        self.assertTrue(self.hidden.profile_visible)
+
+        User.objects.filter(username__startswith="ahmet").exclude(pk=self.hidden.pk).delete()
+        users, _ = self.search_users()
+        self.assertEqual([user["id"] for user in users], [self.hidden.id])
+
+
+@override_settings(TRACKING_BUFFER_ENABLED=True)
+class TrackingBufferTests(TestCase):
+    """Tracking endpoints queue events and write them in batches"""
+
+    def setUp(self):
+        self.client = APIClient()
+        author = User.objects.create_user(
+            username="editor", email="editor@example.com", password="secret123"
+        )
+        self.article = Article.objects.create(slug="haber", title="Haber", author=author)
+        self.buffer = tracking.EventBuffer(
+            tracking.DatabaseSpool(), max_events=3, flush_size=100, flush_interval=60
+        )
+        self.view_counts = tracking.ViewCountDeltas(flush_interval=60)
+        tracking._buffer = self.buffer
+        tracking._view_counts = self.view_counts
+        self.addCleanup(setattr, tracking, "_buffer", None)
+        self.addCleanup(setattr, tracking, "_view_counts", None)
+        self.addCleanup(self.view_counts.close)
+        self.addCleanup(self.buffer.close)
+
+    def test_events_are_written_on_flush(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post("/api/article-view/", {"article": self.article.id}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.client.post("/api/outbound/", {"merchant": "Amazon", "article": self.article.id}, format="json")
+        self.client.post("/api/article-view/", {"article": 999999}, format="json")
+
+        self.buffer.flush()
+        self.assertEqual(ArticleView.objects.filter(article=self.article).count(), 1)
+        self.assertEqual(OutboundClick.objects.count(), 1)
+        stats = self.buffer.snapshot()
+        self.assertEqual((stats["written"], stats["rejected"], stats["pending"]), (2, 1, 0))
+
+    def test_full_buffer_applies_backpressure(self):
+        for _ in range(3):
+            self.client.post("/api/article-view/", {"article": self.article.id}, format="json")
+        response = self.client.post("/api/article-view/", {"article": self.article.id}, format="json")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(self.buffer.snapshot()["dropped"], 1)
+
+    def test_invalid_payload_is_rejected_up_front(self):
+        response = self.client.post("/api/outbound/", {"product": "x"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"merchant", "product"})
+
+    def test_directory_spool_round_trip(self):
+        with tempfile.TemporaryDirectory() as path:
+            spool = tracking.DirectorySpool(path)
+            self.buffer.spool = spool
+            self.client.post("/api/article-view/", {"article": self.article.id}, format="json")
+            self.buffer.flush()
+            self.assertEqual(ArticleView.objects.count(), 0)
+
+            self.assertEqual(spool.drain(), (1, 1))
+        view = ArticleView.objects.get()
+        self.assertEqual(view.ip_address, "127.0.0.1")
+
+    def test_view_count_is_applied_in_batches(self):
+        for _ in range(3):
+            self.client.post("/api/article-view/", {"article": self.article.id}, format="json")
+        self.buffer.flush()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.view_count, 0)
+        self.assertEqual(self.view_counts.pending(), {self.article.id: 3})
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.view_counts.flush(), 3)
+        updates = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.view_count, 3)
+
+    def test_reconcile_rebuilds_view_count(self):
+        ArticleView.objects.create(article=self.article, ip_address="127.0.0.1")
+        Article.objects.filter(pk=self.article.pk).update(view_count=42)
+
+        call_command("reconcile_view_counts", stdout=io.StringIO())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.view_count, 1)
+
+
+class AnalyticsRollupTests(TestCase):
+    """Admin analytics endpoints read the rollup tables maintained by rollup_analytics"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="secret123", role="ADMIN"
+        )
+        self.client.force_authenticate(self.admin)
+        self.category = Category.objects.create(slug="router", name="Router")
+        self.article = Article.objects.create(
+            slug="inceleme", title="İnceleme", status="PUBLISHED",
+            author=self.admin, category=self.category,
+        )
+        self.product = Product.objects.create(
+            brand="Asus", model="RT-AX58U", slug="rt-ax58u", category=self.category
+        )
+        AffiliateLink.objects.create(product=self.product, merchant="Amazon", url_template="https://example.com/")
+        for _ in range(3):
+            ArticleView.objects.create(article=self.article, ip_address="127.0.0.1")
+        OutboundClick.objects.create(product=self.product, article=self.article, merchant="Amazon", ip="127.0.0.1")
+
+    def rollup(self):
+        call_command("rollup_analytics", stdout=io.StringIO())
+
+    def test_analytics_view_reads_rollups(self):
+        self.rollup()
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/analytics/").data["data"]
+        self.assertFalse(any('"main_articleview"' in q["sql"] for q in ctx.captured_queries))
+
+        self.assertEqual(data["overview"]["totalArticles"], 1)
+        self.assertEqual(data["overview"]["totalAffiliateLinks"], 1)
+        router = data["topCategories"][0]
+        self.assertEqual((router["articlesCount"], router["productsCount"]), (1, 1))
+        self.assertEqual((router["viewsLast30Days"], router["clicksLast30Days"]), (3, 1))
+        self.assertEqual(data["affiliateMerchants"], [{"name": "Amazon", "linksCount": 1, "clicksLast30Days": 1}])
+        self.assertEqual(data["topArticles"][0]["viewsLast30Days"], 3)
+        self.assertEqual(data["topProducts"][0]["clicksLast30Days"], 1)
+
+    def test_rerun_picks_up_late_events_without_double_counting(self):
+        self.rollup()
+        ArticleView.objects.create(article=self.article, ip_address="127.0.0.1")
+        self.rollup()
+
+        today = timezone.localdate()
+        self.assertEqual(DailyArticleStats.objects.get(date=today, article=self.article).views, 4)
+        response = self.client.get("/api/analytics/monthly/", {"year": today.year, "month": today.month})
+        self.assertEqual(response.data["total_views"], 4)
+        self.assertEqual(response.data["total_affiliate_clicks"], 1)
+
+    def test_monthly_view_does_not_write(self):
+        response = self.client.get("/api/analytics/monthly/", {"year": 2020, "month": 1})
+        self.assertEqual(response.data["total_views"], 0)
+        self.assertFalse(MonthlyAnalytics.objects.exists())
+
+
+class TrackingPartitionTests(TestCase):
+    """ArticleView/OutboundClick are range-partitioned by month with archival of old months"""
+
+    def setUp(self):
+        author = User.objects.create_user(
+            username="editor", email="editor@example.com", password="secret123"
+        )
+        self.article = Article.objects.create(slug="haber", title="Haber", author=author)
+
+    def test_month_range_touches_one_partition(self):
+        start, end = partitions.month_bounds(partitions.month_start(timezone.localdate()))
+        plan = ArticleView.objects.filter(created_at__gte=start, created_at__lt=end).explain()
+
+        self.assertIn(partitions.partition_name("main_articleview", start.date()), plan)
+        self.assertNotIn("main_articleview_default", plan)
+
+    def test_old_partition_is_archived_then_dropped(self):
+        created_at = timezone.now() - timedelta(days=500)
+        old_month = partitions.month_start(timezone.localtime(created_at).date())
+        ArticleView.objects.create(article=self.article, ip_address="127.0.0.1", created_at=created_at)
+        with connection.cursor() as cursor:
+            # Satır önce default partition'a düşer, yeni partition'a taşınmalı
+            self.assertTrue(partitions.create_month_partition(cursor, "main_articleview", old_month))
+        ArticleView.objects.create(article=self.article, ip_address="127.0.0.1")
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command(
+                "prune_tracking_partitions", keep_months=13, archive_dir=archive_dir,
+                stdout=io.StringIO(),
+            )
+            name = partitions.partition_name("main_articleview", old_month)
+            with gzip.open(f"{archive_dir}/{name}.csv.gz", "rt") as fh:
+                rows = list(csv.DictReader(fh))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["article_id"], str(self.article.id))
+        self.assertEqual(ArticleView.objects.count(), 1)
+        with connection.cursor() as cursor:
+            self.assertNotIn(name, partitions.attached_partitions(cursor, "main_articleview"))
+            self.assertEqual(partitions.detached_partitions(cursor, "main_articleview"), [])
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _CollectingSMTPHandler:
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+)
+class EmailOutboxTests(TestCase):
+    """Request paths only enqueue mail; the outbox worker delivers it"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def register(self, email="yeni@example.com"):
+        return self.client.post("/api/auth/register/", {
+            "username": email.split("@")[0], "email": email,
+            "password": "secret123", "password_confirm": "secret123",
+        })
+
+    def test_register_enqueues_without_sending(self):
+        response = self.register()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data["email_sent"])
+        self.assertEqual(len(mail.outbox), 0)
+        message = EmailOutbox.objects.get()
+        self.assertEqual((message.kind, message.status, message.to_email), ("VERIFICATION", "PENDING", "yeni@example.com"))
+
+        call_command("send_email_outbox", stdout=io.StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["yeni@example.com"])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("SENT", 1))
+
+    def test_claimed_messages_are_skipped_by_other_workers(self):
+        for i in range(3):
+            outbox.enqueue_email(f"u{i}@example.com", "Konu", "Metin")
+
+        first = outbox.claim_batch(2)
+        second = outbox.claim_batch(2)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertEqual(outbox.claim_batch(2), [])
+        self.assertEqual(EmailOutbox.objects.filter(status="SENDING").count(), 3)
+
+    @override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_HOST="127.0.0.1", EMAIL_USE_TLS=False, EMAIL_TIMEOUT=2,
+        EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="",
+    )
+    def test_unreachable_server_backs_off_then_dead_letters(self):
+        port = _free_port()
+        message = outbox.enqueue_email("kisi@example.com", "Konu", "Metin")
+
+        with override_settings(EMAIL_PORT=port):
+            for attempt in range(1, 4):
+                stats = outbox.process_outbox()
+                message.refresh_from_db()
+                self.assertEqual(message.attempts, attempt)
+                if attempt < 3:
+                    self.assertEqual(stats["retry"], 1)
+                    self.assertEqual(message.status, "PENDING")
+                    self.assertGreater(message.next_attempt_at, timezone.now())
+                    # Backoff süresini beklemek yerine mesajı hemen vadesine çek
+                    EmailOutbox.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+
+        self.assertEqual(stats["dead"], 1)
+        self.assertEqual(message.status, "DEAD")
+        self.assertIn("ConnectionRefusedError", message.last_error)
+
+        self.assertEqual(outbox.requeue_dead(), 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("PENDING", 0))
+
+    @unittest.skipIf(SMTPController is None, "aiosmtpd is not installed")
+    def test_delivers_through_local_smtp_server(self):
+        handler = _CollectingSMTPHandler()
+        controller = SMTPController(handler, hostname="127.0.0.1", port=_free_port())
+        controller.start()
+        self.addCleanup(controller.stop)
+        for i in range(3):
+            outbox.enqueue_email(f"u{i}@example.com", "Konu", "Metin", html_body="<p>Metin</p>")
+
+        with override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=controller.port,
+            EMAIL_USE_TLS=False, EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="",
+        ):
+            stats = outbox.process_outbox()
+
+        self.assertEqual(stats, {"sent": 3, "retry": 0, "dead": 0})
+        self.assertEqual(
+            sorted(envelope.rcpt_tos[0] for envelope in handler.envelopes),
+            ["u0@example.com", "u1@example.com", "u2@example.com"],
+        )
+        self.assertFalse(EmailOutbox.objects.exclude(status="SENT").exists())
+
+
+class RejectingEmailBackend(LocmemEmailBackend):
+    """locmem backend that refuses mail to addresses starting with "red" """
+
+    def send_messages(self, messages):
+        if any(address.startswith("red") for message in messages for address in message.to):
+            raise ConnectionResetError("rejected")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    NEWSLETTER_CHUNK_SIZE=2,
+    NEWSLETTER_WORKERS=2,
+)
+class NewsletterFanOutTests(TestCase):
+    """Publishing queues a campaign; send_newsletters fans it out in checkpointed chunks"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="yazar", email="yazar@example.com", password="secret123")
+        for i in range(7):
+            email = f"okur{i}@example.com"
+            User.objects.create_user(username=f"okur{i}", email=email, password="secret123")
+            NewsletterSubscription.objects.create(email=email)
+        User.objects.create_user(
+            username="kapali", email="kapali@example.com", password="secret123",
+            notification_settings={"email_notifications": False},
+        )
+        NewsletterSubscription.objects.create(email="kapali@example.com")
+        NewsletterSubscription.objects.create(email="sadece-bulten@example.com")
+        NewsletterSubscription.objects.create(email="okur-pasif@example.com", is_active=False)
+        self.expected = sorted(f"okur{i}@example.com" for i in range(7))
+
+    def publish(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Article.objects.create(slug="yeni", title="Yeni İnceleme", status="PUBLISHED", author=self.author)
+
+    def test_publish_only_queues_a_campaign(self):
+        with CaptureQueriesContext(connection) as ctx:
+            article = self.publish()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertFalse(any('"main_newslettersubscription"' in q["sql"] for q in ctx.captured_queries))
+        campaign = NewsletterCampaign.objects.get()
+        self.assertEqual((campaign.article, campaign.status), (article, "PENDING"))
+
+    def test_campaign_reaches_eligible_subscribers_once(self):
+        self.publish()
+        call_command("send_newsletters", stdout=io.StringIO())
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), self.expected)
+        message = mail.outbox[0]
+        self.assertIn(f"unsubscribe?email={message.to[0]}", message.alternatives[0][0])
+        campaign = NewsletterCampaign.objects.get()
+        self.assertEqual(
+            (campaign.status, campaign.sent_count, campaign.total_recipients, campaign.deferred_count),
+            ("DONE", 7, 7, 0),
+        )
+
+    def test_interrupted_campaign_resumes_from_checkpoint(self):
+        self.publish()
+        campaign = newsletter.claim_campaign()
+
+        def crash(campaign):
+            raise RuntimeError("worker killed")
+
+        with self.assertRaises(RuntimeError):
+            newsletter.run_campaign(campaign, progress=crash)
+        first_wave = len(mail.outbox)
+        self.assertEqual(first_wave, 4)
+
+        # Kampanya RUNNING kaldı; kilit süresi dolmadan kimse devralmaz
+        self.assertIsNone(newsletter.claim_campaign())
+        NewsletterCampaign.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        call_command("send_newsletters", stdout=io.StringIO())
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), self.expected)
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent_count, campaign.total_recipients), ("DONE", 7, 7))
+
+    @override_settings(EMAIL_BACKEND="main.tests.RejectingEmailBackend")
+    def test_rejected_recipients_are_deferred_to_the_outbox(self):
+        User.objects.create_user(username="red", email="red@example.com", password="secret123")
+        NewsletterSubscription.objects.create(email="red@example.com")
+        self.publish()
+
+        call_command("send_newsletters", stdout=io.StringIO())
+
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), self.expected)
+        campaign = NewsletterCampaign.objects.get()
+        self.assertEqual((campaign.sent_count, campaign.deferred_count), (7, 1))
+        deferred = EmailOutbox.objects.get()
+        self.assertEqual((deferred.kind, deferred.to_email), ("NEWSLETTER", "red@example.com"))
+        self.assertIn("unsubscribe?email=red@example.com", deferred.html_body)
+
+
+class ArticlePublishEventTests(TestCase):
+    """Article.save() detects publishing from the loaded state and defers side effects to commit"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="yazar", email="yazar@example.com", password="secret123")
+        Article.objects.create(slug="taslak", title="Taslak", status="DRAFT", author=self.author)
+
+    def test_update_is_a_single_query(self):
+        article = Article.objects.get(slug="taslak")
+        article.title = "Yeni başlık"
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                article.save()
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertTrue(ctx.captured_queries[0]["sql"].startswith("UPDATE"))
+        self.assertFalse(NewsletterCampaign.objects.exists())
+
+    def test_publish_transition_fires_once_after_commit(self):
+        article = Article.objects.get(slug="taslak")
+        article.status = "PUBLISHED"
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as ctx:
+                article.save()
+            # Commit'ten önce kampanya açılmaz
+            self.assertFalse(NewsletterCampaign.objects.exists())
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIsNotNone(article.published_at)
+        self.assertEqual(NewsletterCampaign.objects.get().article, article)
+
+        NewsletterCampaign.objects.update(status="DONE")
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+            Article.objects.get(pk=article.pk).save()
+        self.assertEqual(NewsletterCampaign.objects.count(), 1)
+
+    def test_saving_without_status_skips_the_transition(self):
+        Article.objects.filter(slug="taslak").update(status="PUBLISHED")
+        article = Article.objects.only("id", "title").get(slug="taslak")
+        article.title = "Yeni başlık"
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+        self.assertFalse(NewsletterCampaign.objects.exists())
+
+
+class KeysetPaginationTests(TestCase):
+    """?cursor= pages by the view ordering plus id, without COUNT(*) or OFFSET"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.editor = User.objects.create_user(
+            username="editor", email="editor@example.com", password="secret123", role="EDITOR"
+        )
+        same_time = timezone.now() - timedelta(days=1)
+        for i in range(9):
+            article = Article.objects.create(
+                slug=f"yazi-{i}", title=f"Yazı {i}", author=self.editor,
+                status="DRAFT" if i % 4 == 0 else "PUBLISHED",
+            )
+            if i % 3 == 0 and article.published_at:
+                # Aynı published_at: sıra id tiebreaker'ı ile belirlenir
+                Article.objects.filter(pk=article.pk).update(published_at=same_time)
+        self.expected = list(
+            Article.objects.order_by("-published_at", "-created_at", "-id").values_list("id", flat=True)
+        )
+
+    def walk(self, url, key):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([item["id"] for item in response.data["results"]])
+            url = response.data[key]
+        return pages
+
+    def test_cursor_walk_matches_ordering_in_both_directions(self):
+        self.client.force_authenticate(self.editor)
+        forward = self.walk("/api/articles/?cursor=&page_size=2", "next")
+
+        self.assertEqual([article_id for page in forward for article_id in page], self.expected)
+        self.assertEqual([len(page) for page in forward], [2, 2, 2, 2, 1])
+
+        last = self.client.get("/api/articles/?cursor=&page_size=2")
+        for _ in range(3):
+            last = self.client.get(last.data["next"])
+        backward = self.walk(last.data["next"], "previous")
+        self.assertEqual(backward, forward[::-1][:len(backward)])
+        self.assertEqual(backward[-1], forward[0])
+
+    def test_cursor_page_runs_no_count_or_offset(self):
+        first = self.client.get("/api/articles/?cursor=&page_size=2")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(first.data["next"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        main_query = next(q["sql"] for q in ctx.captured_queries if 'FROM "main_article"' in q["sql"])
+        self.assertNotIn("OFFSET", main_query)
+        self.assertFalse(any(q["sql"].startswith("SELECT COUNT(*)") for q in ctx.captured_queries))
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get("/api/articles/?cursor=bozuk").status_code, 404)
+        # Geçerli token, yanlış tipte değerler
+        for url, values in [
+            ("/api/articles/", ["abc", "def", 1]),
+            ("/api/articles/", [None, None, "x"]),
+            ("/api/articles/", [None, None, [1]]),
+            ("/api/products/", ["abc", 1]),
+        ]:
+            response = self.client.get(url, {"cursor": pagination.encode_cursor(values)})
+            self.assertEqual(response.status_code, 404, values)
+        self.assertEqual(self.client.get("/api/articles/?cursor=&ordering=title").status_code, 200)
+
+    def test_approximate_count(self):
+        admin = User.objects.create_user(
+            username="admin", email="admin@example.com", password="secret123", role="ADMIN"
+        )
+        self.client.force_authenticate(admin)
+
+        response = self.client.get("/api/users/", {"count": "approximate"})
+        self.assertEqual(response.data["count"], User.objects.count())
+
+        with CaptureQueriesContext(connection) as ctx:
+            estimate = pagination.approximate_count(Article.objects.filter(status="PUBLISHED"), exact_below=0)
+        self.assertIsInstance(estimate, int)
+        self.assertTrue(ctx.captured_queries[0]["sql"].startswith("EXPLAIN"))
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= / ?expand= trim both the representation and the queries behind it"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.editor = User.objects.create_user(
+            username="editor", email="editor@example.com", password="secret123",
+            role="EDITOR", first_name="Ayşe", last_name="Yılmaz",
+        )
+        self.category = Category.objects.create(slug="routers", name="Routers")
+        for i in range(5):
+            product = Product.objects.create(
+                brand="TP-Link", model=f"Archer {i}", slug=f"archer-{i}", category=self.category
+            )
+            ProductSpec.objects.create(product=product, name="Wi-Fi", value="6")
+            Article.objects.create(
+                slug=f"yazi-{i}", title=f"Yazı {i}", author=self.editor,
+                category=self.category, status="PUBLISHED",
+            )
+
+    def test_card_only_product_list_is_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                "/api/products/", {"cursor": "", "fields": "id,slug,brand,model,category"}
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        first = response.data["results"][0]
+        self.assertEqual(set(first), {"id", "slug", "brand", "model", "category"})
+        self.assertEqual(first["category"], self.category.id)
+
+    def test_dotted_fields_and_expand(self):
+        response = self.client.get(
+            "/api/articles/", {"fields": "id,title,author.name,category", "expand": "category"}
+        )
+
+        article = response.data["results"][0]
+        self.assertEqual(set(article), {"id", "title", "author", "category"})
+        self.assertEqual(article["author"], {"name": "Ayşe Yılmaz"})
+        self.assertEqual(article["category"]["slug"], "routers")
+
+    def test_without_fields_the_response_is_unchanged(self):
+        full = self.client.get("/api/products/archer-1/").data
+        self.assertIn("product_specs", full)
+        self.assertEqual(full["category"]["slug"], "routers")
+
+        detail = self.client.get("/api/products/archer-1/", {"fields": "id,product_specs"}).data
+        self.assertEqual(detail, {"id": full["id"], "product_specs": full["product_specs"]})
+
+    def test_writes_ignore_fields(self):
+        self.client.force_authenticate(self.editor)
+        article = Article.objects.get(slug="yazi-0")
+
+        response = self.client.patch(
+            f"/api/articles/id/{article.id}/?fields=id", {"title": "Yeni başlık"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["title"], "Yeni başlık")
+        self.assertIn("author", response.data)
+
+
+class ProductRatingSummaryTests(TestCase):
+    """Review moderation keeps ProductRatingSummary in step; products read it instead of the reviews"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.users = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="secret123")
+            for i in range(4)
+        ]
+        self.product = Product.objects.create(brand="Asus", model="RT-AX58U", slug="rt-ax58u")
+        self.other = Product.objects.create(brand="Asus", model="RT-AX86U", slug="rt-ax86u")
+
+    def review(self, user, rating, status="PENDING", product=None):
+        return UserReview.objects.create(
+            product=product or self.product, user=user, rating=rating, content="ok", status=status
+        )
+
+    def summary(self, product=None):
+        return ProductRatingSummary.objects.filter(product=product or self.product).first()
+
+    def test_moderation_updates_summary(self):
+        first = self.review(self.users[0], 4)
+        self.assertIsNone(self.summary())
+
+        first.status = "APPROVED"
+        first.save()
+        self.review(self.users[1], 5, status="APPROVED")
+        self.review(self.users[2], 1, status="APPROVED")
+        summary = self.summary()
+        self.assertEqual((summary.approved_count, summary.rating_sum), (3, 10))
+        self.assertAlmostEqual(summary.average, 10 / 3)
+        self.assertEqual(summary.histogram, {1: 1, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        first.rating = 2
+        first.save(update_fields=["rating"])
+        first.status = "REJECTED"
+        first.save()
+        summary.refresh_from_db()
+        self.assertEqual((summary.approved_count, summary.rating_sum, summary.average), (2, 6, 3.0))
+        self.assertEqual(summary.histogram, {1: 1, 2: 0, 3: 0, 4: 0, 5: 1})
+
+        moved = UserReview.objects.get(rating=5)
+        moved.product = self.other
+        moved.save()
+        UserReview.objects.filter(rating=1).delete()
+        summary.refresh_from_db()
+        self.assertEqual((summary.approved_count, summary.rating_sum, summary.average), (0, 0, 0.0))
+        self.assertEqual(self.summary(self.other).histogram[5], 1)
+
+    def test_product_list_reads_summary_without_touching_reviews(self):
+        self.review(self.users[0], 5, status="APPROVED")
+        self.review(self.users[1], 4, status="APPROVED")
+        self.review(self.users[2], 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            results = self.client.get("/api/products/").data["results"]
+
+        data = next(item for item in results if item["id"] == self.product.id)
+        self.assertEqual(data["review_count"], 2)
+        self.assertEqual(data["average_rating"], 4.5)
+        self.assertEqual(data["rating_histogram"], {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1})
+        self.assertNotIn("user_reviews", data)
+        self.assertFalse(any("main_userreview" in q["sql"] for q in ctx.captured_queries))
+
+    def test_product_detail_serves_approved_reviews(self):
+        first = self.review(self.users[0], 5, status="APPROVED")
+        second = self.review(self.users[1], 4, status="APPROVED")
+        self.review(self.users[2], 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/products/rt-ax58u/").data
+
+        self.assertEqual(data["user_reviews"], [{"id": second.id, "rating": 4}, {"id": first.id, "rating": 5}])
+        self.assertEqual((data["review_count"], data["average_rating"]), (2, 4.5))
+        self.assertEqual(sum("main_userreview" in q["sql"] for q in ctx.captured_queries), 1)
+
+        by_id = self.client.get(f"/api/products/id/{self.product.id}/").data
+        self.assertEqual(by_id["user_reviews"], data["user_reviews"])
+
+        empty = self.client.get("/api/products/rt-ax86u/").data
+        self.assertEqual((empty["review_count"], empty["average_rating"], empty["user_reviews"]), (0, 0, []))
+
+    def test_rating_ordering(self):
+        self.review(self.users[0], 3, status="APPROVED", product=self.other)
+        self.review(self.users[1], 5, status="APPROVED")
+        unrated = Product.objects.create(brand="Asus", model="RT-AC68U", slug="rt-ac68u")
+
+        response = self.client.get("/api/products/", {"ordering": "-rating"})
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [self.product.id, self.other.id, unrated.id]
+        )
+
+    def test_rebuild_fixes_bulk_updates(self):
+        self.review(self.users[0], 5, status="APPROVED")
+        self.review(self.users[1], 3, status="APPROVED")
+        UserReview.objects.filter(rating=5).update(status="REJECTED")
+        self.review(self.users[2], 2, status="APPROVED", product=self.other)
+        UserReview.objects.filter(product=self.other).update(status="PENDING")
+
+        call_command("rebuild_rating_summaries", stdout=io.StringIO())
+
+        summary = self.summary()
+        self.assertEqual((summary.approved_count, summary.average), (1, 3.0))
+        self.assertEqual(summary.histogram, {1: 0, 2: 0, 3: 1, 4: 0, 5: 0})
+        self.assertIsNone(self.summary(self.other))
+
+
+class ResponseCacheTests(TestCase):
+    """Public read endpoints are served from the two-tier cache until a model they render changes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache._local.clear()
+        response_cache.shared_cache().clear()
+        self.editor = User.objects.create_user(
+            username="editor", email="editor@example.com", password="secret123", role="EDITOR"
+        )
+        self.article = Article.objects.create(
+            slug="wifi-7-rehberi", title="Wi-Fi 7 rehberi", author=self.editor, status="PUBLISHED"
+        )
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_tracking_writes_leave_generations_alone(self):
+        models = [ArticleView, Article]
+        before = response_cache.generations(models)
+        with self.captureOnCommitCallbacks(execute=True):
+            ArticleView.objects.create(article=self.article, ip_address="127.0.0.1")
+        self.assertEqual(response_cache.generations(models), before)
+        self.assertIsNone(response_cache.shared_cache().get(response_cache._generation_key(ArticleView)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.save()
+        self.assertGreater(response_cache.generations([Article])[0], before[1])
+
+    def test_stale_copy_is_dropped_when_the_page_is_gone(self):
+        url = "/api/articles/wifi-7-rehberi/"
+        request = mock.Mock(path=url, query_params={}, accepted_renderer=mock.Mock(format="json"))
+        base_key = response_cache._base_key(request)
+        self.get(url)
+        self.assertEqual(response_cache._stale(base_key)[0]["title"], "Wi-Fi 7 rehberi")
+
+        self.article.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # Eşzamanlı istekler silinen makalenin eski gövdesini almaz
+        self.assertIsNone(response_cache._stale(base_key))
+
+    def test_hits_skip_the_database_until_a_model_changes(self):
+        url = "/api/articles/wifi-7-rehberi/"
+        self.assertEqual(self.get(url)["X-Cache"], "MISS")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get(url)
+        self.assertEqual(response["X-Cache"], "HIT-LOCAL")
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(response.data["title"], "Wi-Fi 7 rehberi")
+
+        # Başka bir worker: kendi LRU'su boş, paylaşılan cache dolu
+        response_cache._local.clear()
+        self.assertEqual(self.get(url)["X-Cache"], "HIT")
+
+        self.article.title = "Wi-Fi 7 rehberi (güncel)"
+        self.article.save()
+        response = self.get(url)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["title"], "Wi-Fi 7 rehberi (güncel)")
+
+        # Makalenin render etmediği bir model
+        NewsletterSubscription.objects.create(email="okur@example.com")
+        self.assertEqual(self.get(url)["X-Cache"], "HIT-LOCAL")
+
+    def test_query_is_normalized_and_editors_bypass(self):
+        self.get("/api/tags/", b="2", a="1")
+        self.assertEqual(self.get("/api/tags/", a="1", b="2", utm_source="x", page_size="")["X-Cache"], "HIT-LOCAL")
+        self.assertEqual(self.get("/api/tags/", a="1")["X-Cache"], "MISS")
+
+        self.client.force_authenticate(self.editor)
+        self.assertEqual(self.get("/api/tags/", a="1")["X-Cache"], "BYPASS")
+        reader = User.objects.create_user(username="reader", email="reader@example.com", password="secret123")
+        self.client.force_authenticate(reader)
+        # Okurlar anonim ziyaretçilerle aynı yanıtı paylaşır
+        self.assertEqual(self.get("/api/tags/", a="1")["X-Cache"], "HIT-LOCAL")
+
+        stats = response_cache.response_cache_stats()
+        self.assertGreaterEqual(stats["hit_local"], 1)
+        self.assertGreaterEqual(stats["bypass"], 1)
+
+    def test_public_settings_with_file_backend(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory},
+        }):
+            Setting.objects.create(key="site_name", value="Donanım")
+            self.assertEqual(self.get("/api/settings/public/").data["data"]["site_name"]["value"], "Donanım")
+            response_cache._local.clear()
+            self.assertEqual(self.get("/api/settings/public/")["X-Cache"], "HIT")
+
+            Setting.objects.get(key="site_name").delete()
+            response = self.get("/api/settings/public/")
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertEqual(response.data["data"]["site_name"]["value"], "Hardware Review")
+
+
+class ResponseCacheStampedeTests(TransactionTestCase):
+    """Concurrent misses for one key run the view once (threads need committed data)"""
+
+    THREADS = 8
+
+    def setUp(self):
+        response_cache._local.clear()
+        response_cache.shared_cache().clear()
+        author = User.objects.create_user(username="yazar", email="yazar@example.com", password="secret123")
+        self.article = Article.objects.create(
+            slug="populer-inceleme", title="Popüler inceleme", author=author, status="PUBLISHED"
+        )
+
+    def stampede(self):
+        queries = []
+        states = []
+        barrier = threading.Barrier(self.THREADS)
+
+        def slow_query(execute, sql, params, many, context):
+            queries.append(sql)
+            # Yavaş veritabanı: istekler gerçekten üst üste biner
+            time.sleep(0.02)
+            return execute(sql, params, many, context)
+
+        def worker():
+            client = APIClient()
+            barrier.wait()
+            try:
+                with connection.execute_wrapper(slow_query):
+                    response = client.get("/api/articles/populer-inceleme/")
+                states.append((response.status_code, response["X-Cache"], response.data["title"]))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return queries, states
+
+    def test_stampede_costs_one_computation(self):
+        queries, states = self.stampede()
+
+        article_queries = [sql for sql in queries if sql.startswith('SELECT "main_article"')]
+        self.assertEqual(len(article_queries), 1)
+        self.assertEqual(len(states), self.THREADS)
+        self.assertEqual(sorted(state for _, state, _ in states), ["COALESCED"] * (self.THREADS - 1) + ["MISS"])
+        self.assertTrue(all(status == 200 and title == "Popüler inceleme" for status, _, title in states))
+
+    def test_followers_get_the_stale_copy_while_the_leader_recomputes(self):
+        self.stampede()
+        self.article.title = "Popüler inceleme (güncel)"
+        self.article.save()
+
+        queries, states = self.stampede()
+
+        self.assertEqual(len([sql for sql in queries if sql.startswith('SELECT "main_article"')]), 1)
+        by_state = {state: title for _, state, title in states}
+        self.assertEqual(set(by_state), {"MISS", "STALE"})
+        self.assertEqual(by_state["MISS"], "Popüler inceleme (güncel)")
+        self.assertEqual(by_state["STALE"], "Popüler inceleme")
+
+
+class ConditionalGetTests(TestCase):
+    """ETag / Last-Modified validators answer unchanged content with 304 before the view runs"""
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache._local.clear()
+        response_cache.shared_cache().clear()
+        author = User.objects.create_user(username="yazar", email="yazar@example.com", password="secret123")
+        self.article = Article.objects.create(
+            slug="mesh-rehberi", title="Mesh rehberi", author=author, status="PUBLISHED"
+        )
+        self.product = Product.objects.create(brand="TP-Link", model="Deco X50", slug="deco-x50")
+
+    def test_article_detail_revalidates_with_etag(self):
+        url = "/api/articles/mesh-rehberi/"
+        first = self.client.get(url)
+        self.assertTrue(first["ETag"].startswith('W/"'))
+        self.assertIn("Last-Modified", first)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        # Makalenin içinde render edilen bir model değişti
+        Tag.objects.create(slug="mesh", name="Mesh")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def test_if_modified_since(self):
+        first = self.client.get("/api/products/deco-x50/")
+        response = self.client.get("/api/products/deco-x50/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+        # If-None-Match varsa If-Modified-Since'e bakılmaz
+        response = self.client.get(
+            "/api/products/deco-x50/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"], HTTP_IF_NONE_MATCH='W/"eski"'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_and_settings_validators(self):
+        first = self.client.get("/api/products/", {"page": 1})
+        self.assertEqual(self.client.get("/api/products/", {"page": 1}, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        self.assertNotEqual(self.client.get("/api/products/", {"brand": "TP-Link"})["ETag"], first["ETag"])
+
+        ProductSpec.objects.create(product=self.product, name="Wi-Fi", value="6")
+        self.assertEqual(self.client.get("/api/products/", {"page": 1}, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200)
+
+        settings_response = self.client.get("/api/settings/public/")
+        self.assertEqual(
+            self.client.get("/api/settings/public/", HTTP_IF_NONE_MATCH=settings_response["ETag"]).status_code, 304
+        )
+        Setting.objects.create(key="site_name", value="Donanım")
+        self.assertEqual(
+            self.client.get("/api/settings/public/", HTTP_IF_NONE_MATCH=settings_response["ETag"]).status_code, 200
+        )
+
+    def test_last_modified_falls_back_to_updated_at(self):
+        response_cache.shared_cache().clear()
+        response = self.client.get("/api/categories/")
+        self.assertNotIn("Last-Modified", response)
+
+        response = self.client.get("/api/articles/mesh-rehberi/")
+        self.assertEqual(
+            parse_http_date_safe(response["Last-Modified"]), int(self.article.updated_at.timestamp())
+        )
+
+
+    def test_no_validators_with_process_local_cache(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with override_settings(CACHES=locmem):
+            # Diğer worker'lar nesil artışını görmez; 304 bayat içerik döndürebilirdi
+            response = self.client.get("/api/articles/mesh-rehberi/", HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+
+
+class SettingsSnapshotTests(TestCase):
+    """Settings are read from a per-process snapshot invalidated by a version key"""
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache._local.clear()
+        response_cache.shared_cache().clear()
+        settings_snapshot.invalidate_settings()
+        Setting.objects.create(key="site_name", value="Donanım", category="general")
+
+    def test_repeated_reads_hit_no_queries(self):
+        self.assertEqual(Setting.get_setting("site_name"), "Donanım")
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(Setting.get_setting("site_name"), "Donanım")
+            self.assertEqual(Setting.get_setting("yok", "varsayılan"), "varsayılan")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_values_are_normalized_on_write(self):
+        setting = Setting.objects.create(key="smtp_port", value="{'value': {'value': 587}}", category="email")
+        setting.refresh_from_db()
+        self.assertEqual(setting.value, "587")
+        self.assertEqual(settings_snapshot.normalize_setting_value('{"value": true}'), "true")
+        self.assertEqual(settings_snapshot.normalize_setting_value("{'value': broken"), "{'value': broken")
+
+    def test_writes_invalidate_snapshot(self):
+        self.assertEqual(Setting.get_setting("site_name"), "Donanım")
+        Setting.set_setting("site_name", "Donanım Rehberi")
+        self.assertEqual(Setting.get_setting("site_name"), "Donanım Rehberi")
+
+        # Başka bir worker'ın yazması: sadece sürüm anahtarı değişir
+        Setting.objects.filter(key="site_name").update(value="Yeni")
+        self.assertEqual(Setting.get_setting("site_name"), "Donanım Rehberi")
+        settings_snapshot.cache.incr(settings_snapshot.SETTINGS_VERSION_KEY)
+        settings_snapshot.get_settings_snapshot().checked_at -= settings_snapshot.SETTINGS_SNAPSHOT_CHECK_INTERVAL
+        self.assertEqual(Setting.get_setting("site_name"), "Yeni")
+
+    def test_settings_endpoints_read_snapshot(self):
+        admin = User.objects.create_user(
+            username="yonetici", email="yonetici@example.com", password="secret123", role="ADMIN"
+        )
+        self.client.force_authenticate(admin)
+        first = self.client.get("/api/settings/bulk/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data["data"]["general"]["site_name"]["value"], "Donanım")
+        self.assertEqual(
+            self.client.get("/api/settings/bulk/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304
+        )
+
+        response = self.client.post(
+            "/api/settings/bulk/", {"settings": {"general": {"site_name": {"value": "Rehber"}}}}, format="json"
+        )
+        self.assertEqual(response.data["data"]["general"]["site_name"], "Rehber")
+        self.assertEqual(
+            self.client.get("/api/settings/bulk/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 200
+        )
+
+        self.client.force_authenticate(None)
+        self.client.get("/api/settings/public/")
+        with override_settings(RESPONSE_CACHE_ENABLED=False), CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/settings/public/")
+        self.assertEqual(response.data["data"]["site_name"]["value"], "Rehber")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+
+class ProductWriteTests(TestCase):
+    """ProductSerializer writes specs, tags and affiliate links set-based, in one transaction"""
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache._local.clear()
+        response_cache.shared_cache().clear()
+        self.tags = [Tag.objects.create(name=f"Etiket {i}", slug=f"etiket-{i}") for i in range(3)]
+        self.data = {
+            "brand": "Asus",
+            "model": "RT-AX58U",
+            "slug": "asus-rt-ax58u",
+            "specs": [{"name": f"Spec {i}", "value": str(i), "sort_order": i} for i in range(60)],
+            "tags": [tag.id for tag in self.tags] + [999999],
+            "affiliate_links_data": [
+                {"merchant": "Shop", "url_template": "https://shop.example.com/p", "active": True},
+            ],
+        }
+
+    def save(self, instance, data):
+        serializer = ProductSerializer(instance, data=data)
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as ctx:
+            product = serializer.save()
+        return product, len(ctx.captured_queries)
+
+    def test_create_writes_in_bulk(self):
+        product, queries = self.save(None, self.data)
+        self.assertLess(queries, 20)
+        self.assertEqual(product.product_specs.count(), 60)
+        self.assertEqual(set(product.product_tags.values_list("tag_id", flat=True)), {tag.id for tag in self.tags})
+        self.assertEqual(product.affiliate_links.count(), 1)
+
+    def test_update_diffs_existing_rows(self):
+        product, _ = self.save(None, self.data)
+        spec_ids = dict(product.product_specs.values_list("name", "id"))
+        link_id = product.affiliate_links.get().id
+        self.client.get("/api/products/asus-rt-ax58u/")
+
+        data = dict(self.data)
+        data["specs"] = [{"name": "Spec 0", "value": "değişti", "sort_order": 0}] + self.data["specs"][1:30]
+        data["tags"] = [self.tags[0].id, str(self.tags[2].id)]
+        data["affiliate_links_data"] = [dict(self.data["affiliate_links_data"][0], active="false")]
+        product, queries = self.save(product, data)
+        self.assertLess(queries, 20)
+
+        specs = dict(product.product_specs.values_list("name", "value"))
+        self.assertEqual(len(specs), 30)
+        self.assertEqual(specs["Spec 0"], "değişti")
+        # Değişmeyen ve güncellenen satırlar id'lerini korur
+        self.assertEqual(product.product_specs.get(name="Spec 0").id, spec_ids["Spec 0"])
+        self.assertEqual(product.product_specs.get(name="Spec 5").id, spec_ids["Spec 5"])
+        self.assertEqual(set(product.product_tags.values_list("tag_id", flat=True)), {self.tags[0].id, self.tags[2].id})
+        link = product.affiliate_links.get()
+        self.assertEqual((link.id, link.active), (link_id, False))
+
+        # bulk_create post_save göndermez; önbellekteki ürün yine de yenilenir
+        response = self.client.get("/api/products/asus-rt-ax58u/")
+        self.assertEqual(len(response.data["product_specs"]), 30)
+        self.assertFalse(response.data["affiliate_links"][0]["active"])
+
+    def test_failed_save_rolls_back(self):
+        product, _ = self.save(None, self.data)
+        data = dict(self.data, specs=[{"name": "Spec 0", "value": "yeni"}, {"name": "Bozuk", "sort_order": "x"}])
+        serializer = ProductSerializer(product, data=data)
+        serializer.is_valid(raise_exception=True)
+        with self.assertRaises(ValueError):
+            serializer.save()
+        self.assertEqual(product.product_specs.count(), 60)
+        self.assertEqual(product.product_specs.get(name="Spec 0").value, "0")
+
+
+class SlugAllocationTests(TestCase):
+    """Unique slugs are allocated with one prefix query, with Turkish letters transliterated"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(username="yazar", email="yazar@example.com", password="secret123")
+
+    def article(self, slug):
+        return Article.objects.create(slug=slug, title=slug, author=self.author)
+
+    def test_slugify_transliterates_turkish(self):
+        self.assertEqual(slugs.slugify_tr("En İyi Şarj Göstergeli Ağ Cihazı: ÇÖÜ"), "en-iyi-sarj-gostergeli-ag-cihazi-cou")
+        self.assertEqual(slugs.slugify_tr("Café Router"), "cafe-router")
+
+    def test_allocation_is_one_query(self):
+        for slug in ["en-iyi-router", "en-iyi-router-1", "en-iyi-router-2", "en-iyi-router-4", "en-iyi-routerlar"]:
+            self.article(slug)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(slugs.allocate_slug(Article, "en-iyi-router"), "en-iyi-router-3")
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(slugs.allocate_slug(Article, "en-iyi-routerlar"), "en-iyi-routerlar-1")
+        # Güncellenen kayıt kendi slug'ını korur
+        own = Article.objects.get(slug="en-iyi-router")
+        self.assertEqual(slugs.allocate_slug(Article, "en-iyi-router", exclude_pk=own.pk), "en-iyi-router")
+
+    def test_long_titles_fit_the_column(self):
+        base = slugs.slugify_tr("Çok " * 30)
+        first = slugs.allocate_slug(Article, base)
+        self.article(first)
+        second = slugs.allocate_slug(Article, base)
+        self.assertEqual(len(first), 50)
+        self.assertLessEqual(len(second), 50)
+        self.assertTrue(second.endswith("-1"))
+
+    def test_serializer_slugs(self):
+        self.article("en-iyi-router")
+        serializer = ArticleSerializer(data={"title": "En İyi Router", "content": "..."})
+        serializer.is_valid(raise_exception=True)
+        self.assertEqual(serializer.save(author=self.author).slug, "en-iyi-router-1")
+
+        serializer = ProductSerializer(data={"brand": "TP-Link", "model": "Archer Çift"})
+        serializer.is_valid(raise_exception=True)
+        self.assertEqual(serializer.save().slug, "tp-link-archer-cift")
+
+    def test_concurrent_collision_is_retried(self):
+        self.article("mesh-rehberi")
+        # Başka bir istek slug'ı sorgu ile INSERT arasında almış gibi
+        real_allocate = slugs.allocate_slug
+        with mock.patch.object(
+            slugs, "allocate_slug", side_effect=["mesh-rehberi", real_allocate(Article, "mesh-rehberi")]
+        ):
+            article = slugs.save_with_slug(
+                Article,
+                "mesh-rehberi",
+                lambda slug: Article.objects.create(slug=slug, title="Mesh rehberi", author=self.author),
+            )
+        self.assertEqual(article.slug, "mesh-rehberi-1")
+
+
+class UploadTests(TestCase):
+    """Uploads are streamed to content-addressed paths and deduplicated"""
+
+    def setUp(self):
+        self.client = APIClient()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name, MEDIA_URL="/media/")
+        override.enable()
+        self.addCleanup(override.disable)
+        self.media_root = media.name
+        self.admin = User.objects.create_user(
+            username="yonetici", email="yonetici@example.com", password="secret123", role="ADMIN"
+        )
+        self.client.force_authenticate(self.admin)
+        settings_snapshot.invalidate_settings()
+
+    def image(self, name="resim.png", color="red"):
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (4, 4), color).save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def stored_files(self, directory):
+        root = f"{self.media_root}/{directory}"
+        return sorted(f"{path}/{name}" for path, _, names in os.walk(root) for name in names)
+
+    def test_identical_uploads_are_stored_once(self):
+        from django.core.files.uploadedfile import TemporaryUploadedFile
+
+        first = uploads.store_upload(self.image("a.PNG"), "best_list_items")
+        self.assertRegex(first, r"^best_list_items/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+
+        # Büyük yüklemeler diskteki geçici dosyadan parça parça okunur
+        data = self.image().read()
+        temporary = TemporaryUploadedFile("b.png", "image/png", len(data), None)
+        temporary.write(data)
+        temporary.seek(0)
+        read = temporary.file.read
+
+        def chunked_read(size=-1):
+            self.assertGreater(size, 0, "upload read in one piece")
+            return read(size)
+
+        temporary.file.read = chunked_read
+        self.assertEqual(uploads.store_upload(temporary, "best_list_items"), first)
+        self.assertEqual(len(self.stored_files("best_list_items")), 1)
+
+    def test_best_list_images_use_request_host(self):
+        data = {
+            "title": "En iyi routerlar",
+            "content": "...",
+            "type": "BEST_LIST",
+            "best_list_extra_data": json.dumps({"items": [{"name": "A"}, {"name": "B"}]}),
+            "best_list_item_0_image_file": self.image("a.png"),
+            "best_list_item_1_image_file": self.image("b.png"),
+        }
+        with override_settings(ALLOWED_HOSTS=["donanim.example.com"]):
+            response = self.client.post("/api/articles/", data, format="multipart", HTTP_HOST="donanim.example.com")
+        self.assertEqual(response.status_code, 201)
+        items = BestListExtra.objects.get(article__slug="en-iyi-routerlar").items
+        self.assertTrue(items[0]["image"].startswith("http://donanim.example.com/media/best_list_items/"))
+        self.assertEqual(items[0]["image"], items[1]["image"])
+        self.assertEqual(len(self.stored_files("best_list_items")), 1)
+
+    def test_settings_files_shared_between_keys_are_kept(self):
+        def post(files, values):
+            return self.client.post(
+                "/api/settings/bulk/",
+                {"settings": json.dumps({"general": values}), **files},
+                format="multipart",
+            )
+
+        post({"logo_file": self.image(), "favicon_file": self.image()}, {"logo": "x", "favicon": "x"})
+        logo, favicon = Setting.get_setting("logo"), Setting.get_setting("favicon")
+        self.assertEqual(logo, favicon)
+        self.assertTrue(logo.startswith("/media/settings/"))
+
+        # Logo değişir; favicon aynı dosyayı kullandığı için silinmez
+        post({"logo_file": self.image(color="blue")}, {"logo": "x"})
+        self.assertNotEqual(Setting.get_setting("logo"), logo)
+        self.assertEqual(len(self.stored_files("settings")), 2)
+
+        post({}, {"favicon": ""})
+        self.assertEqual(len(self.stored_files("settings")), 1)
+
+
+class ImageDerivativeTests(TestCase):
+    """Uploaded images get resized WebP/AVIF/JPEG variants and a blur placeholder"""
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache._local.clear()
+        response_cache.shared_cache().clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=media.name, MEDIA_URL="/media/", IMAGE_DERIVATIVE_WIDTHS=[320, 640], IMAGE_DERIVATIVE_FORMATS=["webp", "jpeg"]
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, width, height, directory="products"):
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        buffer = io.BytesIO()
+        Image.new("RGBA", (width, height), (200, 10, 10, 128)).save(buffer, "PNG")
+        return uploads.store_upload(SimpleUploadedFile("kapak.png", buffer.getvalue()), directory)
+
+    def test_build_variants(self):
+        data = images.build_variants(self.upload(1000, 500))
+        self.assertEqual((data["width"], data["height"]), (1000, 500))
+        self.assertTrue(data["placeholder"].startswith("data:image/jpeg;base64,"))
+        self.assertEqual(
+            [(v["format"], v["width"], v["height"]) for v in data["variants"]],
+            [("webp", 320, 160), ("jpeg", 320, 160), ("webp", 640, 320), ("jpeg", 640, 320)],
+        )
+        for variant in data["variants"]:
+            self.assertTrue(images.default_storage.exists(variant["path"]))
+
+        # Küçük görseller büyütülmez
+        small = images.build_variants(self.upload(100, 80))
+        self.assertEqual({v["width"] for v in small["variants"]}, {100})
+
+    def test_upload_queues_variants(self):
+        product = Product.objects.create(brand="Asus", model="RT-AX58U", slug="rt-ax58u")
+        product.cover_image = self.upload(800, 400)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        # Varsayılan: istek içinde boyutlandırma yok, generate_image_derivatives üretir
+        self.assertEqual(images.stale_rows(Product, "cover_image").count(), 1)
+
+        with override_settings(IMAGE_DERIVATIVES_ON_UPLOAD=True), self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        product.refresh_from_db()
+        self.assertEqual(product.cover_image_variants["source"], product.cover_image.name)
+
+        data = self.client.get("/api/products/rt-ax58u/").data["cover_image_variants"]
+        self.assertEqual((data["width"], data["height"]), (800, 400))
+        self.assertRegex(data["srcset"]["image/webp"], r"^http://testserver/media/derivatives/.+/320\.webp 320w, .+/640\.webp 640w$")
+        self.assertEqual(len(data["variants"]), 4)
+
+        # Görsel kaldırılınca kopyalar da düşer
+        product.cover_image = None
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual(product.cover_image_variants, {})
+
+    def test_backfill_command(self):
+        author = User.objects.create_user(username="yazar", email="yazar@example.com", password="secret123")
+        # Sinyal atlatan yazma: kopyası olmayan eski görseller gibi
+        User.objects.filter(pk=author.pk).update(avatar=self.upload(64, 64, "avatars"))
+        Product.objects.create(brand="Asus", model="Bozuk", slug="bozuk")
+        Product.objects.filter(slug="bozuk").update(cover_image="products/yok.png")
+        self.assertEqual(images.stale_rows(User, "avatar").count(), 1)
+
+        call_command("generate_image_derivatives", workers=1, stdout=io.StringIO())
+        author.refresh_from_db()
+        self.assertEqual({v["width"] for v in author.avatar_variants["variants"]}, {64})
+        self.assertEqual(Product.objects.get(slug="bozuk").cover_image_variants, {"source": "products/yok.png"})
+        self.assertEqual(images.stale_rows(User, "avatar").count(), 0)
+        self.assertEqual(images.stale_rows(Product, "cover_image").count(), 0)
+
+
+class CommentTreeTests(TestCase):
+    """A whole discussion is loaded with one CTE plus one author query"""
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache._local.clear()
+        response_cache.shared_cache().clear()
+        self.users = [
+            User.objects.create_user(username=f"okur{i}", email=f"okur{i}@example.com", password="secret123")
+            for i in range(3)
+        ]
+        self.article = Article.objects.create(
+            slug="mesh-rehberi", title="Mesh rehberi", author=self.users[0], status="PUBLISHED"
+        )
+
+    def comment(self, parent=None, status="APPROVED", user=0):
+        return Comment.objects.create(
+            article=self.article, user=self.users[user], parent=parent, content="yorum", status=status
+        )
+
+    def test_tree_is_two_queries(self):
+        roots = [self.comment(user=i % 3) for i in range(5)]
+        for root in roots:
+            reply = self.comment(parent=root, user=1)
+            self.comment(parent=reply, user=2)
+            hidden = self.comment(parent=root, status="PENDING")
+            # Onaylanmamış yorumun yanıtları da görünmez
+            self.comment(parent=hidden)
+        HelpfulVote.objects.create(comment=roots[0], user=self.users[1])
+        HelpfulVote.objects.create(comment=roots[0], user=self.users[2])
+
+        with override_settings(RESPONSE_CACHE_ENABLED=False), CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/articles/mesh-rehberi/comments/")
+        # makale id'si + CTE + yazarlar
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+        results = response.data["results"]
+        self.assertIsNone(response.data["next"])
+        self.assertEqual([node["id"] for node in results], [root.id for root in reversed(roots)])
+        first = results[-1]
+        self.assertEqual(first["helpful_count"], 2)
+        self.assertEqual(len(first["replies"]), 1)
+        self.assertEqual(first["replies"][0]["replies"][0]["depth"], 2)
+        self.assertEqual(first["replies"][0]["user"]["username"], "okur1")
+        self.assertNotIn("email", first["user"])
+
+    def test_cursor_pages_over_threads(self):
+        roots = [self.comment() for _ in range(5)]
+        self.comment(parent=roots[2])
+
+        first = self.client.get("/api/articles/mesh-rehberi/comments/", {"page_size": 2})
+        self.assertEqual([node["id"] for node in first.data["results"]], [roots[4].id, roots[3].id])
+        second = self.client.get(first.data["next"])
+        self.assertEqual([node["id"] for node in second.data["results"]], [roots[2].id, roots[1].id])
+        self.assertEqual(len(second.data["results"][0]["replies"]), 1)
+        third = self.client.get(second.data["next"])
+        self.assertEqual([node["id"] for node in third.data["results"]], [roots[0].id])
+        self.assertIsNone(third.data["next"])
+
+        self.assertEqual(self.client.get("/api/articles/mesh-rehberi/comments/", {"cursor": "bozuk"}).status_code, 400)
+        for values in (["2024-01-01T00:00:00+00:00", None], ["2024-01-01T00:00:00+00:00", [1]], [None, 1]):
+            response = self.client.get("/api/articles/mesh-rehberi/comments/", {"cursor": comment_tree.cursor_token(values)})
+            self.assertEqual(response.status_code, 400, values)
+        self.assertEqual(self.client.get("/api/articles/yok/comments/").status_code, 404)
+
+
+class HelpfulVoteTests(TestCase):
+    """Votes toggle with INSERT ... ON CONFLICT / DELETE ... RETURNING and keep a counter column"""
+
+    def setUp(self):
+        self.client = APIClient()
+        response_cache._local.clear()
+        response_cache.shared_cache().clear()
+        self.user = User.objects.create_user(username="okur", email="okur@example.com", password="secret123")
+        self.other = User.objects.create_user(username="diger", email="diger@example.com", password="secret123")
+        article = Article.objects.create(slug="wifi-7", title="Wi-Fi 7", author=self.user, status="PUBLISHED")
+        self.comment = Comment.objects.create(article=article, user=self.other, content="yorum", status="APPROVED")
+        product = Product.objects.create(brand="Asus", model="RT-BE88U", slug="rt-be88u")
+        self.review = UserReview.objects.create(product=product, user=self.other, rating=5, content="iyi")
+        self.client.force_authenticate(self.user)
+
+    def vote(self, url):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url)
+
+    def test_toggle_updates_counter(self):
+        url = f"/api/comments/{self.comment.id}/helpful/"
+        with CaptureQueriesContext(connection) as ctx:
+            added = self.vote(url)
+        self.assertEqual(added.data, {"success": True, "action": "added", "helpful_count": 1})
+        # DELETE + INSERT + UPDATE (savepoint ve oturum sorguları hariç)
+        votes = [q for q in ctx.captured_queries if "helpfulvote" in q["sql"] or "UPDATE" in q["sql"]]
+        self.assertEqual(len(votes), 3)
+
+        removed = self.vote(url)
+        self.assertEqual(removed.data, {"success": True, "action": "removed", "helpful_count": 0})
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.helpful_count, 0)
+        self.assertEqual(self.vote("/api/comments/999999/helpful/").status_code, 404)
+
+    def test_concurrent_click_is_not_an_error(self):
+        HelpfulVote.objects.create(comment=self.comment, user=self.user)
+        counter = helpful_votes.COMMENT_VOTES
+        with connection.cursor() as cursor:
+            # Diğer istek oyu DELETE'ten sonra eklemiş gibi
+            self.assertEqual(counter._rejected(cursor, self.comment.id, self.user), ("added", 1))
+
+        HelpfulVote.objects.create(comment=self.comment, user=self.other, ip_address="10.0.0.5")
+        response = self.client.post(
+            f"/api/comments/{self.comment.id}/helpful/", REMOTE_ADDR="10.0.0.5"
+        )
+        # Kullanıcının oyu kaldırılır; tekrar oylayınca IP kısıtı 409 döner
+        self.assertEqual(response.data["action"], "removed")
+        response = self.client.post(f"/api/comments/{self.comment.id}/helpful/", REMOTE_ADDR="10.0.0.5")
+        self.assertEqual(response.status_code, 409)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.helpful_count, 1)
+
+    def test_stale_instance_keeps_counter(self):
+        stale = Comment.objects.get(pk=self.comment.pk)
+        self.vote(f"/api/comments/{self.comment.id}/helpful/")
+        stale.content = "düzenlendi"
+        stale.save()
+        stale.refresh_from_db()
+        self.assertEqual((stale.content, stale.helpful_count), ("düzenlendi", 1))
+
+        # Sinyaller ORM ile silinen oyları da düşer
+        HelpfulVote.objects.filter(comment=self.comment).delete()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.helpful_count, 0)
+
+    def test_review_votes(self):
+        response = self.vote(f"/api/reviews/{self.review.id}/helpful/")
+        self.assertEqual(response.data["helpful_count"], 1)
+        self.assertTrue(ReviewHelpfulVote.objects.filter(review=self.review, user=self.user).exists())
+        detail = self.client.get(f"/api/reviews/{self.review.id}/", {"admin": "true"})
+        self.assertEqual(detail.data["is_helpful"], 1)
+        self.assertEqual(self.vote(f"/api/reviews/{self.review.id}/helpful/").data["helpful_count"], 0)
+        self.assertEqual(self.vote("/api/reviews/999999/helpful/").status_code, 404)
+
+    def test_reconcile_fixes_drift(self):
+        HelpfulVote.objects.create(comment=self.comment, user=self.user)
+        Comment.objects.filter(pk=self.comment.pk).update(helpful_count=7)
+        UserReview.objects.filter(pk=self.review.pk).update(is_helpful=3)
+
+        out = io.StringIO()
+        call_command("reconcile_helpful_counts", "--dry-run", stdout=out)
+        self.assertIn(f"Comment {self.comment.id}: helpful_count 7 -> 1", out.getvalue())
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.helpful_count, 7)
+
+        call_command("reconcile_helpful_counts", stdout=io.StringIO())
+        self.comment.refresh_from_db()
+        self.review.refresh_from_db()
+        self.assertEqual((self.comment.helpful_count, self.review.is_helpful), (1, 0))
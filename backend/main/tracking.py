@@ -0,0 +1,486 @@
+# hardware/backend/main/tracking.py
+"""
+Write-behind ingestion for /api/article-view/ and /api/outbound/.
+
+With TRACKING_BUFFER_ENABLED the views only validate the payload cheaply
+(no serializer, no FK lookups) and append a row dict to a bounded
+per-process buffer. A background thread hands the buffer to the configured
+spool once TRACKING_BUFFER_FLUSH_SIZE events are waiting or every
+TRACKING_BUFFER_FLUSH_INTERVAL seconds:
+
+- DatabaseSpool writes the batch with one bulk_create per model.
+- DirectorySpool drops the batch as a JSON file into TRACKING_SPOOL_DIR so
+  several workers (or hosts sharing the directory) can ship their batches
+  to one writer: `python manage.py drain_tracking_spool`.
+
+A full buffer rejects new events (the view answers 503 + Retry-After) and
+counts them as dropped; rows whose foreign keys no longer exist are
+filtered out at flush time. The buffer is flushed on interpreter exit, so a
+gracefully stopped gunicorn worker does not lose what it has queued.
+
+Stored views (buffered or not) also feed Article.view_count through
+ViewCountDeltas: counts are coalesced per article in memory and added with
+batched F() updates every VIEW_COUNT_FLUSH_INTERVAL seconds, so the hot
+Article row is not written once per view.
+"""
+
+import atexit
+import ipaddress
+import json
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, close_old_connections, connections, models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import ValidationError
+
+from .models import Article
+from .models_extra import ArticleView, OutboundClick
+
+
+TRACKING_MODELS = {model._meta.label: model for model in (ArticleView, OutboundClick)}
+
+
+# =========================
+# Validation
+# =========================
+
+def _optional_id(data, field, errors):
+    value = data.get(field)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        errors[field] = ["A valid integer is required."]
+        return None
+
+
+def _client_ip(request, errors, field):
+    ip = request.META.get("REMOTE_ADDR", "")
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        errors[field] = ["Enter a valid IPv4 or IPv6 address."]
+        return None
+
+
+def _truncate(value, model, field):
+    max_length = model._meta.get_field(field).max_length
+    return value[:max_length] if value and max_length else value
+
+
+def _raise_if(errors):
+    if errors:
+        raise ValidationError(errors)
+
+
+def article_view_event(request):
+    """Row dict for an ArticleView hit; raises ValidationError like the serializer would"""
+    errors = {}
+    article_id = _optional_id(request.data, "article", errors)
+    if article_id is None and "article" not in errors:
+        errors["article"] = ["This field is required."]
+    ip_address = _client_ip(request, errors, "ip_address")
+    _raise_if(errors)
+    return {
+        "article_id": article_id,
+        "user_id": request.user.id if request.user.is_authenticated else None,
+        "ip_address": ip_address,
+        "user_agent": request.META.get("HTTP_USER_AGENT", ""),
+        "referer": _truncate(request.META.get("HTTP_REFERER", ""), ArticleView, "referer"),
+        "created_at": timezone.now(),
+    }
+
+
+def outbound_click_event(request):
+    """Row dict for an OutboundClick hit; raises ValidationError like the serializer would"""
+    errors = {}
+    merchant = request.data.get("merchant")
+    if not isinstance(merchant, str) or not merchant.strip():
+        errors["merchant"] = ["This field is required."]
+    elif len(merchant) > OutboundClick._meta.get_field("merchant").max_length:
+        errors["merchant"] = ["Ensure this field has no more than 100 characters."]
+    product_id = _optional_id(request.data, "product", errors)
+    article_id = _optional_id(request.data, "article", errors)
+    ip = _client_ip(request, errors, "ip")
+    _raise_if(errors)
+    return {
+        "product_id": product_id,
+        "article_id": article_id,
+        "user_id": request.user.id if request.user.is_authenticated else None,
+        "merchant": merchant,
+        "ip": ip,
+        "user_agent": request.META.get("HTTP_USER_AGENT", ""),
+        "created_at": timezone.now(),
+    }
+
+
+# =========================
+# Writing batches
+# =========================
+
+def _drop_dangling(model, rows):
+    """Drop rows pointing at deleted articles/products/users (one query per FK)"""
+    for field in model._meta.concrete_fields:
+        if not isinstance(field, models.ForeignKey):
+            continue
+        ids = {row.get(field.attname) for row in rows} - {None}
+        if not ids:
+            continue
+        existing = set(
+            field.related_model._base_manager.filter(pk__in=ids).values_list("pk", flat=True)
+        )
+        if len(existing) < len(ids):
+            rows = [row for row in rows if row.get(field.attname) in existing or row.get(field.attname) is None]
+    return rows
+
+
+def write_rows(model, rows):
+    """Insert row dicts with bulk_create; returns how many were written"""
+    rows = _drop_dangling(model, rows)
+    objs = [model(**row) for row in rows]
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(objs)
+    except (IntegrityError, DataError):
+        # Batch'i bozan satır(lar) yüzünden diğerlerini kaybetme; bağlantı hataları yukarı çıkar
+        written = []
+        for obj in objs:
+            try:
+                with transaction.atomic():
+                    obj.save(force_insert=True)
+                written.append(obj)
+            except (IntegrityError, DataError):
+                pass
+        objs = written
+    if model is ArticleView:
+        count_article_views(obj.article_id for obj in objs)
+    return len(objs)
+
+
+class DatabaseSpool:
+    """Write batches straight to the database from the worker"""
+
+    def write(self, model, rows):
+        return write_rows(model, rows)
+
+
+class DirectorySpool:
+    """
+    Hand batches to a directory shared by the workers; a single
+    `drain_tracking_spool` process inserts them. Files are written to a
+    temporary name and renamed, so a drainer never sees a half-written batch.
+    """
+
+    suffix = ".json"
+
+    def __init__(self, path=None):
+        self.path = Path(path or settings.TRACKING_SPOOL_DIR)
+
+    def write(self, model, rows):
+        self.path.mkdir(parents=True, exist_ok=True)
+        name = f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        tmp = self.path / f".{name}.tmp"
+        payload = {"model": model._meta.label, "rows": rows}
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, cls=_RowEncoder)
+        os.replace(tmp, self.path / f"{name}{self.suffix}")
+        return len(rows)
+
+    def drain(self, limit=None):
+        """Insert waiting batches; returns (files, rows written)"""
+        files = written = 0
+        for path in sorted(self.path.glob(f"*{self.suffix}")):
+            if limit is not None and files >= limit:
+                break
+            claimed = path.with_suffix(".processing")
+            try:
+                # Aynı dizini boşaltan başka bir drainer dosyayı almış olabilir
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+            with open(claimed, encoding="utf-8") as fh:
+                payload = json.load(fh)
+            model = TRACKING_MODELS[payload["model"]]
+            try:
+                written += write_rows(model, [_decode_row(model, row) for row in payload["rows"]])
+            except Exception:
+                # DB'ye yazılamadı, batch bir sonraki drain'e kalsın
+                os.replace(claimed, path)
+                raise
+            claimed.unlink()
+            files += 1
+        return files, written
+
+
+class _RowEncoder(json.JSONEncoder):
+    def default(self, o):
+        if hasattr(o, "isoformat"):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _decode_row(model, row):
+    for field in model._meta.concrete_fields:
+        if isinstance(field, models.DateTimeField) and isinstance(row.get(field.attname), str):
+            row[field.attname] = parse_datetime(row[field.attname])
+    return row
+
+
+# =========================
+# Background flushing
+# =========================
+
+class _BackgroundFlusher:
+    """Runs self.flush() on a daemon thread every `flush_interval` seconds or when woken"""
+
+    thread_name = "tracking-flush"
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self.pid = os.getpid()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def flush(self):
+        raise NotImplementedError
+
+    def _ensure_thread(self):
+        if self._thread is None and not self._stopped:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name=self.thread_name, daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"{self.thread_name} failed: {e}")
+        # Thread'in kendi DB bağlantısı thread bitince açık kalmasın
+        connections.close_all()
+
+    def close(self):
+        """Stop the thread and flush whatever is still pending"""
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"{self.thread_name} final flush failed: {e}")
+
+
+# =========================
+# Buffer
+# =========================
+
+class EventBuffer(_BackgroundFlusher):
+    """Bounded in-process queue of (model, row) pairs flushed by a background thread"""
+
+    def __init__(self, spool, max_events, flush_size, flush_interval):
+        super().__init__(flush_interval)
+        self.spool = spool
+        self.max_events = max_events
+        self.flush_size = flush_size
+        self.stats = {
+            "accepted": 0,   # buffer'a girenler
+            "dropped": 0,    # buffer dolu olduğu için reddedilenler
+            "written": 0,    # spool'a yazılanlar
+            "rejected": 0,   # flush sırasında geçersiz çıkanlar (silinmiş FK vb.)
+            "batches": 0,
+            "flush_errors": 0,
+        }
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def add(self, model, row):
+        """Queue one event; False means the buffer is full and the event was dropped"""
+        with self._lock:
+            if len(self._events) >= self.max_events:
+                self.stats["dropped"] += 1
+                return False
+            self._events.append((model, row))
+            self.stats["accepted"] += 1
+            pending = len(self._events)
+        self._ensure_thread()
+        if pending >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    def pending(self):
+        return len(self._events)
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "pending": len(self._events)}
+
+    def _take_batch(self):
+        with self._lock:
+            size = min(self.flush_size, len(self._events))
+            return [self._events.popleft() for _ in range(size)]
+
+    def _requeue(self, batch):
+        """Put a batch that could not be shipped back in front, as far as there is room"""
+        with self._lock:
+            room = max(self.max_events - len(self._events), 0)
+            self.stats["dropped"] += max(len(batch) - room, 0)
+            self._events.extendleft(reversed(batch[:room]))
+
+    def flush(self):
+        """Ship everything queued so far; returns the number of rows written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return written
+                by_model = {}
+                for model, row in batch:
+                    by_model.setdefault(model, []).append(row)
+                shipped = set()
+                try:
+                    for model, rows in by_model.items():
+                        count = self.spool.write(model, rows)
+                        shipped.add(model)
+                        written += count
+                        self.stats["written"] += count
+                        self.stats["rejected"] += len(rows) - count
+                        self.stats["batches"] += 1
+                except Exception:
+                    # DB/spool erişilemiyor: olayları geri koy, bir sonraki turda tekrar dene
+                    self.stats["flush_errors"] += 1
+                    self._requeue([(model, row) for model, row in batch if model not in shipped])
+                    raise
+
+
+# =========================
+# Article.view_count
+# =========================
+
+class ViewCountDeltas(_BackgroundFlusher):
+    """
+    Per-process view counts waiting to be added to Article.view_count.
+
+    Every stored ArticleView adds 1 here instead of updating the hot Article
+    row; flush() applies the coalesced deltas with one
+    `view_count = view_count + n` UPDATE per distinct n. Deltas still in
+    memory when a worker dies are lost; reconcile_view_counts repairs that.
+    """
+
+    thread_name = "view-count-flush"
+
+    def __init__(self, flush_interval):
+        super().__init__(flush_interval)
+        self._deltas = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, counts):
+        with self._lock:
+            self._deltas.update(counts)
+        self._ensure_thread()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._deltas)
+
+    def flush(self):
+        """Apply pending deltas; returns the number of views added"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, Counter()
+        if not deltas:
+            return 0
+        by_delta = defaultdict(list)
+        for article_id, delta in deltas.items():
+            by_delta[delta].append(article_id)
+        try:
+            with transaction.atomic():
+                # Satırları id sırasıyla kilitle; aynı makaleleri güncelleyen worker'lar deadlock'a girmesin
+                list(
+                    Article.objects.filter(id__in=deltas).order_by("id")
+                    .select_for_update().values_list("id", flat=True)
+                )
+                for delta, ids in by_delta.items():
+                    Article.objects.filter(id__in=ids).update(view_count=F("view_count") + delta)
+        except Exception:
+            with self._lock:
+                self._deltas.update(deltas)
+            raise
+        return sum(deltas.values())
+
+
+def count_article_views(article_ids):
+    """Queue +1 view for each article id (an iterable, repeats allowed)"""
+    counts = Counter(article_ids)
+    if counts:
+        get_view_count_deltas().add(counts)
+
+
+# =========================
+# Per-worker singletons
+# =========================
+
+_buffer = None
+_view_counts = None
+_singleton_lock = threading.Lock()
+
+
+def buffering_enabled():
+    return settings.TRACKING_BUFFER_ENABLED
+
+
+def get_tracking_buffer():
+    """This worker's EventBuffer, created on first use (after gunicorn forks)"""
+    global _buffer
+    if _buffer is None or _buffer.pid != os.getpid():
+        with _singleton_lock:
+            if _buffer is None or _buffer.pid != os.getpid():
+                _buffer = EventBuffer(
+                    spool=import_string(settings.TRACKING_SPOOL)(),
+                    max_events=settings.TRACKING_BUFFER_MAX_EVENTS,
+                    flush_size=settings.TRACKING_BUFFER_FLUSH_SIZE,
+                    flush_interval=settings.TRACKING_BUFFER_FLUSH_INTERVAL,
+                )
+    return _buffer
+
+
+def get_view_count_deltas():
+    """This worker's ViewCountDeltas, created on first use (after gunicorn forks)"""
+    global _view_counts
+    if _view_counts is None or _view_counts.pid != os.getpid():
+        with _singleton_lock:
+            if _view_counts is None or _view_counts.pid != os.getpid():
+                _view_counts = ViewCountDeltas(settings.VIEW_COUNT_FLUSH_INTERVAL)
+    return _view_counts
+
+
+def record_event(model, row):
+    """Queue a tracking row; False when the buffer applied backpressure"""
+    return get_tracking_buffer().add(model, row)
+
+
+@atexit.register
+def _shutdown():
+    # Önce buffer: yazılan ArticleView'lar view_count delta'larını doldurur
+    for flusher in (_buffer, _view_counts):
+        if flusher is not None and flusher.pid == os.getpid():
+            flusher.close()
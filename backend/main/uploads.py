@@ -0,0 +1,64 @@
+# hardware/backend/main/uploads.py
+"""
+Streaming, content-addressed storage of uploaded media.
+
+Best-list item images, article hero images and the logo/favicon settings
+used to be saved with `default_storage.save(name, ContentFile(f.read()))`,
+which pulled every upload into memory and then wrote it out again. A
+best-list request with many large images held all of them at once.
+
+store_upload() never reads a whole upload:
+
+- the file is hashed (SHA-256) chunk by chunk. Large uploads are already
+  on disk (TemporaryFileUploadHandler, above FILE_UPLOAD_MAX_MEMORY_SIZE),
+  so memory stays at one chunk however many images a request carries.
+- the hash names the file: `<directory>/<hh>/<sha256><ext>`. An identical
+  image uploaded again is not stored twice; the existing path is returned.
+- the UploadedFile itself goes to storage.save(). FileSystemStorage moves
+  a temporary upload into place (or copies it chunk by chunk).
+
+Content-addressed files can be shared between rows, so callers must check
+that nothing else refers to a file before deleting it.
+
+media_url() builds absolute URLs from the request host rather than a
+hard-coded base URL.
+"""
+
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(uploaded_file):
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def content_path(directory, digest, filename):
+    extension = os.path.splitext(filename or "")[1].lower()
+    return f"{directory}/{digest[:2]}/{digest}{extension}"
+
+
+def store_upload(uploaded_file, directory, storage=None):
+    """Store `uploaded_file` under a content-addressed path in `directory` and return that path"""
+    storage = storage or default_storage
+    path = content_path(directory, content_hash(uploaded_file), uploaded_file.name)
+    if storage.exists(path):
+        return path
+    # Aynı içeriği eşzamanlı yükleyen başka bir istek varsa storage ad sonuna ek koyar
+    return storage.save(path, uploaded_file)
+
+
+def media_url(request, path, storage=None):
+    """Absolute URL of a stored file (request host when the storage URL is relative)"""
+    url = (storage or default_storage).url(path)
+    if url.startswith("http") or request is None:
+        return url
+    return request.build_absolute_uri(url)
@@ -49,12 +49,14 @@ urlpatterns = [
     # Articles
     path('articles/', views.ArticleListCreateView.as_view(), name='article-list'),
     path('articles/<slug:slug>/', views.ArticleDetailView.as_view(), name='article-detail'),
+    path('articles/<slug:slug>/comments/', views.article_comment_tree_view, name='article-comment-tree'),
     path('articles/id/<int:pk>/', views.ArticleDetailByIdView.as_view(), name='article-detail-by-id'),
     
     # Comments
     path('comments/', views.CommentListCreateView.as_view(), name='comment-list'),
     path('comments/<int:pk>/', views.CommentDetailView.as_view(), name='comment-detail'),
     path('comments/<int:comment_id>/helpful/', views.helpful_vote_view, name='comment-helpful-vote'),
+    path('reviews/<int:review_id>/helpful/', views.review_helpful_vote_view, name='review-helpful-vote'),
     
     # User Reviews
     path('reviews/', views.UserReviewListCreateView.as_view(), name='review-list'),
@@ -1,6 +1,7 @@
 # hardware/backend/main/views.py
 
 import json
+from datetime import timedelta
 from rest_framework import generics, status, permissions, serializers
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework import permissions, status
@@ -8,8 +9,12 @@ from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
-from django.db.models import Q, Count, Avg
+from django.core.files.storage import default_storage
+from django.db.models import Q, Count, Avg, Sum
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.views.decorators.csrf import csrf_exempt
@@ -22,8 +27,42 @@ from .models_extra import (
     ArticleTag,
     ReviewExtra,
     BestListExtra,
+    DailyArticleStats,
+    DailyCategoryStats,
+    DailyMerchantStats,
+    DailyProductStats,
 )
+from .comment_tree import (
+    DEFAULT_PAGE_SIZE as COMMENT_TREE_PAGE_SIZE,
+    MAX_PAGE_SIZE as COMMENT_TREE_MAX_PAGE_SIZE,
+    cursor_token,
+    load_comment_tree,
+    parse_cursor,
+)
+from .conditional import ConditionalGetMixin, conditional_get
+from .fieldsets import expands, field_selection
 from .filters import *
+from .helpful_votes import COMMENT_VOTES, REVIEW_VOTES, VoteConflict
+from .querysets import (
+    article_queryset,
+    count_subquery,
+    product_queryset,
+    product_prefetches,
+    user_queryset,
+    with_rating,
+)
+from .response_cache import CachedResponseMixin, cache_response, response_cache_stats
+from .rollups import ROLLUP_WINDOW_DAYS, latest_site_stats
+from .search import build_search_query, highlight_html, search_articles, search_products
+from .settings_snapshot import get_settings_snapshot
+from .uploads import media_url, store_upload
+from .tracking import (
+    article_view_event,
+    buffering_enabled,
+    count_article_views,
+    outbound_click_event,
+    record_event,
+)
 from .email_utils import send_verification_email, is_verification_token_valid, verify_user_email
 
 def parse_tags(raw):
@@ -263,8 +302,20 @@ def check_email_verification_status_view(request):
     })
 
 
+# Yanıt cache'i: her görünümün render ettiği modeller (biri değişince cache'i yenilenir)
+PRODUCT_CACHE_MODELS = (
+    Product, Category, Tag, ProductTag, ProductSpec, AffiliateLink, PriceHistory,
+    UserReview, ProductRatingSummary,
+)
+ARTICLE_CACHE_MODELS = (
+    Article, User, ArticleTag, Comment, ReviewExtra, BestListExtra, CompareExtra,
+) + PRODUCT_CACHE_MODELS
+
+
 # Category Views
-class CategoryListCreateView(generics.ListCreateAPIView):
+class CategoryListCreateView(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
+    # Sayılar category_tree'den: makale/ürün eklenince de değişir
+    cache_models = (Category, Article, Product)
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -275,7 +326,8 @@ class CategoryListCreateView(generics.ListCreateAPIView):
     ordering = ['sort_order', 'name']
 
 
-class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CategoryDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    validator_models = (Category, Article, Product)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -293,7 +345,8 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # Tag Views
-class TagListCreateView(generics.ListCreateAPIView):
+class TagListCreateView(CachedResponseMixin, generics.ListCreateAPIView):
+    cache_models = (Tag, ArticleTag, ProductTag)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -340,16 +393,23 @@ class TagDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # Product Views
-class ProductListCreateView(generics.ListCreateAPIView):
-    queryset = Product.objects.all()
+class ProductListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
+    validator_models = PRODUCT_CACHE_MODELS
+    queryset = product_queryset()
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_class = ProductFilter
     search_fields = ['brand', 'model', 'description']
-    ordering_fields = ['brand', 'model', 'release_year', 'created_at']
+    ordering_fields = ['brand', 'model', 'release_year', 'created_at', 'search_rank', 'rating', 'rating_count']
     ordering = ['-created_at']
 
+    def get_base_queryset(self):
+        return Product.objects.all()
+
+    def get_queryset(self):
+        return with_rating(product_queryset(self.get_base_queryset(), selection=field_selection(self.request)))
+
     def create(self, request, *args, **kwargs):
         print(f"ProductListCreateView - Request content type: {request.content_type}")
         print(f"ProductListCreateView - Request data: {request.data}")
@@ -357,19 +417,27 @@ class ProductListCreateView(generics.ListCreateAPIView):
         return super().create(request, *args, **kwargs)
 
 
-class ProductDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Product.objects.all()
-    serializer_class = ProductSerializer
+class ProductDetailView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_models = PRODUCT_CACHE_MODELS
+    queryset = product_queryset()
+    serializer_class = ProductDetailSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
 
+    def get_queryset(self):
+        return product_queryset(selection=field_selection(self.request), reviews=True)
 
-class ProductDetailByIdView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Product.objects.all()
-    serializer_class = ProductSerializer
+
+class ProductDetailByIdView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    validator_models = PRODUCT_CACHE_MODELS
+    queryset = product_queryset()
+    serializer_class = ProductDetailSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'pk'
 
+    def get_queryset(self):
+        return product_queryset(selection=field_selection(self.request), reviews=True)
+
     def update(self, request, *args, **kwargs):
         print(f"ProductDetailByIdView UPDATE - Request content type: {request.content_type}")
         print(f"ProductDetailByIdView UPDATE - Request data: {request.data}")
@@ -384,18 +452,18 @@ class ProductDetailByIdView(generics.RetrieveUpdateDestroyAPIView):
             print(f"ProductDetailByIdView UPDATE - Error: {str(e)}")
             raise
 
-class ArticleListCreateView(generics.ListCreateAPIView):
-    queryset = Article.objects.filter(status="PUBLISHED")
+class ArticleListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
+    validator_models = ARTICLE_CACHE_MODELS
+    queryset = article_queryset(Article.objects.filter(status="PUBLISHED"))
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
     filterset_class = ArticleFilter
     search_fields = ["title", "subtitle", "excerpt", "content"]
-    ordering_fields = ["title", "published_at", "created_at"]
+    ordering_fields = ["title", "published_at", "created_at", "search_rank"]
     ordering = ["-published_at", "-created_at"]
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    def get_base_queryset(self):
         # Admin, super admin and editors can see all articles
         user = self.request.user
         if user.is_authenticated and getattr(user, "role", None) in [
@@ -403,8 +471,11 @@ class ArticleListCreateView(generics.ListCreateAPIView):
             "SUPER_ADMIN",
             "EDITOR",
         ]:
-            queryset = Article.objects.all()
-        return queryset
+            return Article.objects.all()
+        return Article.objects.filter(status="PUBLISHED")
+
+    def get_queryset(self):
+        return article_queryset(self.get_base_queryset(), selection=field_selection(self.request))
 
     def perform_create(self, serializer):
         # Automatically set the author to the current user
@@ -502,26 +573,9 @@ class ArticleListCreateView(generics.ListCreateAPIView):
                         and hasattr(image_file, "size")
                         and image_file.size > 0
                     ):
-                        from django.core.files.storage import default_storage
-                        from django.core.files.base import ContentFile
-                        import os
-                        import uuid
-
-                        file_extension = os.path.splitext(image_file.name)[1]
-                        unique_filename = (
-                            f"best_list_items/{uuid.uuid4()}{file_extension}"
-                        )
-
-                        file_path = default_storage.save(
-                            unique_filename, ContentFile(image_file.read())
-                        )
-                        image_url = default_storage.url(file_path)
-
-                        if not image_url.startswith("http"):
-                            base_url = "http://localhost:8000"
-                            image_url = f"{base_url}{image_url}"
-
-                        processed_item["image"] = image_url
+                        # Belleğe okunmadan, içerik adresli yola (aynı görsel tek kopya)
+                        file_path = store_upload(image_file, "best_list_items")
+                        processed_item["image"] = media_url(self.request, file_path)
 
                 processed_items.append(processed_item)
 
@@ -534,12 +588,16 @@ class ArticleListCreateView(generics.ListCreateAPIView):
 
 
 
-class ArticleDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Article.objects.all()
+class ArticleDetailView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_models = ARTICLE_CACHE_MODELS
+    queryset = article_queryset(Article.objects.all())
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = "slug"
 
+    def get_queryset(self):
+        return article_queryset(Article.objects.all(), selection=field_selection(self.request))
+
     def retrieve(self, request, *args, **kwargs):
         response = super().retrieve(request, *args, **kwargs)
 
@@ -557,12 +615,16 @@ class ArticleDetailView(generics.RetrieveUpdateDestroyAPIView):
         return response
 
 
-class ArticleDetailByIdView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Article.objects.all()
+class ArticleDetailByIdView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    validator_models = ARTICLE_CACHE_MODELS
+    queryset = article_queryset(Article.objects.all())
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = "pk"  # Use primary key instead of slug
 
+    def get_queryset(self):
+        return article_queryset(Article.objects.all(), selection=field_selection(self.request))
+
     def perform_update(self, serializer):
         article = serializer.save()
 
@@ -651,6 +713,41 @@ class CommentListCreateView(generics.ListCreateAPIView):
         return ip
 
 
+@api_view(["GET"])
+@permission_classes([permissions.AllowAny])
+@conditional_get(lambda request: Comment.objects.filter(status="APPROVED"), Comment, HelpfulVote, User)
+@cache_response(Comment, HelpfulVote, User)
+def article_comment_tree_view(request, slug):
+    """Approved comments of an article as threads; ?cursor= pages through top-level comments"""
+    article_id = Article.objects.filter(slug=slug).values_list("id", flat=True).first()
+    if article_id is None:
+        return Response({"error": "Article not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    cursor = None
+    token = request.query_params.get("cursor")
+    if token:
+        try:
+            cursor = parse_cursor(token)
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page_size = int(request.query_params.get("page_size", COMMENT_TREE_PAGE_SIZE))
+    except ValueError:
+        page_size = COMMENT_TREE_PAGE_SIZE
+    page_size = max(1, min(page_size, COMMENT_TREE_MAX_PAGE_SIZE))
+
+    page = load_comment_tree(article_id, cursor, page_size)
+    next_link = None
+    if page.next_cursor is not None:
+        next_link = replace_query_param(
+            request.build_absolute_uri(), "cursor", cursor_token(page.next_cursor)
+        )
+    return Response({
+        "next": next_link,
+        "results": CommentTreeSerializer(page.roots, many=True, context={"request": request}).data,
+    })
+
+
 class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
@@ -700,15 +797,24 @@ class UserReviewListCreateView(generics.ListCreateAPIView):
         # For public access, only show APPROVED reviews
         # For authenticated users, show all their reviews
         # For admin requests, show all reviews
+        selection = field_selection(self.request)
+        queryset = UserReview.objects.all()
+        if expands(selection, 'user'):
+            queryset = queryset.select_related('user')
+        if expands(selection, 'product'):
+            product_selection = selection.child('product') if selection else None
+            queryset = queryset.select_related('product').prefetch_related(
+                *product_prefetches('product', product_selection)
+            )
         if admin_request or (self.request.user.is_authenticated and hasattr(self.request.user, 'role') and self.request.user.role == 'ADMIN'):
-            return UserReview.objects.all()
+            return queryset
         elif self.request.user.is_authenticated:
             # If user is filtering by their own user ID, show all their reviews
             user_id = self.request.query_params.get('user')
             if user_id and str(user_id) == str(self.request.user.id):
-                return UserReview.objects.all()
+                return queryset
         # Default: only show APPROVED reviews
-        return UserReview.objects.filter(status='APPROVED')
+        return queryset.filter(status='APPROVED')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -740,7 +846,9 @@ class FavoriteListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Favorite.objects.filter(user=self.request.user)
+        return Favorite.objects.filter(user=self.request.user).select_related(
+            'product'
+        ).prefetch_related(*product_prefetches('product'))
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -765,20 +873,28 @@ def search_view(request):
     if not query:
         return Response({'success': False, 'error': 'Query parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Search in articles
-    articles = Article.objects.filter(
-        Q(title__icontains=query) | 
-        Q(subtitle__icontains=query) | 
-        Q(excerpt__icontains=query),
-        status='PUBLISHED'
-    )[:10]
-
-    # Search in products
-    products = Product.objects.filter(
-        Q(brand__icontains=query) | 
-        Q(model__icontains=query) | 
-        Q(description__icontains=query)
-    )[:10]
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', 10)), 1), 50)
+    except ValueError:
+        return Response({'success': False, 'error': 'Invalid page or page_size'}, status=status.HTTP_400_BAD_REQUEST)
+    offset = (page - 1) * page_size
+
+    # Articles & products: tsvector + GIN index, rank sıralı (bkz. search.py)
+    search_query = build_search_query(query)
+    if search_query is not None:
+        matching_articles = search_articles(
+            article_queryset(Article.objects.filter(status='PUBLISHED')), search_query
+        )
+        matching_products = search_products(product_queryset(), search_query)
+        articles_total = matching_articles.count()
+        products_total = matching_products.count()
+        articles = list(matching_articles[offset:offset + page_size])
+        products = list(matching_products[offset:offset + page_size])
+    else:
+        articles_total = products_total = 0
+        articles = []
+        products = []
 
     # Search in categories
     categories = Category.objects.filter(
@@ -788,34 +904,42 @@ def search_view(request):
     )[:10]
 
     # Search in users (only if profile is visible)
-    # Önce tüm kullanıcıları bul
-    all_users = User.objects.filter(
+    # Gizlilik filtresi SQL'de (profile_visible kolonu), isimler trigram indeksli; tek sorgu, LIMIT 10
+    users = list(User.objects.filter(
         Q(first_name__icontains=query) | 
         Q(last_name__icontains=query) |
-        Q(username__icontains=query)
-    )
-    
-    # Sonra privacy ayarlarına göre filtrele
-    users = []
-    for user in all_users:
-        # Eğer privacy_settings yoksa veya profile_visible True ise ekle
-        if not user.privacy_settings or user.privacy_settings.get('profile_visible', True):
-            users.append(user)
-            if len(users) >= 10:
-                break
+        Q(username__icontains=query),
+        profile_visible=True,
+    )[:10])
 
     print(f"Found {len(users)} users")
-    for user in users:
-        print(f"User: {user.first_name} {user.last_name} - Privacy: {user.privacy_settings}")
+
+    article_data = ArticleSerializer(articles, many=True).data
+    for item, article in zip(article_data, articles):
+        item['search_rank'] = article.search_rank
+        item['title_highlight'] = highlight_html(article.title_highlight)
+        item['excerpt_highlight'] = highlight_html(article.excerpt_highlight)
+
+    product_data = ProductSerializer(products, many=True).data
+    for item, product in zip(product_data, products):
+        item['search_rank'] = product.search_rank
+        item['model_highlight'] = highlight_html(product.model_highlight)
+        item['description_highlight'] = highlight_html(product.description_highlight)
 
     return Response({
         'success': True,
         'data': {
-            'articles': ArticleSerializer(articles, many=True).data,
-            'products': ProductSerializer(products, many=True).data,
+            'articles': article_data,
+            'products': product_data,
             'categories': CategorySerializer(categories, many=True).data,
             'users': UserSearchSerializer(users, many=True).data,
-        }
+        },
+        'pagination': {
+            'page': page,
+            'page_size': page_size,
+            'articles_total': articles_total,
+            'products_total': products_total,
+        },
     })
 
 
@@ -830,17 +954,22 @@ def analytics_view(request):
             status=status.HTTP_403_FORBIDDEN,
         )
 
-    from django.db.models import Count
+    # Sayılar rollup tablolarından gelir (bkz. rollups.py / rollup_analytics);
+    # ham ArticleView / OutboundClick tablolarına dokunulmaz.
+    stats = latest_site_stats()
+    today = timezone.localdate()
+    snapshot_day = stats.date if stats else today
+    since = today - timedelta(days=ROLLUP_WINDOW_DAYS - 1)
 
     # ---- Overview sayıları ----
-    total_articles = Article.objects.count()
-    total_products = Product.objects.count()
-    total_users = User.objects.count()
-    total_reviews = UserReview.objects.count()
-    total_affiliate_links = AffiliateLink.objects.count()
-    total_comments = Comment.objects.filter(status="APPROVED").count()
+    total_articles = stats.total_articles if stats else 0
+    total_products = stats.total_products if stats else 0
+    total_users = stats.total_users if stats else 0
+    total_reviews = stats.total_reviews if stats else 0
+    total_affiliate_links = stats.total_affiliate_links if stats else 0
+    total_comments = stats.approved_comments if stats else 0
 
-    published_articles = Article.objects.filter(status="PUBLISHED").count()
+    published_articles = stats.published_articles if stats else 0
 
     avg_reviews_per_product = (
         round(total_reviews / total_products, 2) if total_products > 0 else 0
@@ -850,16 +979,15 @@ def analytics_view(request):
     )
 
     # ---- Son makaleler ----
+    # 5 satır; sayılar korelasyonlu alt sorgu ile aynı sorguda
     recent_articles_qs = (
         Article.objects.select_related("author")
+        .annotate(comments_count=count_subquery(Comment, "article", status="APPROVED"))
         .order_by("-created_at")[:5]
     )
 
     recent_articles = []
     for a in recent_articles_qs:
-        comments_count = Comment.objects.filter(
-            article=a, status="APPROVED"
-        ).count()
         recent_articles.append(
             {
                 "id": a.id,
@@ -870,24 +998,23 @@ def analytics_view(request):
                     else ""
                 ),
                 "createdAt": a.created_at.isoformat() if a.created_at else "",
-                "commentsCount": comments_count,
+                "commentsCount": a.comments_count,
             }
         )
 
     # ---- Son ürünler ----
     recent_products_qs = (
         Product.objects.select_related("category")
+        .defer("search_vector")
+        .annotate(
+            reviews_count=count_subquery(UserReview, "product", status="APPROVED"),
+            affiliate_links_count=count_subquery(AffiliateLink, "product", active=True),
+        )
         .order_by("-created_at")[:5]
     )
 
     recent_products = []
     for p in recent_products_qs:
-        reviews_count = UserReview.objects.filter(
-            product=p, status="APPROVED"
-        ).count()
-        affiliate_links_count = AffiliateLink.objects.filter(
-            product=p, active=True
-        ).count()
         recent_products.append(
             {
                 "id": p.id,
@@ -895,27 +1022,31 @@ def analytics_view(request):
                 "model": p.model,
                 "category": p.category.name if getattr(p, "category", None) else "",
                 "createdAt": p.created_at.isoformat() if p.created_at else "",
-                "reviewsCount": reviews_count,
-                "affiliateLinksCount": affiliate_links_count,
+                "reviewsCount": p.reviews_count,
+                "affiliateLinksCount": p.affiliate_links_count,
             }
         )
 
     # ---- Top kategoriler ----
+    category_traffic = {
+        row["category_id"]: row
+        for row in DailyCategoryStats.objects.filter(date__gte=since)
+        .values("category_id")
+        .annotate(views=Sum("views"), clicks=Sum("clicks"))
+    }
     top_categories = []
-    for c in Category.objects.all():
-        articles_count = Article.objects.filter(
-            category=c, status="PUBLISHED"
-        ).count()
-        products_count = Product.objects.filter(category=c).count()
-        total_content = articles_count + products_count
+    for row in DailyCategoryStats.objects.filter(date=snapshot_day).select_related("category"):
+        traffic = category_traffic.get(row.category_id, {})
         top_categories.append(
             {
-                "id": c.id,
-                "name": c.name,
-                "slug": c.slug,
-                "articlesCount": articles_count,
-                "productsCount": products_count,
-                "totalContent": total_content,
+                "id": row.category_id,
+                "name": row.category.name,
+                "slug": row.category.slug,
+                "articlesCount": row.published_articles,
+                "productsCount": row.products,
+                "totalContent": row.published_articles + row.products,
+                "viewsLast30Days": traffic.get("views", 0),
+                "clicksLast30Days": traffic.get("clicks", 0),
             }
         )
 
@@ -923,16 +1054,53 @@ def analytics_view(request):
     top_categories.sort(key=lambda x: x["totalContent"], reverse=True)
 
     # ---- Affiliate merchant istatistikleri ----
+    merchant_clicks = dict(
+        DailyMerchantStats.objects.filter(date__gte=since)
+        .values("merchant")
+        .annotate(clicks=Sum("clicks"))
+        .values_list("merchant", "clicks")
+    )
     merchants = (
-        AffiliateLink.objects.values("merchant")
-        .annotate(links_count=Count("id"))
-        .order_by("-links_count")[:10]
+        DailyMerchantStats.objects.filter(date=snapshot_day, links__gt=0)
+        .order_by("-links")[:10]
     )
     affiliate_merchants = [
-        {"name": m["merchant"], "linksCount": m["links_count"]}
+        {
+            "name": m.merchant,
+            "linksCount": m.links,
+            "clicksLast30Days": merchant_clicks.get(m.merchant, 0),
+        }
         for m in merchants
     ]
 
+    # ---- En çok okunan / tıklanan (son 30 gün) ----
+    top_articles = [
+        {
+            "id": row["article_id"],
+            "title": row["article__title"],
+            "slug": row["article__slug"],
+            "viewsLast30Days": row["views"],
+            "clicksLast30Days": row["clicks"],
+        }
+        for row in DailyArticleStats.objects.filter(date__gte=since)
+        .values("article_id", "article__title", "article__slug")
+        .annotate(views=Sum("views"), clicks=Sum("clicks"))
+        .order_by("-views")[:10]
+    ]
+    top_products = [
+        {
+            "id": row["product_id"],
+            "brand": row["product__brand"],
+            "model": row["product__model"],
+            "slug": row["product__slug"],
+            "clicksLast30Days": row["clicks"],
+        }
+        for row in DailyProductStats.objects.filter(date__gte=since)
+        .values("product_id", "product__brand", "product__model", "product__slug")
+        .annotate(clicks=Sum("clicks"))
+        .order_by("-clicks")[:10]
+    ]
+
     data = {
         "overview": {
             "totalArticles": total_articles,
@@ -950,16 +1118,31 @@ def analytics_view(request):
         },
         "topCategories": top_categories,
         "affiliateMerchants": affiliate_merchants,
+        "topArticles": top_articles,
+        "topProducts": top_products,
+        "generatedAt": stats.snapshot_at.isoformat() if stats else None,
     }
 
     return Response({"success": True, "data": data})
 
 
 
+def buffered_tracking_response(accepted):
+    # Buffer doluysa istemciye geri çekilmesini söyle (backpressure)
+    if not accepted:
+        response = Response({'success': False, 'error': 'Tracking is busy, retry later'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '5'
+        return response
+    return Response({'success': True})
+
+
 # Outbound Click Tracking
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def track_outbound_click(request):
+    if buffering_enabled():
+        return buffered_tracking_response(record_event(OutboundClick, outbound_click_event(request)))
+
     serializer = OutboundClickSerializer(data=request.data)
     if serializer.is_valid():
         serializer.save(
@@ -977,6 +1160,9 @@ def track_outbound_click(request):
 def track_article_view(request):
     from datetime import datetime, timedelta
     from django.utils import timezone
+
+    if buffering_enabled():
+        return buffered_tracking_response(record_event(ArticleView, article_view_event(request)))
     
     serializer = ArticleViewSerializer(data=request.data)
     if serializer.is_valid():
@@ -985,12 +1171,13 @@ def track_article_view(request):
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         
         # Save every view - no duplicate restrictions
-        serializer.save(
+        view = serializer.save(
             user=request.user if request.user.is_authenticated else None,
             ip_address=ip_address,
             user_agent=user_agent,
             referer=request.META.get('HTTP_REFERER', '')
         )
+        count_article_views([view.article_id])
         return Response({'success': True})
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -1037,50 +1224,13 @@ def monthly_analytics_view(request):
     except ValueError:
         return Response({'error': 'Invalid year or month format'}, status=status.HTTP_400_BAD_REQUEST)
     
-    # Get or create monthly analytics record
-    analytics, created = MonthlyAnalytics.objects.get_or_create(
-        year=year,
-        month=month,
-        defaults={
-            'total_views': 0,
-            'total_affiliate_clicks': 0,
-            'total_users': 0
-        }
-    )
-    
-    # Calculate actual counts for this month
-    from django.db.models import Count
-    from datetime import datetime, timezone
-    
-    # Count article views for this month
-    start_date = datetime(year, month, 1, tzinfo=timezone.utc)
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
-    else:
-        end_date = datetime(year, month + 1, 1, tzinfo=timezone.utc)
-    
-    views_count = ArticleView.objects.filter(
-        created_at__gte=start_date,
-        created_at__lt=end_date
-    ).count()
-    
-    # Count affiliate clicks for this month
-    clicks_count = OutboundClick.objects.filter(
-        created_at__gte=start_date,
-        created_at__lt=end_date
-    ).count()
-    
-    # Count new users for this month
-    users_count = User.objects.filter(
-        created_at__gte=start_date,
-        created_at__lt=end_date
-    ).count()
-    
-    # Update analytics record
-    analytics.total_views = views_count
-    analytics.total_affiliate_clicks = clicks_count
-    analytics.total_users = users_count
-    analytics.save()
+    if not 1 <= month <= 12:
+        return Response({'error': 'Invalid year or month format'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # rollup_analytics tarafından günlük rollup'lardan doldurulur; GET yazmaz
+    analytics = MonthlyAnalytics.objects.filter(year=year, month=month).first()
+    if analytics is None:
+        analytics = MonthlyAnalytics(year=year, month=month)
     
     serializer = MonthlyAnalyticsSerializer(analytics)
     return Response(serializer.data)
@@ -1098,7 +1248,9 @@ class UserFavoritesView(generics.ListAPIView):
         if self.request.user.id != user_id:
             return Favorite.objects.none()
         
-        queryset = Favorite.objects.filter(user_id=user_id).select_related('product', 'product__category')
+        queryset = Favorite.objects.filter(user_id=user_id).select_related('product').prefetch_related(
+            *product_prefetches('product')
+        )
         
         # Filter by product if product parameter is provided
         product_id = self.request.query_params.get('product')
@@ -1245,6 +1397,7 @@ class UserSettingsView(generics.RetrieveUpdateAPIView):
         
         print(f"Privacy data: {privacy_data}")
         user.privacy_settings.update(privacy_data)
+        # aramada kullanılan profile_visible kolonu user.save() içinde güncellenir
         
         # Update general settings
         if not user.settings:
@@ -1352,51 +1505,35 @@ class UserActivityView(generics.ListAPIView):
 
 
 # Helpful Vote Views
-@api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
-def helpful_vote_view(request, comment_id):
-    """Vote for a comment as helpful"""
+def _toggle_helpful_vote(request, counter, target_id, not_found):
     try:
-        comment = Comment.objects.get(id=comment_id)
-        
-        # Check if user already voted
-        existing_vote = HelpfulVote.objects.filter(
-            comment=comment,
-            user=request.user
-        ).first()
-        
-        if existing_vote:
-            # Remove existing vote
-            existing_vote.delete()
-            action = 'removed'
-        else:
-            # Create new vote
-            HelpfulVote.objects.create(
-                comment=comment,
-                user=request.user,
-                ip_address=request.META.get('REMOTE_ADDR')
-            )
-            action = 'added'
-        
-        # Get updated helpful count
-        helpful_count = comment.helpful_votes.count()
-        
-        return Response({
-            'success': True,
-            'action': action,
-            'helpful_count': helpful_count
-        })
-        
-    except Comment.DoesNotExist:
-        return Response(
-            {'error': 'Comment not found'}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
-    except Exception as e:
+        action, helpful_count = counter.toggle(target_id, request.user, request.META.get('REMOTE_ADDR'))
+    except counter.target_model.DoesNotExist:
+        return Response({'error': not_found}, status=status.HTTP_404_NOT_FOUND)
+    except VoteConflict:
         return Response(
-            {'error': str(e)}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {'error': 'A vote from this IP address already exists'},
+            status=status.HTTP_409_CONFLICT
         )
+    return Response({
+        'success': True,
+        'action': action,
+        'helpful_count': helpful_count
+    })
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def helpful_vote_view(request, comment_id):
+    """Vote for a comment as helpful (a second vote removes it)"""
+    return _toggle_helpful_vote(request, COMMENT_VOTES, comment_id, 'Comment not found')
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def review_helpful_vote_view(request, review_id):
+    """Vote for a user review as helpful (a second vote removes it)"""
+    return _toggle_helpful_vote(request, REVIEW_VOTES, review_id, 'Review not found')
 
 
 # Users View
@@ -1416,7 +1553,7 @@ class UserListCreateView(generics.ListCreateAPIView):
         # Only admin or super admin can see all users
         if not hasattr(self.request.user, 'role') or self.request.user.role not in ['ADMIN', 'SUPER_ADMIN']:
             return User.objects.none()
-        return User.objects.prefetch_related('authored_articles', 'comments').all()
+        return user_queryset(field_selection(self.request))
     
     def list(self, request, *args, **kwargs):
         # Use the parent class's list method to get paginated response
@@ -1582,9 +1719,28 @@ class SettingDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().get_queryset()
 
 
+# Dosya olarak saklanan ayarlar (settings_bulk_view)
+SETTING_FILE_KEYS = ("logo", "favicon")
+
+
+def _delete_replaced_setting_file(key, new_value=""):
+    """Delete the file setting `key` pointed to, unless it is kept or another setting uses it"""
+    old_setting = Setting.objects.filter(key=key, is_file=True).first()
+    if not old_setting or not old_setting.value or old_setting.value == new_value:
+        return
+    # İçerik adresli dosyalar paylaşılabilir (aynı görsel hem logo hem favicon)
+    if Setting.objects.filter(value=old_setting.value).exclude(key=key).exists():
+        return
+    old_file_path = old_setting.value.replace(settings.MEDIA_URL, "", 1)
+    if default_storage.exists(old_file_path):
+        default_storage.delete(old_file_path)
+        print(f"Deleted old {key} file: {old_file_path}")
+
+
 @csrf_exempt
 @api_view(["GET", "POST"])
 @permission_classes([permissions.IsAuthenticated])
+@conditional_get(lambda request: Setting.objects.all(), Setting)
 def settings_bulk_view(request):
     """Bulk get/set settings"""
     print("=== DJANGO SETTINGS BULK VIEW DEBUG ===")
@@ -1605,58 +1761,11 @@ def settings_bulk_view(request):
         )
 
     if request.method == "GET":
-        # Get all settings grouped by category
-        settings = Setting.objects.all().order_by("category", "key")
-        grouped_settings: dict[str, dict[str, dict]] = {}
-
-        for setting in settings:
-            if setting.category not in grouped_settings:
-                grouped_settings[setting.category] = {}
-
-            cleaned_value = setting.value
-
-            # ✅ Güvenli string kontrolü: None veya bool gelirse patlamasın
-            if isinstance(cleaned_value, str) and (
-                cleaned_value.startswith("{'value':")
-                or cleaned_value.startswith('{"value":')
-            ):
-                # This looks like a nested object stored as string, try to extract the actual value
-                try:
-                    import json
-                    import ast
-
-                    # Try JSON first
-                    try:
-                        nested_obj = json.loads(cleaned_value.replace("'", '"'))
-                        if isinstance(nested_obj, dict) and "value" in nested_obj:
-                            cleaned_value = nested_obj["value"]
-                            print(
-                                f"Cleaned nested JSON value for {setting.key}: "
-                                f"{cleaned_value}"
-                            )
-                    except Exception:
-                        # Try ast.literal_eval for Python dict strings
-                        try:
-                            nested_obj = ast.literal_eval(cleaned_value)
-                            if isinstance(nested_obj, dict) and "value" in nested_obj:
-                                cleaned_value = nested_obj["value"]
-                                print(
-                                    f"Cleaned nested dict value for {setting.key}: "
-                                    f"{cleaned_value}"
-                                )
-                        except Exception:
-                            print(
-                                f"Could not clean nested value for {setting.key}: "
-                                f"{cleaned_value}"
-                            )
-                except Exception as e:
-                    print(f"Error cleaning value for {setting.key}: {e}")
-
-            grouped_settings[setting.category][setting.key] = {
-                "value": cleaned_value,
-                "description": setting.description,
-                "is_file": setting.is_file,
-            }
+        # Değerler yazılırken normalize edilir; snapshot süreç başına bir kez yüklenir
+        grouped_settings: dict[str, dict[str, dict]] = {
+            category: dict(category_settings)
+            for category, category_settings in get_settings_snapshot().grouped.items()
+        }
 
         # Ensure default categories exist with default values
         default_settings = {
@@ -1771,9 +1880,6 @@ def settings_bulk_view(request):
         
 
     # ---------- POST (bulk update) ----------
-    from django.core.files.storage import default_storage
-    from django.core.files.base import ContentFile
-    import os
     import json
 
     print("=== SETTINGS BULK UPDATE DEBUG ===")
@@ -1804,6 +1910,7 @@ def settings_bulk_view(request):
 
     print(f"Logo file: {logo_file}")
     print(f"Favicon file: {favicon_file}")
+    uploads_by_key = {"logo": logo_file, "favicon": favicon_file}
 
     for category, category_settings in settings_data.items():
         updated_settings[category] = {}
@@ -1811,81 +1918,18 @@ def settings_bulk_view(request):
             is_file = False
             final_value = str(value)
 
-            # Handle logo removal (empty string means remove)
-            if key == "logo" and str(value) == "" and not logo_file:
-                try:
-                    old_setting = Setting.objects.get(key="logo")
-                    if old_setting.value and old_setting.is_file:
-                        old_file_path = old_setting.value.replace("/media/", "")
-                        if default_storage.exists(old_file_path):
-                            default_storage.delete(old_file_path)
-                            print(f"Deleted old logo file: {old_file_path}")
-                except Setting.DoesNotExist:
-                    pass
+            # Handle logo/favicon removal (empty string means remove)
+            if key in SETTING_FILE_KEYS and str(value) == "" and not uploads_by_key[key]:
+                _delete_replaced_setting_file(key)
                 final_value = ""
                 is_file = True
 
-            # Handle favicon removal (empty string means remove)
-            elif key == "favicon" and str(value) == "" and not favicon_file:
-                try:
-                    old_setting = Setting.objects.get(key="favicon")
-                    if old_setting.value and old_setting.is_file:
-                        old_file_path = old_setting.value.replace("/media/", "")
-                        if default_storage.exists(old_file_path):
-                            default_storage.delete(old_file_path)
-                            print(f"Deleted old favicon file: {old_file_path}")
-                except Setting.DoesNotExist:
-                    pass
-                final_value = ""
-                is_file = True
-
-            # Handle file uploads (logo)
-            elif key == "logo" and logo_file:
-                file_extension = os.path.splitext(logo_file.name)[1]
-                unique_filename = f"settings/logo{file_extension}"
-
-                try:
-                    old_setting = Setting.objects.get(key="logo")
-                    if old_setting.value and old_setting.is_file:
-                        old_file_path = old_setting.value.replace("/media/", "")
-                        if default_storage.exists(old_file_path):
-                            default_storage.delete(old_file_path)
-                except Setting.DoesNotExist:
-                    pass
-
-                file_path = default_storage.save(
-                    unique_filename, ContentFile(logo_file.read())
-                )
-                if file_path.startswith("settings/"):
-                    final_value = f"/media/{file_path}"
-                else:
-                    final_value = f"/media/settings/{file_path}"
+            # Handle file uploads (logo/favicon): içerik adresli yola akıtılır (uploads.py)
+            elif key in SETTING_FILE_KEYS and uploads_by_key[key]:
+                final_value = default_storage.url(store_upload(uploads_by_key[key], "settings"))
+                _delete_replaced_setting_file(key, final_value)
                 is_file = True
-                print(f"Logo saved to: {final_value}")
-
-            # Handle file uploads (favicon)
-            elif key == "favicon" and favicon_file:
-                file_extension = os.path.splitext(favicon_file.name)[1]
-                unique_filename = f"settings/favicon{file_extension}"
-
-                try:
-                    old_setting = Setting.objects.get(key="favicon")
-                    if old_setting.value and old_setting.is_file:
-                        old_file_path = old_setting.value.replace("/media/", "")
-                        if default_storage.exists(old_file_path):
-                            default_storage.delete(old_file_path)
-                except Setting.DoesNotExist:
-                    pass
-
-                file_path = default_storage.save(
-                    unique_filename, ContentFile(favicon_file.read())
-                )
-                if file_path.startswith("settings/"):
-                    final_value = f"/media/{file_path}"
-                else:
-                    final_value = f"/media/settings/{file_path}"
-                is_file = True
-                print(f"Favicon saved to: {final_value}")
+                print(f"{key.capitalize()} saved to: {final_value}")
 
             # Create or update setting
             setting, created = Setting.objects.get_or_create(
@@ -1915,6 +1959,8 @@ def settings_bulk_view(request):
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@conditional_get(lambda request: Setting.objects.all(), Setting)
+@cache_response(Setting)
 def public_settings_view(request):
     """Get public settings that can be accessed without authentication"""
     try:
@@ -1933,14 +1979,16 @@ def public_settings_view(request):
             'seo_keywords'
         ]
         
-        settings = Setting.objects.filter(key__in=public_setting_keys)
+        snapshot = get_settings_snapshot()
         public_settings = {}
         
-        for setting in settings:
-            public_settings[setting.key] = {
-                'value': setting.value,
-                'is_file': setting.is_file
-            }
+        for key in public_setting_keys:
+            setting = snapshot.settings.get(key)
+            if setting is not None:
+                public_settings[key] = {
+                    'value': setting.value,
+                    'is_file': setting.is_file
+                }
         
         # Set default values if settings don't exist
         defaults = {
@@ -2092,7 +2140,9 @@ class ProductReviewsView(generics.ListCreateAPIView):
         product_id = self.kwargs['product_id']
         try:
             product = Product.objects.get(id=product_id)
-            return UserReview.objects.filter(product=product, status='APPROVED').order_by('-created_at')
+            return UserReview.objects.filter(product=product, status='APPROVED').select_related(
+                'user', 'product'
+            ).prefetch_related(*product_prefetches('product')).order_by('-created_at')
         except Product.DoesNotExist:
             return UserReview.objects.none()
     
@@ -2204,6 +2254,7 @@ class DatabaseStatsView(APIView):
             return Response({
                 'success': True,
                 'tables': stats,
+                'response_cache': response_cache_stats(),
                 'database_info': {
                     'version': db_version,
                     'size_bytes': db_size,
@@ -2216,7 +2267,8 @@ class DatabaseStatsView(APIView):
             return Response({'error': f'Error getting database stats: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class ProductReviewsBySlugView(generics.ListCreateAPIView):
+class ProductReviewsBySlugView(CachedResponseMixin, generics.ListCreateAPIView):
+    cache_models = (User,) + PRODUCT_CACHE_MODELS
     serializer_class = UserReviewSerializer
     permission_classes = [permissions.AllowAny]  # Public access for reading reviews
     
@@ -2229,7 +2281,9 @@ class ProductReviewsBySlugView(generics.ListCreateAPIView):
         try:
             product = Product.objects.get(slug=slug)
             print(f"Product found: {product}")
-            reviews = UserReview.objects.filter(product=product, status='APPROVED').order_by('-created_at')
+            reviews = UserReview.objects.filter(product=product, status='APPROVED').select_related(
+                'user', 'product'
+            ).prefetch_related(*product_prefetches('product')).order_by('-created_at')
             print(f"Approved reviews found: {reviews.count()}")
             for review in reviews:
                 print(f"Review: {review.id} - Status: {review.status} - Title: {review.title}")
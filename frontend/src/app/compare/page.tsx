@@ -255,16 +255,7 @@ export default function ComparePage() {
     setSelectedSubCategory(categoryId);
   };
 
-  const getAverageRating = (product: Product) => {
-    const reviews =
-      ((product as any).user_reviews as Array<{ rating: number }> | undefined) ??
-      [];
-    if (!Array.isArray(reviews) || reviews.length === 0) return 0;
-    return (
-      reviews.reduce((sum, review) => sum + review.rating, 0) /
-      reviews.length
-    );
-  };
+  const getAverageRating = (product: Product) => product.average_rating ?? 0;
 
   const getAllSpecs = () => {
     const allSpecNames = new Set<string>();
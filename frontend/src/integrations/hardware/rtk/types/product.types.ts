@@ -45,8 +45,9 @@ export interface PriceHistoryItem {
   recorded_at: string; // ISO datetime
 }
 
-// ProductSerializer.get_user_reviews -> sadece rating listesi
+// ProductDetailSerializer.get_user_reviews -> onaylı yorumlar (en yeni önce)
 export interface ProductUserReviewSummary {
+  id: number;
   rating: number;
 }
 
@@ -91,9 +92,11 @@ export interface ProductDto {
   product_specs: ProductSpec[];
   affiliate_links: AffiliateLink[];
 
-  user_reviews: ProductUserReviewSummary[];
+  // Sadece detay (slug / id) yanıtlarında; listelerde rating_histogram kullanılır
+  user_reviews?: ProductUserReviewSummary[];
   review_count: number;
   average_rating: number;
+  rating_histogram: Record<"1" | "2" | "3" | "4" | "5", number>;
 
   price_history: PriceHistoryItem[];
   product_tags: ProductTag[];